@@ -35,6 +35,7 @@ REQUIRES = [
 if sys.version_info[0] == 2:
     REQUIRES.append("enum34>=1.1.6")
     REQUIRES.append("configparser>=3.5.0,<=3.8.1")
+    REQUIRES.append("futures>=3.2.0")
 
 setup(
     name="aws-parallelcluster",
@@ -52,12 +53,13 @@ setup(
         "console_scripts": [
             "pcluster = pcluster.cli:main",
             "pcluster-config = pcluster_config.cli:main",
-            "awsbqueues = awsbatch.awsbqueues:main",
-            "awsbhosts = awsbatch.awsbhosts:main",
-            "awsbstat = awsbatch.awsbstat:main",
-            "awsbkill = awsbatch.awsbkill:main",
-            "awsbsub = awsbatch.awsbsub:main",
-            "awsbout = awsbatch.awsbout:main",
+            "awsbqueues = awsbatch.awsbd:awsbqueues",
+            "awsbhosts = awsbatch.awsbd:awsbhosts",
+            "awsbstat = awsbatch.awsbd:awsbstat",
+            "awsbkill = awsbatch.awsbd:awsbkill",
+            "awsbsub = awsbatch.awsbd:awsbsub",
+            "awsbout = awsbatch.awsbd:awsbout",
+            "awsbd = awsbatch.awsbd:main",
         ]
     },
     include_package_data=True,
@@ -0,0 +1,433 @@
+#!/usr/bin/env python2.6
+
+# Copyright 2020 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file.
+# This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+from __future__ import print_function
+
+import errno
+import importlib
+import json
+import os
+import socket
+import sys
+import threading
+
+import argparse
+
+# This module is the entrypoint of all the awsb* commands, it must not import boto3 or any other awsbatch module
+# at module level, to keep the startup of the commands forwarded to the daemon fast.
+
+COMMANDS = ["awsbhosts", "awsbkill", "awsbout", "awsbqueues", "awsbstat", "awsbsub"]
+# options of long running commands, not forwarded to avoid keeping the daemon busy
+NOT_FORWARDED_OPTIONS = {"awsbout": ["-f", "--follow", "-s", "--stream"]}
+# commands reading from stdin, not forwarded when stdin is redirected because the daemon cannot read it
+STDIN_COMMANDS = ["awsbsub"]
+SOCKET_FILE = os.path.join("~", ".parallelcluster", "awsbatch-cli.sock")
+# seconds to wait for the daemon to accept the connection before running the command locally
+CONNECT_TIMEOUT = 1
+# seconds of inactivity after which the daemon exits
+DEFAULT_IDLE_TIMEOUT = 3600
+
+
+def _get_parser():
+    """
+    Parse input parameters and return the ArgumentParser object.
+
+    :return: the ArgumentParser object
+    """
+    parser = argparse.ArgumentParser(
+        description="Runs a per-user daemon executing the awsb* commands, to reuse the AWS clients and the cluster "
+        "configuration between the commands. When the daemon is running the awsb* commands are forwarded to it."
+    )
+    parser.add_argument("--stop", help="Stop the running daemon", action="store_true")
+    parser.add_argument(
+        "-it",
+        "--idle-timeout",
+        help="Seconds of inactivity after which the daemon exits, defaults to %s" % DEFAULT_IDLE_TIMEOUT,
+        type=int,
+        default=DEFAULT_IDLE_TIMEOUT,
+    )
+    parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
+    return parser
+
+
+def _get_socket_file():
+    return os.path.expanduser(SOCKET_FILE)
+
+
+def _get_aws_environment(environment):
+    """Return the AWS_* variables of the environment, used by boto3 when creating the clients reused by the daemon."""
+    return dict((name, value) for name, value in environment.items() if name.startswith("AWS_"))
+
+
+def _send(connection, message):
+    connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+def _connect(socket_file):
+    """
+    Connect to the daemon.
+
+    :param socket_file: path of the daemon socket
+    :return: the connected socket or None if the daemon is not running
+    """
+    if not os.path.exists(socket_file):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.settimeout(CONNECT_TIMEOUT)
+        connection.connect(socket_file)
+        connection.settimeout(None)
+        return connection
+    except socket.error:
+        connection.close()
+        return None
+
+
+def _is_forwardable(command, argv):
+    """
+    Tell if the command can be executed by the daemon.
+
+    Long running commands and commands reading from a redirected stdin are executed locally.
+
+    :param command: command name
+    :param argv: command arguments
+    :return: True if the command can be forwarded to the daemon
+    """
+    if command in STDIN_COMMANDS and not sys.stdin.isatty():
+        return False
+    options = NOT_FORWARDED_OPTIONS.get(command, [])
+    for arg in argv:
+        if arg == "--":
+            # the following arguments are positional
+            break
+        if _matches_option(arg, options):
+            return False
+    return True
+
+
+def _matches_option(arg, options):
+    """
+    Tell if the argument selects one of the given options.
+
+    Long options are matched also by their prefixes, as done by argparse.
+
+    :param arg: command argument
+    :param options: option strings
+    :return: True if the argument selects one of the options
+    """
+    if arg.startswith("--"):
+        name = arg.split("=", 1)[0]
+        return len(name) > 2 and any(option.startswith(name) for option in options if option.startswith("--"))
+    return arg in options
+
+
+def forward_command(command, argv):
+    """
+    Execute the command in the daemon, if running, by printing its output.
+
+    :param command: command name
+    :param argv: command arguments
+    :return: the exit code of the command or None if the command has not been executed by the daemon
+    """
+    if not _is_forwardable(command, argv):
+        return None
+    connection = _connect(_get_socket_file())
+    if not connection:
+        return None
+    try:
+        try:
+            _send(connection, {"command": command, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)})
+            responses = connection.makefile("rb")
+        except socket.error:
+            return None
+
+        try:
+            return _read_responses(responses)
+        except socket.error as e:
+            print("Connection to the awsbd daemon failed with exception: %s" % e, file=sys.stderr)
+            return 1
+    finally:
+        connection.close()
+
+
+def _read_responses(responses):
+    """
+    Print the output of the command sent by the daemon, until the command exits.
+
+    :param responses: file object reading the responses from the daemon connection
+    :return: the exit code of the command or None if the command has been rejected by the daemon
+    """
+    for line in responses:
+        response = json.loads(line.decode("utf-8"))
+        if "stdout" in response:
+            sys.stdout.write(response["stdout"])
+            sys.stdout.flush()
+        elif "stderr" in response:
+            sys.stderr.write(response["stderr"])
+            sys.stderr.flush()
+        elif "exit_code" in response:
+            return response["exit_code"]
+        elif "rejected" in response:
+            return None
+    # the command could have been partially executed, it cannot be executed again locally
+    print("Connection to the awsbd daemon closed before the end of the command", file=sys.stderr)
+    return 1
+
+
+def _get_command_main(command):  # noqa: D202
+    """Build the entrypoint of the given command, forwarding it to the daemon if running."""
+
+    def _main():
+        try:
+            exit_code = forward_command(command, sys.argv[1:])
+        except KeyboardInterrupt:
+            print("Exiting...")
+            sys.exit(0)
+        if exit_code is not None:
+            sys.exit(exit_code)
+        importlib.import_module("awsbatch." + command).main()
+
+    return _main
+
+
+awsbhosts = _get_command_main("awsbhosts")
+awsbkill = _get_command_main("awsbkill")
+awsbout = _get_command_main("awsbout")
+awsbqueues = _get_command_main("awsbqueues")
+awsbstat = _get_command_main("awsbstat")
+awsbsub = _get_command_main("awsbsub")
+
+
+class _ConnectionWriter(object):
+    """File object sending the output of the command to the client."""
+
+    def __init__(self, connection, stream, lock):
+        self.connection = connection
+        self.stream = stream
+        # shared by the writers of the connection, the commands write from their worker threads too
+        self.lock = lock
+        self.connected = True
+
+    def write(self, text):
+        if not self.connected:
+            # the client has been interrupted, interrupt the command as well
+            raise KeyboardInterrupt()
+        if text:
+            try:
+                with self.lock:
+                    _send(self.connection, {self.stream: text})
+            except socket.error:
+                self.connected = False
+                raise KeyboardInterrupt()
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class _TerminalReader(object):
+    """Stdin of the forwarded commands, awsbsub is forwarded only when the client stdin is a terminal."""
+
+    def isatty(self):
+        return True
+
+    def read(self, size=-1):
+        return ""
+
+    def readline(self, size=-1):
+        return ""
+
+
+class AWSBdCommand(object):
+    """awsbd command."""
+
+    def __init__(self, log, socket_file):
+        """
+        Initialize the object.
+
+        :param log: log
+        :param socket_file: path of the daemon socket
+        """
+        self.log = log
+        self.socket_file = socket_file
+        self.aws_environment = _get_aws_environment(os.environ)
+
+    def run(self, idle_timeout):
+        """
+        Serve the commands, one at a time, until stopped or idle for the given number of seconds.
+
+        :param idle_timeout: seconds of inactivity after which the daemon exits
+        """
+        from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory
+        from awsbatch.utils import fail
+
+        connection = _connect(self.socket_file)
+        if connection:
+            connection.close()
+            fail("The awsbd daemon is already running, socket (%s)" % self.socket_file)
+
+        # warm up the commands, and keep clients and configurations between them
+        for command in COMMANDS:
+            importlib.import_module("awsbatch." + command)
+        Boto3ClientFactory.share_clients()
+        AWSBatchCliConfig.share_configs()
+
+        server = self.__bind()
+        print("awsbd daemon listening on %s" % self.socket_file)
+        sys.stdout.flush()
+        try:
+            server.settimeout(idle_timeout)
+            stopped = False
+            while not stopped:
+                try:
+                    connection, _ = server.accept()
+                except socket.timeout:
+                    self.log.info("No commands in the last %s seconds, exiting" % idle_timeout)
+                    break
+                try:
+                    connection.settimeout(None)
+                    stopped = self.__handle(connection)
+                except socket.error as e:
+                    self.log.warning("Connection failed with exception: %s" % e)
+                finally:
+                    connection.close()
+        finally:
+            server.close()
+            os.remove(self.socket_file)
+
+    def __bind(self):
+        """Create the socket, readable and writable only by the current user."""
+        try:
+            os.makedirs(os.path.dirname(self.socket_file))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        if os.path.exists(self.socket_file):
+            # left by a daemon not properly terminated
+            os.remove(self.socket_file)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.socket_file)
+        finally:
+            os.umask(umask)
+        server.listen(16)
+        return server
+
+    def __handle(self, connection):
+        """
+        Handle a client request.
+
+        :param connection: the client connection
+        :return: True if the daemon has been asked to stop
+        """
+        request = json.loads(connection.makefile("rb").readline().decode("utf-8"))
+        command = request.get("command")
+        self.log.info("Received command (%s) with arguments (%s)" % (command, request.get("argv")))
+        if command == "stop":
+            _send(connection, {"exit_code": 0})
+            return True
+        if command not in COMMANDS:
+            _send(connection, {"rejected": "unknown command"})
+        elif _get_aws_environment(request["env"]) != self.aws_environment:
+            # the reused clients would not reflect the client credentials and region
+            _send(connection, {"rejected": "AWS environment variables differ from the daemon ones"})
+        else:
+            _send(connection, {"exit_code": self.__run_command(connection, command, request)})
+        return False
+
+    def __run_command(self, connection, command, request):
+        """
+        Run the command in the client directory and environment, by sending the output to the client.
+
+        :return: the exit code of the command
+        """
+        saved_streams = sys.stdin, sys.stdout, sys.stderr
+        saved_argv = sys.argv
+        saved_cwd = os.getcwd()
+        saved_environment = dict(os.environ)
+        exit_code = 0
+        sys.stdin = _TerminalReader()
+        lock = threading.Lock()
+        sys.stdout = _ConnectionWriter(connection, "stdout", lock)
+        sys.stderr = _ConnectionWriter(connection, "stderr", lock)
+        # used by argparse as program name
+        sys.argv = [command] + request["argv"]
+        try:
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+            importlib.import_module("awsbatch." + command).main(request["argv"])
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                exit_code = e.code or 0
+            else:
+                exit_code = 1
+                self.__print_error(e.code)
+        except KeyboardInterrupt:
+            self.log.info("Command (%s) interrupted by the client" % command)
+            exit_code = 1
+        except Exception as e:
+            exit_code = 1
+            self.__print_error("Unexpected error. Command failed with exception: %s" % e)
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved_streams
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_environment)
+        return exit_code
+
+    @staticmethod
+    def __print_error(message):
+        try:
+            print(message, file=sys.stderr)
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    """Command entrypoint."""
+    from awsbatch.common import config_logger
+    from awsbatch.utils import fail
+
+    try:
+        # parse input parameters
+        args = _get_parser().parse_args(argv)
+        log = config_logger(args.log_level)
+        log.info("Input parameters: %s" % args)
+        socket_file = _get_socket_file()
+
+        if args.stop:
+            connection = _connect(socket_file)
+            if not connection:
+                fail("The awsbd daemon is not running")
+            try:
+                _send(connection, {"command": "stop"})
+                connection.makefile("rb").readline()
+            finally:
+                connection.close()
+            print("awsbd daemon stopped")
+        else:
+            AWSBdCommand(log, socket_file).run(args.idle_timeout)
+    except KeyboardInterrupt:
+        print("Exiting...")
+        sys.exit(0)
+    except Exception as e:
+        fail("Unexpected error. Command failed with exception: %s" % e)
+
+
+if __name__ == "__main__":
+    main()
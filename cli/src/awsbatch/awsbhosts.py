@@ -15,12 +15,18 @@ from __future__ import print_function
 
 import collections
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import argparse
 
 from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, Output, config_logger
 from awsbatch.utils import fail
 
+# maximum number of pages of container instances described in parallel
+MAX_CONCURRENT_REQUESTS = 10
+# EC2 instance attributes used to create the Host items
+EC2_INSTANCE_ATTRIBUTES = ["PrivateIpAddress", "PublicIpAddress", "PrivateDnsName", "PublicDnsName"]
+
 
 def _get_parser():
     """
@@ -119,6 +125,7 @@ class AWSBhostsCommand(object):
         self.output = Output(mapping=mapping)
         self.boto3_factory = boto3_factory
         self.ecs_client = boto3_factory.get_client("ecs")
+        self.ec2_client = boto3_factory.get_client("ec2")
 
     def run(self, compute_environments, show_details=False, instance_ids=None):
         """
@@ -145,11 +152,21 @@ class AWSBhostsCommand(object):
         """
         ecs_clusters = self.__get_ecs_clusters(compute_environments)
         try:
-            for ecs_cluster in ecs_clusters:
-                self.log.info("Cluster ARN = %s" % ecs_cluster)
-                paginator = self.ecs_client.get_paginator("list_container_instances")
-                for page in paginator.paginate(cluster=ecs_cluster):
-                    self._add_host_items(ecs_cluster, page["containerInstanceArns"], instance_ids)
+            # pages of container instances are described in parallel while listing the next ones
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                futures = []
+                for ecs_cluster in ecs_clusters:
+                    self.log.info("Cluster ARN = %s" % ecs_cluster)
+                    paginator = self.ecs_client.get_paginator("list_container_instances")
+                    for page in paginator.paginate(cluster=ecs_cluster):
+                        futures.append(
+                            executor.submit(
+                                self._get_host_items, ecs_cluster, page["containerInstanceArns"], instance_ids
+                            )
+                        )
+                # add items to the output in the listing order
+                for future in futures:
+                    self.output.add(future.result())
         except Exception as e:
             fail("Error listing container instances from AWS ECS. Failed with exception: %s" % e)
 
@@ -222,46 +239,52 @@ class AWSBhostsCommand(object):
                 memory = resource["integerValue"]
         return cpu, memory
 
-    def _add_host_items(self, ecs_cluster_arn, container_instances_arns, instance_ids=None):
+    def _get_host_items(self, ecs_cluster_arn, container_instances_arns, instance_ids=None):
         """
-        Add a list of Hosts to the output.
+        Create the Host items of a page of container instances.
 
         :param ecs_cluster_arn: ECS Cluster arn
         :param container_instances_arns: container ids
         :param instance_ids: hosts requested
+        :return: list of Host items
         """
         self.log.info("Container ARNs = %s" % container_instances_arns)
+        host_items = []
         if container_instances_arns:
             response = self.ecs_client.describe_container_instances(
                 cluster=ecs_cluster_arn, containerInstances=container_instances_arns
             )
-            container_instances = response["containerInstances"]
+            # filter by instance_id if there
+            container_instances = [
+                container_instance
+                for container_instance in response["containerInstances"]
+                if not instance_ids or container_instance["ec2InstanceId"] in instance_ids
+            ]
             self.log.debug("Container Instances = %s" % container_instances)
-            # get ec2_instance_ids
-            ec2_instances_ids = []
-            for container_instance in container_instances:
-                ec2_instances_ids.append(container_instance["ec2InstanceId"])
+            if not container_instances:
+                return host_items
 
-            # get ec2 instances information
+            # get ec2 instances information, by keeping only the required attributes
             ec2_instances = {}
             try:
-                ec2_client = self.boto3_factory.get_client("ec2")
-                paginator = ec2_client.get_paginator("describe_instances")
-                for page in paginator.paginate(InstanceIds=ec2_instances_ids):
-                    for reservation in page["Reservations"]:
-                        for instance in reservation["Instances"]:
-                            ec2_instances[instance["InstanceId"]] = instance
+                response = self.ec2_client.describe_instances(
+                    InstanceIds=[container_instance["ec2InstanceId"] for container_instance in container_instances]
+                )
+                for reservation in response["Reservations"]:
+                    for instance in reservation["Instances"]:
+                        ec2_instances[instance["InstanceId"]] = dict(
+                            (key, instance.get(key)) for key in EC2_INSTANCE_ATTRIBUTES
+                        )
             except Exception as e:
                 fail("Error listing EC2 instances from AWS EC2. Failed with exception: %s" % e)
 
             # merge ec2 and container information
             for container_instance in container_instances:
                 ec2_instance_id = container_instance["ec2InstanceId"]
-                # filter by instance_id if there
-                if not instance_ids or ec2_instance_id in instance_ids:
-                    self.log.debug("Container Instance = %s" % container_instance)
-                    self.log.debug("EC2 Instance = %s" % ec2_instances[ec2_instance_id])
-                    self.output.add(self.__create_host_item(container_instance, ec2_instances[ec2_instance_id]))
+                self.log.debug("Container Instance = %s" % container_instance)
+                self.log.debug("EC2 Instance = %s" % ec2_instances[ec2_instance_id])
+                host_items.append(self.__create_host_item(container_instance, ec2_instances[ec2_instance_id]))
+        return host_items
 
     @staticmethod
     def __get_clusters(compute_environments):
@@ -300,11 +323,11 @@ class AWSBhostsCommand(object):
         return ecs_clusters
 
 
-def main():
+def main(argv=None):
     """Command entrypoint."""
     try:
         # parse input parameters and  config file
-        args = _get_parser().parse_args()
+        args = _get_parser().parse_args(argv)
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
         config = AWSBatchCliConfig(log, args.cluster)
@@ -13,12 +13,21 @@
 # See the License for the specific language governing permissions and limitations under the License.
 from __future__ import print_function
 
+import fnmatch
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import argparse
 
-from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, config_logger
-from awsbatch.utils import fail
+from awsbatch.common import LIST_JOBS_PAGE_SIZE, AWSBatchCliConfig, Boto3ClientFactory, config_logger
+from awsbatch.utils import RateLimiter, chunked_describe_jobs, fail
+
+ACTIVE_JOB_STATUS = ["SUBMITTED", "PENDING", "RUNNABLE", "STARTING", "RUNNING"]
+
+# maximum number of terminate_job requests in parallel
+MAX_CONCURRENT_REQUESTS = 10
+# number of killed jobs between two progress messages
+PROGRESS_INTERVAL = 100
 
 
 def _get_parser():
@@ -44,11 +53,57 @@ def _get_parser():
         help="A message to attach to the job that explains the reason for canceling it",
         default="Terminated by the user",
     )
+    parser.add_argument(
+        "-qf",
+        "--queue-filter",
+        help="Cancels/terminates all the jobs of the cluster's Job Queue matching the --status and --name filters, "
+        "instead of the given job IDs. At least one of the filters is required",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-s",
+        "--status",
+        help="Comma separated list of job status to cancel/terminate, can be used only with --queue-filter. "
+        'Defaults to all "active" jobs. Accepted values are: SUBMITTED, PENDING, RUNNABLE, STARTING, RUNNING',
+    )
+    parser.add_argument(
+        "-n", "--name", help="Shell-style pattern matching the name of the jobs to cancel/terminate with --queue-filter"
+    )
+    parser.add_argument(
+        "-tr",
+        "--terminate-rate",
+        help="Maximum number of jobs cancelled/terminated per second. Default is 20",
+        type=float,
+        default=20,
+    )
     parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
-    parser.add_argument("job_ids", help="A space separated list of job IDs to cancel/terminate", nargs="+")
+    parser.add_argument("job_ids", help="A space separated list of job IDs to cancel/terminate", nargs="*")
     return parser
 
 
+def _validate_parameters(args):
+    """
+    Validate input parameters.
+
+    :param args: args variable
+    """
+    if args.queue_filter and args.job_ids:
+        fail("Parameters validation error: job IDs cannot be specified with --queue-filter option")
+    if not args.queue_filter and not args.job_ids:
+        fail("Parameters validation error: job IDs or --queue-filter option are required")
+    if args.name and not args.queue_filter:
+        fail("Parameters validation error: --name can be used only with --queue-filter option")
+    if args.status and not args.queue_filter:
+        fail("Parameters validation error: --status can be used only with --queue-filter option")
+    if args.queue_filter and not args.status and not args.name:
+        fail("Parameters validation error: --queue-filter option requires at least one of --status and --name filters")
+    for status in args.status.split(",") if args.status else []:
+        if status.strip().upper() not in ACTIVE_JOB_STATUS:
+            fail("Parameters validation error: unsupported job status (%s)" % status)
+    if args.terminate_rate <= 0:
+        fail("Parameters validation error: --terminate-rate must be greater than 0")
+
+
 class AWSBkillCommand(object):
     """awsbkill command."""
 
@@ -63,58 +118,124 @@ class AWSBkillCommand(object):
         self.boto3_factory = boto3_factory
         self.batch_client = boto3_factory.get_client("batch")
 
-    def run(self, job_ids, reason):
+    def run(self, job_ids, reason, job_queue=None, job_status=None, job_name=None, terminate_rate=20):
         """
         Kill/cancel the jobs.
 
         :param job_ids: list of job ids
         :param reason: optional reason
+        :param job_queue: job queue to search for the jobs to kill, when job_ids are not given
+        :param job_status: list of status of the jobs to kill, when job_ids are not given
+        :param job_name: shell-style pattern of the name of the jobs to kill, when job_ids are not given
+        :param terminate_rate: maximum number of jobs killed per second
+        """
+        if job_ids:
+            jobs = chunked_describe_jobs(self.batch_client, job_ids)
+            self.log.debug(jobs)
+
+            if len(jobs) != len(job_ids):
+                available_job_ids = []
+                for job in jobs:
+                    available_job_ids.append(job["jobId"])
+                for job_id in job_ids:
+                    if job_id not in available_job_ids:
+                        print("Job (%s) not found." % job_id)
+            self.__kill_jobs(jobs, reason, terminate_rate)
+        else:
+            jobs = self.__list_jobs(job_queue, job_status, job_name)
+            print("Found %s jobs to cancel/terminate." % len(jobs))
+            self.__kill_jobs(jobs, reason, terminate_rate, show_progress=True)
+
+    def __list_jobs(self, job_queue, job_status, job_name=None):
         """
-        jobs = self.batch_client.describe_jobs(jobs=job_ids)["jobs"]
-        self.log.debug(jobs)
-
-        if len(jobs) != len(job_ids):
-            available_job_ids = []
-            for job in jobs:
-                available_job_ids.append(job["jobId"])
-            for job_id in job_ids:
-                if job_id not in available_job_ids:
-                    print("Job (%s) not found." % job_id)
-        self.__kill_jobs(jobs, reason)
-
-    def __kill_jobs(self, jobs, reason):
+        List the jobs of the queue in the given status, optionally filtered by name.
+
+        :param job_queue: job queue name or ARN
+        :param job_status: list of job status
+        :param job_name: shell-style pattern of the job name
+        :return: list of job summaries
+        """
+        jobs = []
+        try:
+            paginator = self.batch_client.get_paginator("list_jobs")
+            for status in job_status:
+                # the biggest pages allowed, to list the jobs with the minimum number of calls
+                for page in paginator.paginate(
+                    jobQueue=job_queue, jobStatus=status, PaginationConfig={"PageSize": LIST_JOBS_PAGE_SIZE}
+                ):
+                    for job in page["jobSummaryList"]:
+                        if not job_name or fnmatch.fnmatchcase(job["jobName"], job_name):
+                            # the status is not always part of the job summary
+                            job.setdefault("status", status)
+                            jobs.append(job)
+        except Exception as e:
+            fail("Error listing jobs from AWS Batch. Failed with exception: %s" % e)
+        return jobs
+
+    def __kill_jobs(self, jobs, reason, terminate_rate, show_progress=False):
         """
-        Kill given jobs.
+        Kill given jobs, in parallel.
 
-        :param jobs: a list of jobs ids
+        :param jobs: a list of jobs
         :param reason: reason for canceling the job
+        :param terminate_rate: maximum number of jobs killed per second
+        :param show_progress: print the number of processed jobs instead of a message for every job
         """
+        jobs_to_kill = []
         for job in jobs:
             status = job["status"]
-            job_id = job["jobId"]
             if status == "FAILED" or status == "SUCCEEDED":
-                print("Job (%s) is already in (%s) status." % (job_id, status))
+                print("Job (%s) is already in (%s) status." % (job["jobId"], status))
             else:
+                jobs_to_kill.append(job)
+        if not jobs_to_kill:
+            return
+
+        rate_limiter = RateLimiter(terminate_rate)
+        failures = 0
+        with ThreadPoolExecutor(max_workers=min(len(jobs_to_kill), MAX_CONCURRENT_REQUESTS)) as executor:
+            futures = dict(
+                (executor.submit(self.__kill_job, job["jobId"], reason, rate_limiter), job) for job in jobs_to_kill
+            )
+            for processed, future in enumerate(as_completed(futures), start=1):
+                job_id = futures[future]["jobId"]
+                status = futures[future]["status"]
                 try:
-                    self.batch_client.terminate_job(jobId=job_id, reason=reason)
-                    if status == "SUBMITTED" or status == "PENDING" or status == "RUNNABLE":
-                        action = "cancellation"
-                    else:
-                        # status == 'STARTING' or status == 'RUNNING'
-                        action = "termination"
-                    print(
-                        "Your job %s request for job (%s) in status (%s) has been submitted." % (action, job_id, status)
-                    )
+                    future.result()
+                    if not show_progress:
+                        if status == "SUBMITTED" or status == "PENDING" or status == "RUNNABLE":
+                            action = "cancellation"
+                        else:
+                            # status == 'STARTING' or status == 'RUNNING'
+                            action = "termination"
+                        print(
+                            "Your job %s request for job (%s) in status (%s) has been submitted."
+                            % (action, job_id, status)
+                        )
                 except Exception as e:
-                    print("Error killing job (%s). Failed with exception: %s" % e)
-                    pass
+                    failures += 1
+                    print("Error killing job (%s). Failed with exception: %s" % (job_id, e))
+                if show_progress and (processed % PROGRESS_INTERVAL == 0 or processed == len(jobs_to_kill)):
+                    print("Processed %s/%s jobs, %s failures." % (processed, len(jobs_to_kill), failures))
 
+    def __kill_job(self, job_id, reason, rate_limiter):
+        """
+        Kill a single job, waiting for the rate limiter.
 
-def main():
+        :param job_id: job id
+        :param reason: reason for canceling the job
+        :param rate_limiter: RateLimiter shared by the requests
+        """
+        rate_limiter.wait()
+        self.batch_client.terminate_job(jobId=job_id, reason=reason)
+
+
+def main(argv=None):
     """Command entrypoint."""
     try:
         # parse input parameters and config file
-        args = _get_parser().parse_args()
+        args = _get_parser().parse_args(argv)
+        _validate_parameters(args)
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
         config = AWSBatchCliConfig(log=log, cluster=args.cluster)
@@ -124,7 +245,16 @@ def main():
             aws_access_key_id=config.aws_access_key_id,
             aws_secret_access_key=config.aws_secret_access_key,
         )
-        AWSBkillCommand(log, boto3_factory).run(job_ids=args.job_ids, reason=args.reason)
+        AWSBkillCommand(log, boto3_factory).run(
+            job_ids=args.job_ids,
+            reason=args.reason,
+            job_queue=config.job_queue,
+            job_status=(
+                [status.strip().upper() for status in args.status.split(",")] if args.status else ACTIVE_JOB_STATUS
+            ),
+            job_name=args.name,
+            terminate_rate=args.terminate_rate,
+        )
 
     except KeyboardInterrupt:
         print("Exiting...")
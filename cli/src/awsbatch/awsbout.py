@@ -13,13 +13,124 @@
 # See the License for the specific language governing permissions and limitations under the License.
 from __future__ import print_function
 
+import errno
+import heapq
+import io
+import os
+import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import argparse
 
 from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, config_logger
-from awsbatch.utils import convert_to_date, fail, get_job_type
+from awsbatch.utils import chunked_describe_jobs, convert_to_date, fail, get_job_children_ids, get_job_type
+
+# maximum number of log streams retrieved in parallel
+MAX_CONCURRENT_REQUESTS = 10
+
+# bounds, in seconds, of the adaptive polling period of the --follow option
+FOLLOW_MIN_PERIOD = 1
+FOLLOW_MAX_PERIOD = 30
+# get_log_events returns up to 10,000 events or 1 MB of events, a page close to these limits is considered full
+MAX_PAGE_EVENTS = 10000
+FULL_PAGE_SIZE = 1048576 - 262144
+# bytes added to the size of every event message by CloudWatch Logs
+EVENT_OVERHEAD = 26
+
+JOB_TERMINAL_STATUS = ["SUCCEEDED", "FAILED"]
+
+
+def _get_position_file(log_stream):
+    """
+    Get the file used to store the position reached in the given log stream by the --follow option.
+
+    :param log_stream: log stream name
+    :return: the path of the position file
+    """
+    return os.path.expanduser(
+        os.path.join("~", ".parallelcluster", "awsbout", re.sub(r"[^\w.-]", "_", log_stream) + ".position")
+    )
+
+
+def _read_position(position_file):
+    """
+    Read the nextForwardToken stored in the given position file.
+
+    :param position_file: position file path
+    :return: the stored token, or None if the file doesn't exist
+    """
+    try:
+        with open(position_file) as f:
+            return f.read().strip() or None
+    except (IOError, OSError):  # noqa: B014
+        return None
+
+
+def _write_position(position_file, position):
+    """
+    Store the given position in the position file, by replacing it atomically.
+
+    :param position_file: position file path
+    :param position: the position to store, e.g. a nextForwardToken
+    """
+    _makedirs(os.path.dirname(position_file))
+    temp_file = position_file + ".tmp"
+    with open(temp_file, "w") as f:
+        f.write(position)
+    os.rename(temp_file, position_file)
+
+
+def _is_full_page(events):
+    """
+    Tell if the given get_log_events page is full, so that more events could be already available.
+
+    :param events: events of the page
+    :return: True if the page is close to the size limits of get_log_events
+    """
+    size = sum(len(event["message"].encode("utf-8")) + EVENT_OVERHEAD for event in events)
+    return len(events) >= MAX_PAGE_EVENTS or size >= FULL_PAGE_SIZE
+
+
+def _remove_position(position_file):
+    """
+    Remove the given position file, if there.
+
+    :param position_file: position file path
+    """
+    try:
+        os.remove(position_file)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+def _save_position(position_file, kwargs, next_token):
+    """
+    Store the given nextForwardToken, if changed, and update the get_log_events arguments to continue from it.
+
+    :param position_file: position file path
+    :param kwargs: get_log_events arguments
+    :param next_token: nextForwardToken returned by get_log_events
+    """
+    if next_token != kwargs.get("nextToken"):
+        _write_position(position_file, next_token)
+        kwargs.pop("limit", None)
+        kwargs.update(nextToken=next_token, startFromHead=True)
+
+
+def _makedirs(path):
+    """
+    Create the given directory, if not already there.
+
+    :param path: directory path
+    """
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
 
 
 def _get_parser():
@@ -50,8 +161,29 @@ def _get_parser():
         action="store_true",
     )
     parser.add_argument("-sp", "--stream-period", help="Sets the streaming period. Default is 5", type=int)
+    parser.add_argument(
+        "-f",
+        "--follow",
+        help="Gets the job output and waits for additional output to be produced until the job terminates. "
+        "The polling period adapts to the job output rate. The position reached in the job output is saved, "
+        "so that a subsequent --follow resumes from it. "
+        "It can be used in conjunction with --tail to start from the latest <tail> lines of the job output",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-dl",
+        "--download",
+        help="Downloads the job output to the given directory instead of printing it. For array and MNP jobs, "
+        "the output of the children is downloaded in parallel, one <child-index>.log file per child. "
+        "An interrupted download is resumed by running the command again",
+        metavar="DIR",
+    )
     parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
-    parser.add_argument("job_id", help="The job ID")
+    parser.add_argument(
+        "job_id",
+        help="The job ID. If the job is an array or an MNP job, the output of all its children is shown, "
+        "merged by timestamp and prefixed by the index of the child",
+    )
     return parser
 
 
@@ -66,6 +198,14 @@ def _validate_parameters(args):
             fail("Parameters validation error: --tail and --head option cannot be set at the same time")
         if args.stream:
             fail("Parameters validation error: --stream and --head option cannot be set at the same time")
+        if args.follow:
+            fail("Parameters validation error: --follow and --head option cannot be set at the same time")
+
+    if args.stream and args.follow:
+        fail("Parameters validation error: --stream and --follow option cannot be set at the same time")
+
+    if args.download and (args.head or args.tail or args.stream or args.follow):
+        fail("Parameters validation error: --download cannot be used with --head, --tail, --stream or --follow")
 
     if args.stream_period and not args.stream:
         fail("Parameters validation error: --stream-period can be used only with --stream option")
@@ -84,21 +224,39 @@ class AWSBoutCommand(object):
         self.log = log
         self.boto3_factory = boto3_factory
 
-    def run(self, job_id, head=None, tail=None, stream=None, stream_period=None):
+    def run(self, job_id, head=None, tail=None, stream=None, stream_period=None, follow=None, download_dir=None):
         """Print job output."""
-        log_stream = self.__get_log_stream(job_id)
-        if log_stream:
-            self.log.info("Log stream is (%s)" % log_stream)
-            self.__print_log_stream(log_stream, head, tail, stream, stream_period)
+        job, log_streams = self.__get_log_streams(job_id)
+        if download_dir:
+            if log_streams:
+                self.__download_log_streams(job_id, log_streams, download_dir)
+        elif get_job_type(job) == "SIMPLE":
+            if log_streams:
+                log_stream = log_streams[0][1]
+                self.log.info("Log stream is (%s)" % log_stream)
+                if follow:
+                    self.__follow_log_stream(job_id, log_stream, tail)
+                else:
+                    self.__print_log_stream(log_stream, head, tail, stream, stream_period)
+        elif stream or follow:
+            fail(
+                "Parameters validation error: --stream and --follow cannot be used with jobs having children (%s)"
+                % job_id
+            )
+        elif log_streams:
+            self.log.info("Log streams are (%s)" % log_streams)
+            self.__print_merged_log_streams(log_streams, head, tail)
 
-    def __get_log_stream(self, job_id):
+    def __get_log_streams(self, job_id):
         """
-        Get log stream for the given job.
+        Get log streams for the given job.
+
+        For array and MNP jobs the log streams of all the children are returned, identified by their index.
 
         :param job_id: job id (ARN)
-        :return: the log_stream if there, or None
+        :return: the described job and the list of (child_index, log_stream) pairs with an available log stream
         """
-        log_stream = None
+        log_streams = []
         try:
             batch_client = self.boto3_factory.get_client("batch")
             jobs = batch_client.describe_jobs(jobs=[job_id])["jobs"]
@@ -106,26 +264,202 @@ class AWSBoutCommand(object):
                 job = jobs[0]
                 self.log.debug(job)
 
-                if "nodeProperties" in job:
-                    # MNP job
-                    container = job["nodeProperties"]["nodeRangeProperties"][0]["container"]
-                elif "container" in job:
-                    container = job["container"]
-                else:
-                    container = {}
-
-                if get_job_type(job) != "SIMPLE":
-                    fail("No output available for the Job (%s). Please ask for its children." % job["jobId"])
-                else:
-                    if "logStreamName" in container:
-                        log_stream = container.get("logStreamName")
+                if get_job_type(job) == "SIMPLE":
+                    log_stream = self.__get_job_log_stream(job)
+                    if log_stream:
+                        log_streams.append((None, log_stream))
                     else:
                         print("No log stream found for job (%s) in the status (%s)" % (job_id, job["status"]))
+                else:
+                    children = chunked_describe_jobs(batch_client, get_job_children_ids(job))
+                    for child in children:
+                        log_stream = self.__get_job_log_stream(child)
+                        child_index = re.split(r"[:#]", child["jobId"])[-1]
+                        if log_stream:
+                            log_streams.append((child_index, log_stream))
+                        else:
+                            self.log.info(
+                                "No log stream found for child (%s) in the status (%s)"
+                                % (child["jobId"], child["status"])
+                            )
+                    if not log_streams:
+                        print("No log stream found for the children of job (%s)" % job_id)
             else:
                 fail("Error asking job output for job (%s). Job not found." % job_id)
         except Exception as e:
             fail("Error listing jobs from AWS Batch. Failed with exception: %s" % e)
-        return log_stream
+        return job, log_streams
+
+    @staticmethod
+    def __get_job_log_stream(job):
+        """
+        Get the log stream name from the container of the given job.
+
+        :param job: the job dictionary returned by AWS Batch api
+        :return: the log stream name if there, None otherwise
+        """
+        if "nodeProperties" in job and "nodeRangeProperties" in job["nodeProperties"]:
+            # MNP job
+            container = job["nodeProperties"]["nodeRangeProperties"][0]["container"]
+        elif "container" in job:
+            container = job["container"]
+        else:
+            container = {}
+        return container.get("logStreamName")
+
+    def __print_merged_log_streams(self, log_streams, head=None, tail=None):
+        """
+        Retrieve the given log streams concurrently and print their events merged by timestamp.
+
+        Every line is prefixed by the index of the child the event belongs to.
+
+        :param log_streams: list of (child_index, log_stream) pairs
+        """
+        logs_client = self.boto3_factory.get_client("logs")
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(log_streams), MAX_CONCURRENT_REQUESTS)) as executor:
+                futures = [
+                    executor.submit(self.__get_log_stream_events, logs_client, child_index, log_stream, head, tail)
+                    for child_index, log_stream in log_streams
+                ]
+                streams_events = [future.result() for future in futures]
+
+            events_found = False
+            # every stream is already sorted by timestamp, ties are broken by child position
+            for timestamp, _, _, child_index, message in heapq.merge(*streams_events):
+                events_found = True
+                print("[{0}] {1}: {2}".format(child_index, convert_to_date(timestamp), message))
+            if not events_found:
+                print("No events found.")
+        except KeyboardInterrupt:
+            self.log.info("Interrupted by the user")
+            exit(0)
+        except Exception as e:
+            fail("Error retrieving job output from AWS CloudWatch Logs. Failed with exception: %s" % e)
+
+    def __get_log_stream_events(self, logs_client, child_index, log_stream, head=None, tail=None):
+        """
+        Retrieve the events of a single log stream, following the pagination if no head or tail is given.
+
+        :param logs_client: boto3 logs client
+        :param child_index: index of the child the log stream belongs to
+        :param log_stream: log stream name
+        :return: list of (timestamp, child_position, event_position, child_index, message) tuples sorted by timestamp
+        """
+        kwargs = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream}
+        if head:
+            kwargs.update(limit=head, startFromHead=True)
+        elif tail:
+            kwargs.update(limit=tail, startFromHead=False)
+        else:
+            kwargs.update(startFromHead=True)
+
+        child_position = int(child_index)
+        events = []
+        while True:
+            response = logs_client.get_log_events(**kwargs)
+            for event in response["events"]:
+                events.append((event["timestamp"], child_position, len(events), child_index, event["message"]))
+            next_token = response.get("nextForwardToken")
+            # if nextForwardToken is the same we passed in, we reached the end of the stream
+            if head or tail or not next_token or next_token == kwargs.get("nextToken"):
+                break
+            kwargs.update(nextToken=next_token)
+        self.log.info("Retrieved %s events from log stream (%s)" % (len(events), log_stream))
+        return events
+
+    def __download_log_streams(self, job_id, log_streams, download_dir):
+        """
+        Download the given log streams concurrently, one file per log stream.
+
+        :param job_id: job id, used to name the file of a SIMPLE job
+        :param log_streams: list of (child_index, log_stream) pairs
+        :param download_dir: directory where to create the files
+        """
+        logs_client = self.boto3_factory.get_client("logs")
+        try:
+            _makedirs(download_dir)
+            with ThreadPoolExecutor(max_workers=min(len(log_streams), MAX_CONCURRENT_REQUESTS)) as executor:
+                futures = {}
+                for child_index, log_stream in log_streams:
+                    output_file = os.path.join(download_dir, "{0}.log".format(child_index or job_id))
+                    future = executor.submit(self.__download_log_stream, logs_client, log_stream, output_file)
+                    futures[future] = log_stream
+
+                failures = 0
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failures += 1
+                        print("Error downloading log stream (%s). Failed with exception: %s" % (futures[future], e))
+        except KeyboardInterrupt:
+            self.log.info("Interrupted by the user")
+            exit(0)
+        except Exception as e:
+            fail("Error downloading job output from AWS CloudWatch Logs. Failed with exception: %s" % e)
+
+        if failures:
+            fail(
+                "%s out of %s log streams have not been downloaded. Run the command again to resume the download."
+                % (failures, len(log_streams))
+            )
+        print("Downloaded %s log streams to %s" % (len(log_streams), download_dir))
+
+    def __download_log_stream(self, logs_client, log_stream, output_file):
+        """
+        Download a single log stream to the given file, one page at a time.
+
+        After every page the nextForwardToken and the size of the file are stored in a <output_file>.position file,
+        so that an interrupted download is resumed by truncating the file to the stored size.
+        The position file is removed once the end of the stream is reached.
+
+        :param logs_client: boto3 logs client
+        :param log_stream: log stream name
+        :param output_file: file where to write the log events messages
+        """
+        position_file = output_file + ".position"
+        kwargs = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream, "startFromHead": True}
+        next_token, size = self.__load_download_position(log_stream, position_file, output_file)
+        if next_token:
+            kwargs.update(nextToken=next_token)
+        with io.open(output_file, "ab") as f:
+            f.truncate(size)
+            while True:
+                response = logs_client.get_log_events(**kwargs)
+                for event in response["events"]:
+                    f.write((event["message"] + "\n").encode("utf-8"))
+                f.flush()
+                next_token = response["nextForwardToken"]
+                # if nextForwardToken is the same we passed in, we reached the end of the stream
+                if next_token == kwargs.get("nextToken"):
+                    break
+                _write_position(position_file, "{0}\n{1}".format(next_token, os.fstat(f.fileno()).st_size))
+                kwargs.update(nextToken=next_token)
+        _remove_position(position_file)
+        self.log.info("Log stream (%s) downloaded to (%s)" % (log_stream, output_file))
+
+    def __load_download_position(self, log_stream, position_file, output_file):
+        """
+        Get the position to resume the download from, if stored and still matching the downloaded file.
+
+        :param log_stream: log stream name
+        :param position_file: position file path
+        :param output_file: file where the log events messages are written
+        :return: the stored nextForwardToken and file size, or (None, 0) to download from the head
+        """
+        position = _read_position(position_file)
+        if position:
+            next_token, size = position.split("\n")
+            size = int(size)
+            if os.path.isfile(output_file) and os.path.getsize(output_file) >= size:
+                self.log.info("Resuming download of log stream (%s) from position (%s)" % (log_stream, next_token))
+                return next_token, size
+            self.log.info(
+                "File (%s) is missing or shorter than the stored position, downloading log stream (%s) from the head"
+                % (output_file, log_stream)
+            )
+        return None, 0
 
     def __print_log_stream(self, log_stream, head=None, tail=None, stream=None, stream_period=None):  # noqa: C901 FIXME
         """
@@ -183,6 +517,77 @@ class AWSBoutCommand(object):
         except Exception as e:
             fail("Error listing jobs from AWS Batch. Failed with exception: %s" % e)
 
+    def __follow_log_stream(self, job_id, log_stream, tail=None):
+        """
+        Print the log stream and wait for additional output until the job terminates.
+
+        The stream is polled again immediately when a full page of events is retrieved, otherwise after a period
+        that is halved when new events are retrieved and doubled when the stream is idle, within
+        [FOLLOW_MIN_PERIOD, FOLLOW_MAX_PERIOD]. The job status is checked only when the stream is idle.
+        The nextForwardToken is stored after every poll, to resume from it in the next execution, and removed
+        once the stream has been drained after the job termination.
+
+        :param job_id: job id, used to check the job status
+        :param log_stream: job log stream
+        :param tail: number of lines to start from, when there is no stored position
+        """
+        logs_client = self.boto3_factory.get_client("logs")
+        batch_client = self.boto3_factory.get_client("batch")
+        position_file = _get_position_file(log_stream)
+        kwargs = self.__load_position(log_stream, position_file, tail)
+
+        try:
+            period = FOLLOW_MIN_PERIOD
+            job_terminated = False
+            while True:
+                response = logs_client.get_log_events(**kwargs)
+                events = response["events"]
+                self.__print_events(events)
+                _save_position(position_file, kwargs, response["nextForwardToken"])
+
+                if events:
+                    period = max(FOLLOW_MIN_PERIOD, period / 2.0)
+                    if job_terminated or _is_full_page(events):
+                        # more events could be already available, poll again without waiting
+                        continue
+                elif job_terminated:
+                    # the stream has been drained after the job termination
+                    _remove_position(position_file)
+                    break
+                else:
+                    status = batch_client.describe_jobs(jobs=[job_id])["jobs"][0]["status"]
+                    if status in JOB_TERMINAL_STATUS:
+                        self.log.info("Job (%s) is in the (%s) status, retrieving remaining output" % (job_id, status))
+                        job_terminated = True
+                        continue
+                    period = min(FOLLOW_MAX_PERIOD, period * 2)
+
+                self.log.info("Waiting other %s seconds..." % period)
+                time.sleep(period)
+        except KeyboardInterrupt:
+            self.log.info("Interrupted by the user")
+            exit(0)
+        except Exception as e:
+            fail("Error retrieving job output from AWS CloudWatch Logs. Failed with exception: %s" % e)
+
+    def __load_position(self, log_stream, position_file, tail=None):
+        """
+        Get the get_log_events arguments to start from the stored position or, if not available, from the tail.
+
+        :param log_stream: job log stream
+        :param position_file: position file path
+        :param tail: number of lines to start from, when there is no stored position
+        :return: get_log_events arguments
+        """
+        kwargs = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream, "startFromHead": True}
+        next_token = _read_position(position_file)
+        if next_token:
+            self.log.info("Resuming log stream (%s) from position (%s)" % (log_stream, next_token))
+            kwargs.update(nextToken=next_token)
+        elif tail:
+            kwargs.update(limit=tail, startFromHead=False)
+        return kwargs
+
     @staticmethod
     def __print_events(events):
         """
@@ -194,11 +599,11 @@ class AWSBoutCommand(object):
             print("{0}: {1}".format(convert_to_date(event["timestamp"]), event["message"]))
 
 
-def main():
+def main(argv=None):
     """Command entrypoint."""
     try:
         # parse input parameters and config file
-        args = _get_parser().parse_args()
+        args = _get_parser().parse_args(argv)
         _validate_parameters(args)
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
@@ -211,7 +616,13 @@ def main():
         )
 
         AWSBoutCommand(log, boto3_factory).run(
-            job_id=args.job_id, head=args.head, tail=args.tail, stream=args.stream, stream_period=args.stream_period
+            job_id=args.job_id,
+            head=args.head,
+            tail=args.tail,
+            stream=args.stream,
+            stream_period=args.stream_period,
+            follow=args.follow,
+            download_dir=args.download,
         )
 
     except KeyboardInterrupt:
@@ -14,13 +14,26 @@
 from __future__ import print_function
 
 import collections
+import errno
+import json
+import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
 import argparse
 
-from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, Output, config_logger
+from awsbatch.common import LIST_JOBS_PAGE_SIZE, AWSBatchCliConfig, Boto3ClientFactory, Output, config_logger
 from awsbatch.utils import fail
 
+ACTIVE_JOB_STATUS = ["SUBMITTED", "PENDING", "RUNNABLE", "STARTING", "RUNNING"]
+# maximum number of list_jobs paginations executed in parallel with the --stats option
+MAX_CONCURRENT_REQUESTS = 10
+# seconds for which the queue statistics are reused from the local cache
+STATS_CACHE_TTL = 15
+STATS_CACHE_FILE = os.path.join("~", ".parallelcluster", "awsbqueues-stats.json")
+
 
 def _get_parser():
     """
@@ -40,6 +53,13 @@ def _get_parser():
     parser = argparse.ArgumentParser(description="Shows the Job Queue associated to the cluster.")
     parser.add_argument("-c", "--cluster", help="Cluster to use")
     parser.add_argument("-d", "--details", help="Show queues details", action="store_true")
+    parser.add_argument(
+        "-s",
+        "--stats",
+        help="Show the number of jobs in each active status and the age of the oldest RUNNABLE job. "
+        "Statistics are cached for %s seconds" % STATS_CACHE_TTL,
+        action="store_true",
+    )
     parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
     parser.add_argument(
         "job_queues",
@@ -60,19 +80,36 @@ class Queue(object):
         self.priority = priority
         self.status = status
         self.status_reason = status_reason
+        self.oldest_runnable_age = "-"
+        for status in ACTIVE_JOB_STATUS:
+            setattr(self, status.lower(), "-")
+
+    def set_stats(self, stats):
+        """
+        Set the queue statistics.
+
+        :param stats: dictionary with the number of jobs by status and the creation time of the oldest runnable job
+        """
+        for status in ACTIVE_JOB_STATUS:
+            setattr(self, status.lower(), stats["counts"][status])
+        if stats["oldest_runnable"] is not None:
+            age = max(0, int(time.time() - stats["oldest_runnable"] / 1000))
+            self.oldest_runnable_age = str(timedelta(seconds=age))
 
 
 class AWSBqueuesCommand(object):
     """awsbqueues command."""
 
-    def __init__(self, log, boto3_factory):
+    def __init__(self, log, boto3_factory, show_stats=False):
         """
         Initialize the object.
 
         :param log: log
         :param boto3_factory: an initialized Boto3ClientFactory object
+        :param show_stats: add the queue statistics to the output
         """
         self.log = log
+        self.show_stats = show_stats
         mapping = collections.OrderedDict(
             [
                 ("jobQueueArn", "arn"),
@@ -82,6 +119,10 @@ class AWSBqueuesCommand(object):
                 ("statusReason", "status_reason"),
             ]
         )
+        if show_stats:
+            for status in ACTIVE_JOB_STATUS:
+                mapping[status] = status.lower()
+            mapping["oldestRunnableAge"] = "oldest_runnable_age"
         self.output = Output(mapping=mapping)
         self.boto3_factory = boto3_factory
 
@@ -90,6 +131,8 @@ class AWSBqueuesCommand(object):
         self.__init_output(job_queues)
         if show_details:
             self.output.show()
+        elif self.show_stats:
+            self.output.show_table(["jobQueueName", "status"] + ACTIVE_JOB_STATUS + ["oldestRunnableAge"])
         else:
             self.output.show_table(["jobQueueName", "status"])
 
@@ -106,12 +149,99 @@ class AWSBqueuesCommand(object):
             self.log.info("Job Queues: %s" % job_queues)
             self.log.debug(queues)
 
-            for queue in queues:
-                self.output.add(self.__new_queue(queue=queue))
+            queue_items = [self.__new_queue(queue=queue) for queue in queues]
+            if self.show_stats:
+                stats = self.__get_stats([queue.arn for queue in queue_items])
+                for queue in queue_items:
+                    queue.set_stats(stats[queue.arn])
+            self.output.add(queue_items)
 
         except Exception as e:
             fail("Error listing queues from AWS Batch. Failed with exception: %s" % e)
 
+    def __get_stats(self, queue_arns):
+        """
+        Get the statistics of the given queues, from the local cache if not expired.
+
+        The jobs of the queues not in the cache are counted in parallel, with a list_jobs pagination for each
+        queue and status.
+
+        :param queue_arns: list of job queue ARNs
+        :return: dictionary with the statistics of each queue
+        """
+        cache_file = os.path.expanduser(STATS_CACHE_FILE)
+        cache = self.__read_stats_cache(cache_file)
+        now = time.time()
+        stats = dict(
+            (arn, cache[arn])
+            for arn in queue_arns
+            if arn in cache and 0 <= now - cache[arn]["timestamp"] <= STATS_CACHE_TTL
+        )
+        queues_to_count = [arn for arn in queue_arns if arn not in stats]
+        if queues_to_count:
+            batch_client = self.boto3_factory.get_client("batch")
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+                futures = dict(
+                    ((arn, status), executor.submit(self.__count_jobs, batch_client, arn, status))
+                    for arn in queues_to_count
+                    for status in ACTIVE_JOB_STATUS
+                )
+            for arn in queues_to_count:
+                stats[arn] = {"timestamp": now, "counts": {}, "oldest_runnable": None}
+                for status in ACTIVE_JOB_STATUS:
+                    count, oldest = futures[(arn, status)].result()
+                    stats[arn]["counts"][status] = count
+                    if status == "RUNNABLE":
+                        stats[arn]["oldest_runnable"] = oldest
+                cache[arn] = stats[arn]
+            self.__write_stats_cache(cache_file, cache)
+        return stats
+
+    def __count_jobs(self, batch_client, job_queue, status):
+        """
+        Count the jobs of the given queue in the given status.
+
+        :param batch_client: the AWS Batch client
+        :param job_queue: job queue ARN
+        :param status: job status
+        :return: a tuple with the number of jobs and the creation time of the oldest job (None if no jobs)
+        """
+        count = 0
+        oldest = None
+        # the biggest pages allowed, to count the jobs with the minimum number of calls
+        for page in batch_client.get_paginator("list_jobs").paginate(
+            jobQueue=job_queue, jobStatus=status, PaginationConfig={"PageSize": LIST_JOBS_PAGE_SIZE}
+        ):
+            jobs = page["jobSummaryList"]
+            count += len(jobs)
+            for job in jobs:
+                if "createdAt" in job and (oldest is None or job["createdAt"] < oldest):
+                    oldest = job["createdAt"]
+        self.log.info("Queue (%s) has (%s) jobs in (%s) status" % (job_queue, count, status))
+        return count, oldest
+
+    def __read_stats_cache(self, cache_file):
+        try:
+            with open(cache_file) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError) as e:  # noqa: B014
+            self.log.info("Unable to read queue statistics cache (%s): %s" % (cache_file, e))
+            return {}
+
+    def __write_stats_cache(self, cache_file, cache):
+        try:
+            try:
+                os.makedirs(os.path.dirname(cache_file))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            temp_file = "{0}.{1}".format(cache_file, os.getpid())
+            with open(temp_file, "w") as f:
+                json.dump(cache, f)
+            os.rename(temp_file, cache_file)
+        except (IOError, OSError) as e:  # noqa: B014
+            self.log.warning("Unable to write queue statistics cache (%s): %s" % (cache_file, e))
+
     @staticmethod
     def __new_queue(queue):
         """
@@ -132,11 +262,11 @@ class AWSBqueuesCommand(object):
             fail("Error building Queue item. Key (%s) not found." % e)
 
 
-def main():
+def main(argv=None):
     """Command entrypoint."""
     try:
         # parse input parameters and config file
-        args = _get_parser().parse_args()
+        args = _get_parser().parse_args(argv)
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
         config = AWSBatchCliConfig(log=log, cluster=args.cluster)
@@ -153,7 +283,9 @@ def main():
         else:
             job_queues = [config.job_queue]
             show_details = args.details
-        AWSBqueuesCommand(log, boto3_factory).run(job_queues=job_queues, show_details=show_details)
+        AWSBqueuesCommand(log, boto3_factory, show_stats=args.stats).run(
+            job_queues=job_queues, show_details=show_details
+        )
 
     except KeyboardInterrupt:
         print("Exiting...")
@@ -15,14 +15,18 @@ from __future__ import print_function
 
 import collections
 import re
+import sqlite3
 import sys
+import time
 from builtins import range
 from collections import OrderedDict
 
 import argparse
 
 from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, Output, config_logger
+from awsbatch.journal import get_job_journal
 from awsbatch.utils import (
+    chunked_describe_jobs,
     convert_to_date,
     fail,
     get_job_definition_name_by_arn,
@@ -33,6 +37,21 @@ from awsbatch.utils import (
 )
 
 AWS_BATCH_JOB_STATUS = ["SUBMITTED", "PENDING", "RUNNABLE", "STARTING", "RUNNING", "SUCCEEDED", "FAILED"]
+ACTIVE_JOB_STATUS = "SUBMITTED,PENDING,RUNNABLE,STARTING,RUNNING"
+TIME_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def _time_interval(value):
+    """
+    Parse a time interval expressed as <number><unit>, with unit m (minutes), h (hours) or d (days).
+
+    :param value: the time interval, e.g. 7d
+    :return: the time interval in seconds
+    """
+    match = re.match(r"^(\d+)([mhd])$", value)
+    if not match:
+        raise argparse.ArgumentTypeError("invalid time interval (%s), valid examples are 30m, 12h, 7d" % value)
+    return int(match.group(1)) * TIME_UNITS[match.group(2)]
 
 
 def _get_parser():
@@ -55,15 +74,30 @@ def _get_parser():
     parser.add_argument(
         "-s",
         "--status",
-        help='Comma separated list of job status to ask, defaults to "active" jobs. '
+        help='Comma separated list of job status to ask, defaults to "active" jobs, or to ALL with --history. '
         "Accepted values are: SUBMITTED, PENDING, RUNNABLE, STARTING, RUNNING, "
         "SUCCEEDED, FAILED, ALL",
-        default="SUBMITTED,PENDING,RUNNABLE,STARTING,RUNNING",
     )
     parser.add_argument(
         "-e", "--expand-children", help="Expand jobs with children (array and MNP)", action="store_true"
     )
     parser.add_argument("-d", "--details", help="Show jobs details", action="store_true")
+    parser.add_argument(
+        "-H",
+        "--history",
+        help="Show the jobs recorded in the local job journal, including the ones no longer available in AWS Batch, "
+        "without asking to AWS Batch. The journal must be enabled with job_journal = true in the [main] section "
+        "of the awsbatch-cli.cfg configuration file",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-n", "--name", help="Shell-style pattern of the name of the jobs to show, e.g. sweep-*. Requires --history"
+    )
+    parser.add_argument(
+        "--since",
+        help="Show only the jobs created in the given time interval, e.g. 30m, 12h, 7d. Requires --history",
+        type=_time_interval,
+    )
     parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
     parser.add_argument(
         "job_ids",
@@ -252,14 +286,17 @@ class AWSBstatCommand(object):
 
     __JOB_CONVERTERS = {"SIMPLE": JobConverter(), "ARRAY": ArrayJobConverter(), "MNP": MNPJobConverter()}
 
-    def __init__(self, log, boto3_factory):
+    def __init__(self, log, boto3_factory, journal=None):
         """
         Initialize the object.
 
         :param log: log
         :param boto3_factory: an initialized Boto3ClientFactory object
+        :param journal: a JobJournal object to record the listed jobs (optional)
         """
         self.log = log
+        self.journal = journal
+        self.job_queue = None
         mapping = collections.OrderedDict(
             [
                 ("jobId", "id"),
@@ -288,6 +325,7 @@ class AWSBstatCommand(object):
 
     def run(self, job_status, expand_children, job_queue=None, job_ids=None, show_details=False):
         """Print list of jobs, by filtering by queue or by ids."""
+        self.job_queue = job_queue
         if job_ids:
             self.__populate_output_by_job_ids(job_ids, show_details or len(job_ids) == 1, include_parents=True)
             # explicitly asking for job details,
@@ -300,6 +338,47 @@ class AWSBstatCommand(object):
             fail("Error listing jobs from AWS Batch. job_ids or job_queue must be defined")
 
         sort_keys_function = self.__sort_by_status_startedat_jobid() if not job_ids else self.__sort_by_key(job_ids)
+        self.__show_output(details_required, sort_keys_function)
+
+    def run_history(self, job_status, job_queue, job_ids=None, name_pattern=None, since=None, show_details=False):
+        """Print list of jobs recorded in the job journal, newest first."""
+        try:
+            jobs = self.journal.find_jobs(
+                job_queue=job_queue,
+                job_status=job_status,
+                name_pattern=name_pattern,
+                created_after=int((time.time() - since) * 1000) if since else None,
+                job_ids=job_ids,
+            )
+        except sqlite3.Error as e:
+            fail("Error reading the job journal. Failed with exception: %s" % e)
+
+        for job in jobs:
+            self.output.add(
+                Job(
+                    job_id=job["job_id"],
+                    name=job["name"],
+                    creation_time=self.__convert_to_date(job["created_at"]),
+                    start_time=self.__convert_to_date(job["started_at"]),
+                    stop_time=self.__convert_to_date(job["stopped_at"]),
+                    status=job["status"],
+                    status_reason=job["status_reason"] or "-",
+                    job_definition="-",
+                    queue=job["queue"],
+                    command="-",
+                    reason="-",
+                    exit_code="-" if job["exit_code"] is None else job["exit_code"],
+                    vcpus="-",
+                    memory="-",
+                    nodes="-",
+                    log_stream="-",
+                    log_stream_url="-",
+                    s3_folder_url="-",
+                )
+            )
+        self.__show_output(show_details)
+
+    def __show_output(self, details_required, sort_keys_function=None):
         if details_required:
             self.output.show(sort_keys_function=sort_keys_function)
         else:
@@ -308,6 +387,10 @@ class AWSBstatCommand(object):
                 sort_keys_function=sort_keys_function,
             )
 
+    @staticmethod
+    def __convert_to_date(timestamp):
+        return convert_to_date(timestamp) if timestamp else "-"
+
     @staticmethod
     def __sort_by_key(ordered_keys):  # noqa: D202
         """
@@ -409,20 +492,12 @@ class AWSBstatCommand(object):
 
     def __chunked_describe_jobs(self, job_ids):
         """
-        Submit calls to describe_jobs in batches of 100 elements each.
-
-        describe_jobs API call has a hard limit on the number of job that can be
-        retrieved with a single call. In case job_ids has more than 100 items, this function
-        distributes the describe_jobs call across multiple requests.
+        Describe the given jobs, distributing the describe_jobs calls in batches of 100 elements each.
 
         :param job_ids: list of ids for the jobs to describe.
         :return: list of described jobs.
         """
-        jobs = []
-        for index in range(0, len(job_ids), 100):
-            jobs_chunk = job_ids[index : index + 100]  # noqa: E203
-            jobs.extend(self.batch_client.describe_jobs(jobs=jobs_chunk)["jobs"])
-        return jobs
+        return chunked_describe_jobs(self.batch_client, job_ids)
 
     def __add_jobs(self, jobs, details=False):
         """
@@ -439,6 +514,7 @@ class AWSBstatCommand(object):
                     jobs_to_show = self.__chunked_describe_jobs([job["jobId"] for job in jobs])
                 else:
                     jobs_to_show = jobs
+                self.__record_jobs(jobs_to_show)
 
                 for job in jobs_to_show:
                     self.log.debug("Adding job to the output (%s)", job)
@@ -451,6 +527,18 @@ class AWSBstatCommand(object):
         except Exception as e:
             fail("Error adding jobs to the output. Failed with exception: %s" % e)
 
+    def __record_jobs(self, jobs):
+        """
+        Record the jobs in the job journal, if enabled.
+
+        :param jobs: list of jobs items (output of the list_jobs or describe_jobs functions)
+        """
+        if self.journal:
+            try:
+                self.journal.add_jobs(jobs, self.job_queue)
+            except sqlite3.Error as e:
+                self.log.warning("Unable to record jobs in the job journal: %s" % e)
+
     def __populate_output_by_queue(self, job_queue, job_status, expand_children, details):
         """
         Add Job items to the output asking for given queue and status.
@@ -490,6 +578,8 @@ def main(argv=None):
     try:
         # parse input parameters and config file
         args = _get_parser().parse_args(argv)
+        if (args.name or args.since) and not args.history:
+            fail("Parameters validation error: --name and --since can only be used with --history")
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
         config = AWSBatchCliConfig(log=log, cluster=args.cluster)
@@ -500,19 +590,37 @@ def main(argv=None):
             aws_secret_access_key=config.aws_secret_access_key,
         )
 
+        if not args.status:
+            args.status = "ALL" if args.history else ACTIVE_JOB_STATUS
         job_status_set = OrderedDict((status.strip().upper(), "") for status in args.status.split(","))
         if "ALL" in job_status_set:
             # add all the statuses in the list
             job_status_set = OrderedDict((status, "") for status in AWS_BATCH_JOB_STATUS)
         job_status = list(job_status_set)
 
-        AWSBstatCommand(log, boto3_factory).run(
-            job_status=job_status,
-            expand_children=args.expand_children,
-            job_ids=args.job_ids,
-            job_queue=config.job_queue,
-            show_details=args.details,
-        )
+        journal = get_job_journal(config, log)
+        if args.history:
+            if not journal:
+                fail(
+                    "The job journal is not available. "
+                    "Enable it with job_journal = true in the [main] section of the awsbatch-cli.cfg file"
+                )
+            AWSBstatCommand(log, boto3_factory, journal).run_history(
+                job_status=job_status,
+                job_queue=config.job_queue,
+                job_ids=args.job_ids,
+                name_pattern=args.name,
+                since=args.since,
+                show_details=args.details,
+            )
+        else:
+            AWSBstatCommand(log, boto3_factory, journal).run(
+                job_status=job_status,
+                expand_children=args.expand_children,
+                job_ids=args.job_ids,
+                job_queue=config.job_queue,
+                show_details=args.details,
+            )
 
     except KeyboardInterrupt:
         print("Exiting...")
@@ -13,18 +13,33 @@
 # See the License for the specific language governing permissions and limitations under the License.
 from __future__ import print_function
 
+import hashlib
+import json
 import os
 import pipes
 import re
 import shutil
+import sqlite3
 import sys
 import tempfile
+import threading
 import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
 import argparse
+import yaml
 
 from awsbatch.common import AWSBatchCliConfig, Boto3ClientFactory, config_logger
-from awsbatch.utils import S3Uploader, fail, shell_join
+from awsbatch.journal import get_job_journal
+from awsbatch.utils import RateLimiter, S3Uploader, fail, shell_join
+
+# maximum number of jobs submitted in parallel with the --manifest and --workflow options
+MAX_CONCURRENT_SUBMISSIONS = 10
+# maximum number of dependencies of an AWS Batch job
+MAX_JOB_DEPENDENCIES = 20
+# dependency types supported by AWS Batch, to be specified in the workflow steps
+DEPENDENCY_TYPES = ["N_TO_N", "SEQUENTIAL"]
 
 
 def _get_parser():
@@ -144,6 +159,30 @@ def _get_parser():
         "with a job ID for array jobs so that each index child of this job must wait for the corresponding index "
         "child of each dependency to complete before it can begin. Syntax: jobId=<string>,type=<string>;...",
     )
+    parser.add_argument(
+        "-mf",
+        "--manifest",
+        help="A file with one job per line, in JSON format, to submit in parallel. Every line is an object with "
+        'the "args" key, containing the list of awsbsub arguments for the job (e.g. ["-jn", "name", "sleep", "10"]), '
+        'and an optional "id" key, used to identify the job. Submitted jobs are recorded in the '
+        "<manifest>.submitted file and skipped when the same manifest is submitted again",
+    )
+    parser.add_argument(
+        "-wf",
+        "--workflow",
+        help="A YAML file describing a graph of jobs to submit. The steps key maps every step name to an object "
+        'with the "args" key, containing the list of awsbsub arguments for the job, and the optional "depends_on" '
+        "key, containing the list of steps the job depends on. A dependency can also be expressed as an object "
+        'with the "step" and "type" (N_TO_N or SEQUENTIAL) keys. Independent steps are submitted in parallel and '
+        "the job IDs of the steps are written to the <workflow>.jobs.json file",
+    )
+    parser.add_argument(
+        "-sr",
+        "--submit-rate",
+        help="Maximum number of jobs submitted per second with the --manifest and --workflow options. Default is 20",
+        type=float,
+        default=20,
+    )
     parser.add_argument("-aws", "--awscli", help=argparse.SUPPRESS, action="store_true")
     parser.add_argument("-ll", "--log-level", help=argparse.SUPPRESS, default="ERROR")
     parser.add_argument(
@@ -161,6 +200,27 @@ def _validate_parameters(args):
     """
     Validate input parameters.
 
+    :param args: args variable
+    """
+    if _validate_jobs_file(args):
+        return
+
+    _validate_command(args)
+
+    if args.depends_on and not re.match(r"^(jobId|type)=[^\s,]+([\s,]?(jobId|type)=[^\s]+)*$", args.depends_on):
+        fail("Parameters validation error: please double check --depends-on parameter syntax.")
+
+    if args.env_blacklist and (not args.env or args.env != "all"):
+        fail('--env-blacklist parameter can be used only associated with --env "all"')
+
+    if args.working_dir and args.parent_working_dir:
+        fail("--parent-working-dir and --working-dir parameters cannot be used at the same time")
+
+
+def _validate_command(args):
+    """
+    Validate the command parameter, according to the way the command is provided.
+
     :param args: args variable
     """
     if args.command_file:
@@ -168,31 +228,48 @@ def _validate_parameters(args):
             fail("The command parameter is required with --command-file option")
         elif not os.path.isfile(args.command):
             fail("The command parameter (%s) must be an existing file" % args.command)
-    elif not sys.stdin.isatty():
+    elif args.stdin:
         # stdin
         if args.arguments or type(args.command) == str:
             fail("Error: command and arguments cannot be specified when submitting by stdin.")
     elif not type(args.command) == str:
         fail("Parameters validation error: command parameter is required.")
 
-    if args.depends_on and not re.match(r"^(jobId|type)=[^\s,]+([\s,]?(jobId|type)=[^\s]+)*$", args.depends_on):
-        fail("Parameters validation error: please double check --depends-on parameter syntax.")
 
-    if args.env_blacklist and (not args.env or args.env != "all"):
-        fail('--env-blacklist parameter can be used only associated with --env "all"')
+def _validate_jobs_file(args):
+    """
+    Validate the --manifest, --workflow and --submit-rate parameters.
 
-    if args.working_dir and args.parent_working_dir:
-        fail("--parent-working-dir and --working-dir parameters cannot be used at the same time")
+    :param args: args variable
+    :return: True if the jobs are read from a manifest or workflow file
+    """
+    if args.submit_rate <= 0:
+        fail("Parameters validation error: --submit-rate must be greater than 0.")
+
+    if args.manifest and args.workflow:
+        fail("Parameters validation error: --manifest and --workflow options cannot be used at the same time.")
+
+    for option, jobs_file in [("manifest", args.manifest), ("workflow", args.workflow)]:
+        if jobs_file:
+            if not os.path.isfile(jobs_file):
+                fail("The %s parameter (%s) must be an existing file" % (option, jobs_file))
+            if isinstance(args.command, str) or args.arguments:
+                fail(
+                    "Parameters validation error: command and arguments cannot be specified with --%s option." % option
+                )
+            return True
+    return False
 
 
 def _generate_unique_job_key(job_name):
     """
     Generate an unique job key to use as identifier.
 
+    The random suffix keeps the keys unique when jobs with the same name are submitted concurrently.
     :param job_name: job name
-    :return: "job-<job_name>-<timestamp>"
+    :return: "job-<job_name>-<timestamp>-<random suffix>"
     """
-    return "job-{0}-{1}".format(job_name, int(time.time() * 1000))
+    return "job-{0}-{1}-{2}".format(job_name, int(time.time() * 1000), uuid.uuid4().hex[:8])
 
 
 def _upload_and_get_command(boto3_factory, args, job_s3_folder, job_name, config, log):
@@ -211,13 +288,16 @@ def _upload_and_get_command(boto3_factory, args, job_s3_folder, job_name, config
     # create S3 folder for the job
     s3_uploader = S3Uploader(boto3_factory, config.s3_bucket, job_s3_folder)
 
-    # upload input files, if there
-    if args.input_file:
-        for file in args.input_file:
-            s3_uploader.put_file(file, os.path.basename(file))
-
     # upload command, if needed
-    if args.command_file or not sys.stdin.isatty() or args.env:
+    if args.command_file or args.stdin or args.env:
+        # upload input files, if there, to the folder shared by all the jobs, the job script will download them
+        input_files = []
+        if args.input_file:
+            input_keys = s3_uploader.put_files_by_content(
+                args.input_file, "{prefix}/batch/inputs/".format(prefix=config.artifact_directory)
+            )
+            input_files = [(os.path.basename(file), key) for file, key in zip(args.input_file, input_keys)]
+
         # define job script name
         job_script = job_name + ".sh"
         log.info("Using command-file option or stdin. Job script name: %s" % job_script)
@@ -236,15 +316,19 @@ def _upload_and_get_command(boto3_factory, args, job_s3_folder, job_name, config
                 s3_uploader.put_file(args.command, job_script)
             except Exception as e:
                 fail("Error creating job script. Failed with exception: %s" % e)
-        elif not sys.stdin.isatty():
+        elif args.stdin:
             # stdin
             _get_stdin_and_upload(s3_uploader, job_script)
 
         # define command to execute
-        bash_command = _compose_bash_command(args, config.s3_bucket, config.region, job_s3_folder, job_script, env_file)
+        bash_command = _compose_bash_command(
+            args, config.s3_bucket, config.region, job_s3_folder, job_script, env_file, input_files
+        )
         command = ["/bin/bash", "-c", bash_command]
     elif type(args.command) == str:
         log.info("Using command parameter")
+        # upload input files, if there, to the job folder
+        s3_uploader.put_files(args.input_file)
         command = [args.command] + args.arguments
     else:
         fail("Unexpected error. Command cannot be empty.")
@@ -291,7 +375,7 @@ def _get_env_and_upload(s3_uploader, env, env_blacklist, env_file, log):
         fail("Error creating environment file. Failed with exception: %s" % e)
 
 
-def _compose_bash_command(args, s3_bucket, region, job_s3_folder, job_script, env_file):
+def _compose_bash_command(args, s3_bucket, region, job_s3_folder, job_script, env_file, input_files=None):
     """
     Define bash command to execute.
 
@@ -301,6 +385,7 @@ def _compose_bash_command(args, s3_bucket, region, job_s3_folder, job_script, en
     :param job_s3_folder: S3 job folder
     :param job_script: job script file
     :param env_file: environment file
+    :param input_files: list of (file name, S3 key) pairs of the input files to download in the job folder
     :return: composed bash command
     """
     command_args = shell_join(args.arguments)
@@ -334,6 +419,13 @@ def _compose_bash_command(args, s3_bucket, region, job_s3_folder, job_script, en
             REGION=region, BUCKET=s3_bucket, S3_FOLDER=job_s3_folder
         )
     )
+    # download input files, stored by content in a folder shared by all the jobs
+    for file_name, key in input_files or []:
+        bash_command.append(
+            "aws s3 --region {REGION} cp s3://{BUCKET}/{KEY} {FILE} >/dev/null".format(
+                REGION=region, BUCKET=s3_bucket, KEY=key, FILE=pipes.quote(file_name)
+            )
+        )
     if env_file:  # source the environment file
         bash_command.append("source {ENV_FILE}".format(ENV_FILE=env_file))
 
@@ -423,15 +515,17 @@ def _get_depends_on(args):
 class AWSBsubCommand(object):
     """awsbsub command."""
 
-    def __init__(self, log, boto3_factory):
+    def __init__(self, log, boto3_factory, journal=None):
         """
         Initialize the object.
 
         :param log: log
         :param boto3_factory: an initialized Boto3ClientFactory object
+        :param journal: a JobJournal object to record the submitted jobs (optional)
         """
         self.log = log
         self.batch_client = boto3_factory.get_client("batch")
+        self.journal = journal
 
     def run(  # noqa: C901 FIXME
         self,
@@ -448,7 +542,11 @@ class AWSBsubCommand(object):
         dependencies=None,
         env=None,
     ):
-        """Submit the job."""
+        """
+        Submit the job.
+
+        :return: the submit_job response
+        """
         try:
             # array properties
             array_properties = {}
@@ -501,16 +599,418 @@ class AWSBsubCommand(object):
 
             self.log.debug("Job submission args: %s" % submission_args)
             response = self.batch_client.submit_job(**submission_args)
-            print("Job %s (%s) has been submitted." % (response["jobId"], response["jobName"]))
         except Exception as e:
             fail("Error submitting job to AWS Batch. Failed with exception: %s" % e)
 
+        if self.journal:
+            try:
+                self.journal.add_submitted_job(response, job_queue)
+            except sqlite3.Error as e:
+                self.log.warning("Unable to record job (%s) in the job journal: %s" % (response["jobId"], e))
+        return response
+
+
+def _get_job_name(args):
+    """
+    Get job name from input parameters, or define a default one.
+
+    :param args: input parameters
+    :return: the job name
+    """
+    if args.job_name:
+        return args.job_name
+    # set a default job name if not specified
+    if args.stdin:
+        return "STDIN"
+    # normalize name
+    return re.sub(r"\W+", "_", os.path.basename(args.command))
+
+
+def _submit_job(submit_command, boto3_factory, args, config, log, dependencies=None):
+    """
+    Upload the job files, if needed, and submit the job defined by the given input parameters.
+
+    :param submit_command: initialized AWSBsubCommand object
+    :param boto3_factory: initialized Boto3ClientFactory object
+    :param args: input parameters of the job
+    :param config: config object
+    :param log: log
+    :param dependencies: list of dependencies in addition to the --depends-on ones
+    :return: the submit_job response
+    """
+    job_name = _get_job_name(args)
+    if not args.job_name:
+        log.info("Job name not specified, setting it to (%s)" % job_name)
+
+    # generate an internal unique job-id
+    job_key = _generate_unique_job_key(job_name)
+    job_s3_folder = "{prefix}/batch/{job_key}/".format(prefix=config.artifact_directory, job_key=job_key)
+    # upload script, if needed, and get related command
+    command = _upload_and_get_command(boto3_factory, args, job_s3_folder, job_name, config, log)
+    # parse and validate depends_on parameter
+    depends_on = _get_depends_on(args) + (dependencies or [])
+
+    # select submission (standard vs MNP)
+    if args.nodes and args.nodes > 1:
+        if not hasattr(config, "job_definition_mnp"):
+            fail("Current cluster does not support MNP jobs submission")
+        job_definition = config.job_definition_mnp
+        nodes = args.nodes
+    else:
+        job_definition = config.job_definition
+        nodes = None
+
+    return submit_command.run(
+        job_definition=job_definition,
+        job_name=job_name,
+        job_queue=config.job_queue,
+        command=command,
+        nodes=nodes,
+        vcpus=args.vcpus,
+        memory=args.memory,
+        array_size=args.array_size,
+        dependencies=depends_on,
+        retry_attempts=args.retry_attempts,
+        timeout=args.timeout,
+        env=[
+            ("MASTER_IP", config.head_node_ip),  # TODO remove
+            ("PCLUSTER_JOB_S3_URL", "s3://{0}/{1}".format(config.s3_bucket, job_s3_folder)),
+        ],
+    )
+
+
+def _parse_job_arguments(parser, job_arguments):
+    """
+    Parse and validate the awsbsub arguments of a job of a manifest or of a workflow.
+
+    :param parser: the ArgumentParser object
+    :param job_arguments: list of awsbsub arguments
+    :return: the parsed input parameters of the job
+    """
+    job_args = parser.parse_args(job_arguments)
+    job_args.stdin = False
+    if job_args.manifest or job_args.workflow or job_args.cluster:
+        fail("--manifest, --workflow and --cluster cannot be specified for the jobs of a manifest or of a workflow.")
+    _validate_parameters(job_args)
+    return job_args
+
+
+def _read_manifest(manifest):
+    """
+    Read and validate the jobs of the given manifest.
+
+    The job id defaults to a hash of the job arguments, repeated identical lines are identified by their occurrence.
 
-def main():
+    :param manifest: manifest file path
+    :return: list of (job_id, job_args) pairs
+    """
+    parser = _get_parser()
+    jobs = []
+    occurrences = {}
+    with open(manifest) as manifest_file:
+        for line_number, line in enumerate(manifest_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                job_arguments = [str(argument) for argument in entry["args"]]
+                job_args = _parse_job_arguments(parser, job_arguments)
+            except (ValueError, KeyError, TypeError) as e:
+                fail(
+                    "Error reading line %s of the manifest (%s). Failed with exception: %s" % (line_number, manifest, e)
+                )
+            except SystemExit:
+                fail("Invalid job at line %s of the manifest (%s)" % (line_number, manifest))
+
+            job_id = entry.get("id")
+            if not job_id:
+                args_hash = hashlib.sha256(json.dumps(job_arguments).encode("utf-8")).hexdigest()
+                occurrences[args_hash] = occurrences.get(args_hash, 0) + 1
+                job_id = "{0}-{1}".format(args_hash, occurrences[args_hash])
+            jobs.append((job_id, job_args))
+    return jobs
+
+
+def _read_submitted_jobs(submitted_file):
+    """
+    Read the ids of the manifest jobs already submitted.
+
+    :param submitted_file: file where the submitted jobs are recorded
+    :return: set of manifest job ids
+    """
+    submitted_ids = set()
+    if os.path.isfile(submitted_file):
+        with open(submitted_file) as f:
+            for line in f:
+                try:
+                    submitted_ids.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    # skip lines partially written by an interrupted submission
+                    pass
+    return submitted_ids
+
+
+def _submit_manifest(submit_command, boto3_factory, args, config, log):
+    """
+    Submit in parallel the jobs of the manifest not already submitted.
+
+    Every submitted job is recorded in the <manifest>.submitted file, to skip it in case of re-submission.
+
+    :param submit_command: initialized AWSBsubCommand object
+    :param boto3_factory: initialized Boto3ClientFactory object
+    :param args: input parameters
+    :param config: config object
+    :param log: log
+    """
+    jobs = _read_manifest(args.manifest)
+    submitted_file = args.manifest + ".submitted"
+    submitted_ids = _read_submitted_jobs(submitted_file)
+    jobs_to_submit = [(job_id, job_args) for job_id, job_args in jobs if job_id not in submitted_ids]
+    log.info("Submitting %s jobs of the manifest (%s)" % (len(jobs_to_submit), args.manifest))
+
+    rate_limiter = RateLimiter(args.submit_rate)
+    lock = threading.Lock()
+    failures = 0
+    with open(submitted_file, "a") as submitted:
+
+        def _submit_manifest_job(job_id, job_args):
+            rate_limiter.wait()
+            response = _submit_job(submit_command, boto3_factory, job_args, config, log)
+            with lock:
+                submitted.write(json.dumps({"id": job_id, "jobId": response["jobId"], "jobName": response["jobName"]}))
+                submitted.write("\n")
+                submitted.flush()
+            return response
+
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SUBMISSIONS) as executor:
+            futures = {
+                executor.submit(_submit_manifest_job, job_id, job_args): job_id for job_id, job_args in jobs_to_submit
+            }
+            for future in as_completed(futures):
+                try:
+                    response = future.result()
+                    print("Job %s (%s) has been submitted." % (response["jobId"], response["jobName"]))
+                except SystemExit:
+                    # the error has already been printed by fail()
+                    failures += 1
+                except Exception as e:
+                    failures += 1
+                    print("Error submitting job (%s) of the manifest. Failed with exception: %s" % (futures[future], e))
+
+    print(
+        "%s jobs have been submitted, %s jobs were already submitted."
+        % (len(jobs_to_submit) - failures, len(jobs) - len(jobs_to_submit))
+    )
+    if failures:
+        fail("%s jobs have not been submitted. Submit the manifest again to retry them." % failures)
+
+
+def _read_workflow(workflow):
+    """
+    Read and validate the steps of the given workflow.
+
+    :param workflow: workflow file path
+    :return: dict of step name -> (job_args, list of (dependency step, dependency type)) and the list of the step
+    names in topological order
+    """
+    workflow_steps = _load_workflow_steps(workflow)
+    parser = _get_parser()
+    steps = {}
+    for step_name, step in workflow_steps.items():
+        step_name = str(step_name)
+        job_args, dependencies = _read_workflow_step(parser, workflow, step_name, step)
+        _validate_workflow_dependencies(workflow_steps, step_name, job_args, dependencies)
+        steps[step_name] = (job_args, dependencies)
+    return steps, _sort_workflow_steps(workflow, steps)
+
+
+def _load_workflow_steps(workflow):
+    """
+    Load the steps of the given workflow file.
+
+    :param workflow: workflow file path
+    :return: dict of step name -> step, as defined in the file
+    """
+    try:
+        with open(workflow) as workflow_file:
+            workflow_steps = yaml.safe_load(workflow_file)["steps"]
+        if not isinstance(workflow_steps, dict) or not workflow_steps:
+            raise ValueError("steps must be a non empty map of step names to steps")
+    except (IOError, yaml.YAMLError, ValueError, KeyError, TypeError) as e:
+        fail("Error reading the workflow (%s). Failed with exception: %s" % (workflow, e))
+    return workflow_steps
+
+
+def _read_workflow_step(parser, workflow, step_name, step):
+    """
+    Read the job arguments and the dependencies of a workflow step.
+
+    :param parser: ArgumentParser object used to parse the job arguments
+    :param workflow: workflow file path
+    :param step_name: step name
+    :param step: step, as defined in the workflow file
+    :return: the job_args and the list of (dependency step, dependency type) of the step
+    """
+    try:
+        job_args = _parse_job_arguments(parser, [str(argument) for argument in step["args"]])
+        dependencies = []
+        for dependency in step.get("depends_on") or []:
+            if isinstance(dependency, dict):
+                dependencies.append((str(dependency["step"]), dependency.get("type")))
+            else:
+                dependencies.append((str(dependency), None))
+    except (KeyError, TypeError, AttributeError) as e:
+        fail("Error reading step (%s) of the workflow (%s). Failed with exception: %s" % (step_name, workflow, e))
+    except SystemExit:
+        fail("Invalid job for step (%s) of the workflow (%s)" % (step_name, workflow))
+    return job_args, dependencies
+
+
+def _validate_workflow_dependencies(workflow_steps, step_name, job_args, dependencies):
+    """
+    Validate the dependencies of a workflow step.
+
+    :param workflow_steps: dict of step name -> step, as defined in the workflow file
+    :param step_name: step name
+    :param job_args: job arguments of the step
+    :param dependencies: list of (dependency step, dependency type) of the step
+    """
+    for dependency_step, dependency_type in dependencies:
+        if dependency_step not in workflow_steps:
+            fail("Step (%s) depends on the undefined step (%s)" % (step_name, dependency_step))
+        if dependency_type and dependency_type not in DEPENDENCY_TYPES:
+            fail(
+                "Step (%s) has an invalid dependency type (%s), supported types are: %s"
+                % (step_name, dependency_type, ", ".join(DEPENDENCY_TYPES))
+            )
+    if len(dependencies) + len(_get_depends_on(job_args)) > MAX_JOB_DEPENDENCIES:
+        fail("Step (%s) has more than %s dependencies" % (step_name, MAX_JOB_DEPENDENCIES))
+
+
+def _sort_workflow_steps(workflow, steps):
+    """
+    Sort the workflow steps topologically, steps at the same depth are sorted by name.
+
+    :param workflow: workflow file path
+    :param steps: dict of step name -> (job_args, list of (dependency step, dependency type))
+    :return: the list of the step names in topological order
+    """
+    order = []
+    remaining = {name: set(dep for dep, _ in dependencies) for name, (_, dependencies) in steps.items()}
+    while remaining:
+        ready = sorted(name for name, dependencies in remaining.items() if not dependencies)
+        if not ready:
+            fail("The workflow (%s) contains a dependency cycle among the steps: %s" % (workflow, sorted(remaining)))
+        for name in ready:
+            del remaining[name]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
+        order.extend(ready)
+    return order
+
+
+def _submit_workflow_step(submit_command, boto3_factory, step, job_ids, config, log):
+    """
+    Submit the job of a workflow step, depending on the jobs of the steps it depends on.
+
+    :param submit_command: initialized AWSBsubCommand object
+    :param boto3_factory: initialized Boto3ClientFactory object
+    :param step: (job_args, list of (dependency step, dependency type)) tuple of the step
+    :param job_ids: dict of step name -> job ID of the submitted steps
+    :param config: config object
+    :param log: log
+    :return: the submit_job response
+    """
+    job_args, dependencies = step
+    depends_on = []
+    for dependency, dependency_type in dependencies:
+        depends_on.append(
+            {"jobId": job_ids[dependency], "type": dependency_type}
+            if dependency_type
+            else {"jobId": job_ids[dependency]}
+        )
+    return _submit_job(submit_command, boto3_factory, job_args, config, log, dependencies=depends_on)
+
+
+def _get_workflow_step_response(future, name):
+    """
+    Get the submit_job response of a workflow step, by printing the error if the submission failed.
+
+    :param future: future of the step submission
+    :param name: step name
+    :return: the submit_job response, or None if the submission failed
+    """
+    try:
+        return future.result()
+    except SystemExit:
+        # the error has already been printed by fail()
+        return None
+    except Exception as e:
+        print("Error submitting step (%s) of the workflow. Failed with exception: %s" % (name, e))
+        return None
+
+
+def _submit_workflow(submit_command, boto3_factory, args, config, log):
+    """
+    Submit the steps of the workflow, submitting every step as soon as the steps it depends on are submitted.
+
+    The job IDs assigned to the steps are written to the <workflow>.jobs.json file.
+
+    :param submit_command: initialized AWSBsubCommand object
+    :param boto3_factory: initialized Boto3ClientFactory object
+    :param args: input parameters
+    :param config: config object
+    :param log: log
+    """
+    steps, order = _read_workflow(args.workflow)
+    log.info("Submitting workflow (%s) steps in order: %s" % (args.workflow, order))
+    dependents = dict((name, []) for name in steps)
+    pending_dependencies = {}
+    for name, (_, dependencies) in steps.items():
+        pending_dependencies[name] = set(dependency for dependency, _ in dependencies)
+        for dependency in pending_dependencies[name]:
+            dependents[dependency].append(name)
+
+    rate_limiter = RateLimiter(args.submit_rate)
+    job_ids = {}
+
+    def _submit_step(name):
+        rate_limiter.wait()
+        return _submit_workflow_step(submit_command, boto3_factory, steps[name], job_ids, config, log)
+
+    failed_steps = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_SUBMISSIONS) as executor:
+        futures = dict((executor.submit(_submit_step, name), name) for name in order if not pending_dependencies[name])
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures.pop(future)
+                response = _get_workflow_step_response(future, name)
+                if not response:
+                    failed_steps.append(name)
+                    continue
+                job_ids[name] = response["jobId"]
+                print("Job %s (%s) of step (%s) has been submitted." % (response["jobId"], response["jobName"], name))
+                for dependent in sorted(dependents[name]):
+                    pending_dependencies[dependent].discard(name)
+                    if not pending_dependencies[dependent]:
+                        futures[executor.submit(_submit_step, dependent)] = dependent
+
+    jobs_file = args.workflow + ".jobs.json"
+    with open(jobs_file, "w") as f:
+        json.dump(job_ids, f, indent=2, sort_keys=True)
+    print("Job IDs of the workflow steps have been written to %s" % jobs_file)
+    if failed_steps:
+        not_submitted = sorted(name for name in steps if name not in job_ids)
+        fail("Failed to submit the workflow steps %s, not submitted steps: %s" % (sorted(failed_steps), not_submitted))
+
+
+def main(argv=None):
     """Command entrypoint."""
     try:
         # parse input parameters and config file
-        args = _get_parser().parse_args()
+        args = _get_parser().parse_args(argv)
+        args.stdin = not args.manifest and not args.workflow and not sys.stdin.isatty()
         _validate_parameters(args)
         log = config_logger(args.log_level)
         log.info("Input parameters: %s" % args)
@@ -521,55 +1021,15 @@ def main():
             aws_access_key_id=config.aws_access_key_id,
             aws_secret_access_key=config.aws_secret_access_key,
         )
+        submit_command = AWSBsubCommand(log, boto3_factory, get_job_journal(config, log))
 
-        # define job name
-        if args.job_name:
-            job_name = args.job_name
+        if args.manifest:
+            _submit_manifest(submit_command, boto3_factory, args, config, log)
+        elif args.workflow:
+            _submit_workflow(submit_command, boto3_factory, args, config, log)
         else:
-            # set a default job name if not specified
-            if not sys.stdin.isatty():
-                # stdin
-                job_name = "STDIN"
-            else:
-                # normalize name
-                job_name = re.sub(r"\W+", "_", os.path.basename(args.command))
-            log.info("Job name not specified, setting it to (%s)" % job_name)
-
-        # generate an internal unique job-id
-        job_key = _generate_unique_job_key(job_name)
-        job_s3_folder = "{prefix}/batch/{job_key}/".format(prefix=config.artifact_directory, job_key=job_key)
-        # upload script, if needed, and get related command
-        command = _upload_and_get_command(boto3_factory, args, job_s3_folder, job_name, config, log)
-        # parse and validate depends_on parameter
-        depends_on = _get_depends_on(args)
-
-        # select submission (standard vs MNP)
-        if args.nodes and args.nodes > 1:
-            if not hasattr(config, "job_definition_mnp"):
-                fail("Current cluster does not support MNP jobs submission")
-            job_definition = config.job_definition_mnp
-            nodes = args.nodes
-        else:
-            job_definition = config.job_definition
-            nodes = None
-
-        AWSBsubCommand(log, boto3_factory).run(
-            job_definition=job_definition,
-            job_name=job_name,
-            job_queue=config.job_queue,
-            command=command,
-            nodes=nodes,
-            vcpus=args.vcpus,
-            memory=args.memory,
-            array_size=args.array_size,
-            dependencies=depends_on,
-            retry_attempts=args.retry_attempts,
-            timeout=args.timeout,
-            env=[
-                ("MASTER_IP", config.head_node_ip),  # TODO remove
-                ("PCLUSTER_JOB_S3_URL", "s3://{0}/{1}".format(config.s3_bucket, job_s3_folder)),
-            ],
-        )
+            response = _submit_job(submit_command, boto3_factory, args, config, log)
+            print("Job %s (%s) has been submitted." % (response["jobId"], response["jobName"]))
     except KeyboardInterrupt:
         print("Exiting...")
         sys.exit(0)
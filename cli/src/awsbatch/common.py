@@ -14,8 +14,11 @@
 from __future__ import print_function
 
 import errno
+import json
 import logging
 import os
+import threading
+import time
 from logging.handlers import RotatingFileHandler
 
 import boto3
@@ -28,12 +31,45 @@ from awsbatch.utils import fail, get_region_by_stack_id, hide_keys
 from pcluster.config.pcluster_config import default_config_file_path
 
 PCLUSTER_STACK_PREFIX = "parallelcluster-"
+# size of the connection pool of every client, it must be greater than the number of threads sharing the client
+MAX_POOL_CONNECTIONS = 25
+# maximum number of jobs returned by a list_jobs call
+LIST_JOBS_PAGE_SIZE = 1000
+# seconds after which the cluster configuration cached from the stack is retrieved again from CloudFormation
+STACK_CACHE_VALIDITY = 300
+# AWSBatchCliConfig attributes retrieved from the stack and cached
+STACK_CACHED_ATTRIBUTES = [
+    "region",
+    "proxy",
+    "s3_bucket",
+    "artifact_directory",
+    "compute_environment",
+    "job_queue",
+    "job_definition",
+    "job_definition_mnp",
+    "head_node_ip",
+]
 
 
 def _get_stack_name(cluster_name):
     return PCLUSTER_STACK_PREFIX + cluster_name
 
 
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _get_stack_cache_file(cluster_name, region):
+    return os.path.expanduser(
+        os.path.join(
+            "~", ".parallelcluster", "awsbatch-cli-cache", "{0}.{1}.json".format(cluster_name, region or "default")
+        )
+    )
+
+
 class Output(object):
     """Generic Output object."""
 
@@ -103,37 +139,67 @@ class Output(object):
 class Boto3ClientFactory(object):
     """Boto3 configuration object."""
 
+    # clients shared by all the factories with the same configuration, see share_clients
+    __shared_clients = None
+    __shared_lock = threading.Lock()
+
     def __init__(self, region, aws_access_key_id, aws_secret_access_key, proxy="NONE"):
         """Initialize the object."""
         self.region = region
         self.aws_access_key_id = aws_access_key_id
         self.aws_secret_access_key = aws_secret_access_key
-        self.proxy_config = Config()
+        self.proxy_config = Config(max_pool_connections=MAX_POOL_CONNECTIONS, retries={"mode": "adaptive"})
         if not proxy == "NONE":
-            self.proxy_config = Config(proxies={"https": proxy})
+            self.proxy_config = self.proxy_config.merge(Config(proxies={"https": proxy}))
+        if Boto3ClientFactory.__shared_clients is None:
+            self.__clients = {}
+            self.__lock = threading.Lock()
+        else:
+            self.__clients = Boto3ClientFactory.__shared_clients.setdefault(
+                (region, aws_access_key_id, aws_secret_access_key, proxy), {}
+            )
+            self.__lock = Boto3ClientFactory.__shared_lock
+
+    @classmethod
+    def share_clients(cls):
+        """
+        Share the clients among the factories created from now on, to reuse them in the next commands.
+
+        Used by long running processes executing multiple commands, like the awsbd daemon.
+        """
+        cls.__shared_clients = {}
 
     def get_client(self, service):
         """
-        Initialize the boto3 client for a given service.
+        Get the boto3 client for a given service, the client is created at the first request and then reused.
+
+        Clients are thread safe and can be shared by multiple threads.
 
         :param service: boto3 service.
         :return: the boto3 client
         """
-        try:
-            return boto3.client(
-                service,
-                region_name=self.region,
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
-                config=self.proxy_config,
-            )
-        except ClientError as e:
-            fail("AWS %s service failed with exception: %s" % (service, e))
+        # clients creation from the shared boto3 session is not thread safe
+        with self.__lock:
+            if service not in self.__clients:
+                try:
+                    self.__clients[service] = boto3.client(
+                        service,
+                        region_name=self.region,
+                        aws_access_key_id=self.aws_access_key_id,
+                        aws_secret_access_key=self.aws_secret_access_key,
+                        config=self.proxy_config,
+                    )
+                except ClientError as e:
+                    fail("AWS %s service failed with exception: %s" % (service, e))
+            return self.__clients[service]
 
 
 class AWSBatchCliConfig(object):
     """AWS ParallelCluster AWS Batch CLI configuration object."""
 
+    # configurations shared by all the objects created for the same cluster, see share_configs
+    __shared_configs = None
+
     def __init__(self, log, cluster):
         """
         Initialize the object.
@@ -144,17 +210,26 @@ class AWSBatchCliConfig(object):
         :param log: log
         :param cluster: cluster name
         """
+        parallelcluster_config_file = default_config_file_path()
+        cli_config_file = os.path.expanduser(os.path.join("~", ".parallelcluster", "awsbatch-cli.cfg"))
+        shared_key = (cluster, _get_mtime(parallelcluster_config_file), _get_mtime(cli_config_file))
+        if AWSBatchCliConfig.__shared_configs is not None:
+            timestamp, attributes = AWSBatchCliConfig.__shared_configs.get(shared_key, (0, None))
+            if attributes and time.time() - timestamp <= STACK_CACHE_VALIDITY:
+                log.info("Using configuration shared by a previous command")
+                self.__dict__.update(attributes)
+                return
+
         # Check if credentials and region have been provided in parallelcluster config
         self.aws_access_key_id = None
         self.aws_secret_access_key = None
         self.region = None
         self.env_blacklist = None
-        parallelcluster_config_file = default_config_file_path()
+        self.job_journal = False
         if os.path.isfile(parallelcluster_config_file):
             self.__init_from_parallelcluster_config(parallelcluster_config_file, log)
 
         # search for awsbatch-cli config
-        cli_config_file = os.path.expanduser(os.path.join("~", ".parallelcluster", "awsbatch-cli.cfg"))
         if os.path.isfile(cli_config_file):
             self.__init_from_config(cli_config_file, cluster, log)
         elif cluster:
@@ -164,6 +239,18 @@ class AWSBatchCliConfig(object):
             fail("Error: cluster parameter is required")
 
         self.__verify_initialization(log)
+        if AWSBatchCliConfig.__shared_configs is not None:
+            AWSBatchCliConfig.__shared_configs[shared_key] = (time.time(), dict(self.__dict__))
+
+    @classmethod
+    def share_configs(cls):
+        """
+        Share the configuration among the objects created from now on for the same cluster.
+
+        The configuration is shared until the configuration files change or for STACK_CACHE_VALIDITY seconds.
+        Used by long running processes executing multiple commands, like the awsbd daemon.
+        """
+        cls.__shared_configs = {}
 
     def __str__(self):
         return "{0}({1})".format(
@@ -245,6 +332,12 @@ class AWSBatchCliConfig(object):
                 self.env_blacklist = config.get("main", "env_blacklist")
             except NoOptionError:
                 pass
+            try:
+                self.job_journal = config.getboolean("main", "job_journal")
+            except NoOptionError:
+                pass
+            except ValueError as e:
+                fail("Error getting the option (job_journal) from the section [main]: %s" % e)
 
             try:
                 self.stack_name = _get_stack_name(cluster_name)
@@ -276,15 +369,76 @@ class AWSBatchCliConfig(object):
                     % (e.option, e.section, cli_config_file)
                 )
 
-    def __init_from_stack(self, cluster, log):  # noqa: C901 FIXME
+    def __init_from_stack(self, cluster, log):
         """
-        Init object attributes by asking to the stack.
+        Init object attributes from the cache of the stack information or, if expired, by asking to the stack.
 
         :param cluster: cluster name
+        :param log: log
+        """
+        self.stack_name = _get_stack_name(cluster)
+        cache_file = _get_stack_cache_file(cluster, self.region)
+        if not self.__init_from_stack_cache(cache_file, log):
+            self.__init_from_stack_outputs(log)
+            self.__write_stack_cache(cache_file, log)
+
+    def __init_from_stack_cache(self, cache_file, log):
+        """
+        Init object attributes from the cache of the stack information, if not expired.
+
+        :param cache_file: cache file path
+        :param log: log
+        :return: True if the cache has been used, False otherwise
+        """
+        try:
+            with open(cache_file) as f:
+                cache = json.load(f)
+            if time.time() - cache["timestamp"] > STACK_CACHE_VALIDITY:
+                log.info("Cached stack information in (%s) is expired" % cache_file)
+                return False
+            for attribute, value in cache["attributes"].items():
+                setattr(self, attribute, value)
+            log.info("Using cached stack information from (%s)" % cache_file)
+            return True
+        except (IOError, OSError, ValueError, KeyError, AttributeError) as e:  # noqa: B014
+            log.info("Unable to use cached stack information from (%s): %s" % (cache_file, e))
+            return False
+
+    def __write_stack_cache(self, cache_file, log):
+        """
+        Write the object attributes retrieved from the stack to the cache file, by replacing it atomically.
+
+        :param cache_file: cache file path
+        :param log: log
+        """
+        cache = {
+            "timestamp": time.time(),
+            "attributes": dict(
+                (attribute, getattr(self, attribute))
+                for attribute in STACK_CACHED_ATTRIBUTES
+                if hasattr(self, attribute)
+            ),
+        }
+        try:
+            try:
+                os.makedirs(os.path.dirname(cache_file))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            temp_file = "{0}.{1}".format(cache_file, os.getpid())
+            with open(temp_file, "w") as f:
+                json.dump(cache, f)
+            os.rename(temp_file, cache_file)
+        except (IOError, OSError) as e:  # noqa: B014
+            log.warning("Unable to cache stack information in (%s): %s" % (cache_file, e))
+
+    def __init_from_stack_outputs(self, log):  # noqa: C901 FIXME
+        """
+        Init object attributes by asking to the stack.
+
         :param log: log
         """
         try:
-            self.stack_name = _get_stack_name(cluster)
             log.info("Describing stack (%s)" % self.stack_name)
             # get required values from the output of the describe-stack command
             # don't use proxy because we are in the client and use default region
@@ -350,13 +504,14 @@ def config_logger(log_level):
         else:
             fail("Cannot create log file (%s). Failed with exception: %s" % (logfile, e))
 
-    formatter = logging.Formatter("%(asctime)s %(levelname)s [%(module)s:%(funcName)s] %(message)s")
-
-    logfile_handler = RotatingFileHandler(logfile, maxBytes=5 * 1024 * 1024, backupCount=1)
-    logfile_handler.setFormatter(formatter)
-
     logger = logging.getLogger("awsbatch-cli")
-    logger.addHandler(logfile_handler)
+    # the logger can be configured multiple times in the same process, e.g. by the awsbd daemon
+    if not logger.handlers:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s [%(module)s:%(funcName)s] %(message)s")
+
+        logfile_handler = RotatingFileHandler(logfile, maxBytes=5 * 1024 * 1024, backupCount=1)
+        logfile_handler.setFormatter(formatter)
+        logger.addHandler(logfile_handler)
     try:
         logger.setLevel(log_level.upper())
     except (TypeError, ValueError) as e:
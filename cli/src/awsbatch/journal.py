@@ -0,0 +1,196 @@
+# Copyright 2020 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License").
+# You may not use this file except in compliance with the License.
+# A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file.
+# This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+import errno
+import os
+import re
+import sqlite3
+import threading
+import time
+
+JOURNAL_FILE = os.path.join("~", ".parallelcluster", "awsbatch-journal.db")
+
+# columns of the jobs table, in addition to the job_id primary key
+JOURNAL_COLUMNS = [
+    "name",
+    "queue",
+    "status",
+    "status_reason",
+    "created_at",
+    "started_at",
+    "stopped_at",
+    "exit_code",
+]
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    name TEXT,
+    queue TEXT,
+    status TEXT,
+    status_reason TEXT,
+    created_at INTEGER,
+    started_at INTEGER,
+    stopped_at INTEGER,
+    exit_code INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (queue);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS jobs_name ON jobs (name);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+"""
+
+
+def get_queue_name(job_queue):
+    """
+    Get the job queue name from a job queue ARN or name.
+
+    :param job_queue: job queue ARN or name
+    :return: the job queue name
+    """
+    return job_queue.split("/")[-1] if job_queue else job_queue
+
+
+def get_job_journal(config, log):
+    """
+    Open the local job journal, if enabled in the configuration.
+
+    :param config: AWSBatchCliConfig object
+    :param log: log
+    :return: a JobJournal object or None if the journal is disabled or cannot be opened
+    """
+    if not config.job_journal:
+        return None
+    journal_file = os.path.expanduser(JOURNAL_FILE)
+    try:
+        return JobJournal(journal_file)
+    except (OSError, sqlite3.Error) as e:
+        log.warning("Unable to open the job journal (%s): %s" % (journal_file, e))
+        return None
+
+
+class JobJournal(object):
+    """Local SQLite journal of the jobs submitted and listed by the awsb* commands."""
+
+    def __init__(self, journal_file):
+        """
+        Open the journal, by creating it if it doesn't exist.
+
+        :param journal_file: path of the SQLite database
+        """
+        try:
+            os.makedirs(os.path.dirname(journal_file))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        # the connection is shared by the threads submitting jobs and serialized with the lock
+        self.__connection = sqlite3.connect(journal_file, timeout=30, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock, self.__connection:
+            self.__connection.executescript(JOURNAL_SCHEMA)
+
+    def add_submitted_job(self, response, job_queue):
+        """
+        Record a job just submitted.
+
+        :param response: the submit_job response
+        :param job_queue: the job queue ARN or name
+        """
+        self.add_jobs(
+            [
+                {
+                    "jobId": response["jobId"],
+                    "jobName": response["jobName"],
+                    "createdAt": int(time.time() * 1000),
+                    "status": "SUBMITTED",
+                }
+            ],
+            job_queue,
+        )
+
+    def add_jobs(self, jobs, job_queue=None):
+        """
+        Record or update the given jobs. Children of array and MNP jobs are not recorded.
+
+        Values not available in the given jobs (e.g. the stop time of a running job) are left unchanged.
+
+        :param jobs: list of jobs as returned by the describe_jobs or list_jobs functions
+        :param job_queue: the job queue ARN or name, used when not included in the job
+        """
+        rows = [
+            (job["jobId"],) + self.__get_values(job, job_queue) + (job["jobId"],)
+            for job in jobs
+            if not re.search(r"[:#]", job["jobId"])
+        ]
+        if not rows:
+            return
+        assignments = ", ".join("{0} = COALESCE(?, {0})".format(column) for column in JOURNAL_COLUMNS)
+        with self.__lock, self.__connection:
+            self.__connection.executemany("INSERT OR IGNORE INTO jobs (job_id) VALUES (?)", [(row[0],) for row in rows])
+            self.__connection.executemany(
+                "UPDATE jobs SET {0} WHERE job_id = ?".format(assignments), [row[1:] for row in rows]
+            )
+
+    def find_jobs(self, job_queue=None, job_status=None, name_pattern=None, created_after=None, job_ids=None):
+        """
+        Search the recorded jobs, newest first.
+
+        :param job_queue: job queue ARN or name
+        :param job_status: list of job status
+        :param name_pattern: shell-style pattern of the job name
+        :param created_after: minimum creation timestamp, in milliseconds
+        :param job_ids: list of job ids
+        :return: list of dictionaries with the job_id key and a key for each of the JOURNAL_COLUMNS
+        """
+        conditions = []
+        parameters = []
+        if job_queue:
+            conditions.append("queue = ?")
+            parameters.append(get_queue_name(job_queue))
+        if job_status:
+            conditions.append("status IN ({0})".format(", ".join("?" * len(job_status))))
+            parameters.extend(job_status)
+        if name_pattern:
+            conditions.append("name GLOB ?")
+            parameters.append(name_pattern)
+        if created_after is not None:
+            conditions.append("created_at >= ?")
+            parameters.append(created_after)
+        if job_ids:
+            conditions.append("job_id IN ({0})".format(", ".join("?" * len(job_ids))))
+            parameters.extend(job_ids)
+
+        query = "SELECT job_id, {0} FROM jobs".format(", ".join(JOURNAL_COLUMNS))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC"
+        with self.__lock:
+            cursor = self.__connection.execute(query, parameters)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        """Close the journal."""
+        self.__connection.close()
+
+    @staticmethod
+    def __get_values(job, job_queue):
+        """Return the values of the JOURNAL_COLUMNS for the given job, None for the values not available."""
+        return (
+            job.get("jobName"),
+            get_queue_name(job.get("jobQueue", job_queue)),
+            job.get("status"),
+            job.get("statusReason"),
+            job.get("createdAt"),
+            job.get("startedAt"),
+            job.get("stoppedAt"),
+            job.get("container", {}).get("exitCode"),
+        )
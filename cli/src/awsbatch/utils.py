@@ -13,11 +13,19 @@
 # See the License for the specific language governing permissions and limitations under the License.
 from __future__ import print_function
 
+import hashlib
+import os
 import pipes
 import re
 import sys
+import threading
+import time
+from builtins import range
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
 from dateutil import tz
 
 
@@ -129,9 +137,80 @@ def get_job_type(job):
     return "SIMPLE"
 
 
+def get_job_children_ids(job):
+    """
+    Get the ids of the children of the given job.
+
+    Array children are identified by <job_id>:<index>, MNP nodes by <job_id>#<index>.
+
+    :param job: the job dictionary returned by AWS Batch api
+    :return: the list of children ids, empty for SIMPLE jobs
+    """
+    if is_job_array(job):
+        return ["{0}:{1}".format(job["jobId"], index) for index in range(0, job["arrayProperties"]["size"])]
+    if is_mnp_job(job):
+        return ["{0}#{1}".format(job["jobId"], index) for index in range(0, job["nodeProperties"]["numNodes"])]
+    return []
+
+
+def chunked_describe_jobs(batch_client, job_ids):
+    """
+    Submit calls to describe_jobs in batches of 100 elements each.
+
+    describe_jobs API call has a hard limit on the number of job that can be
+    retrieved with a single call. In case job_ids has more than 100 items, this function
+    distributes the describe_jobs call across multiple requests.
+
+    :param batch_client: boto3 batch client
+    :param job_ids: list of ids for the jobs to describe.
+    :return: list of described jobs.
+    """
+    jobs = []
+    for index in range(0, len(job_ids), 100):
+        jobs_chunk = job_ids[index : index + 100]  # noqa: E203
+        jobs.extend(batch_client.describe_jobs(jobs=jobs_chunk)["jobs"])
+    return jobs
+
+
+class RateLimiter(object):
+    """Thread-safe limiter of the number of operations per second."""
+
+    def __init__(self, rate):
+        """
+        Initialize the object.
+
+        :param rate: maximum number of operations per second
+        """
+        self.interval = 1.0 / rate
+        self.next_slot = time.time()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Wait until the next operation is allowed by the configured rate."""
+        with self.lock:
+            now = time.time()
+            wait_time = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
 class S3Uploader(object):
     """S3 uploader."""
 
+    # multipart uploads of 64 MiB parts, with up to 10 parts uploaded in parallel for every file
+    TRANSFER_CONFIG = TransferConfig(
+        multipart_threshold=64 * 1024 * 1024, multipart_chunksize=64 * 1024 * 1024, max_concurrency=10
+    )
+    # maximum number of files uploaded in parallel
+    MAX_CONCURRENT_UPLOADS = 4
+
+    # SHA-256 digests of the local files, by (path, size, modification time), shared by all the uploaders
+    __digests = {}
+    # content addressed keys already in the bucket, shared by all the uploaders
+    __uploaded_keys = set()
+    __lock = threading.Lock()
+
     def __init__(self, boto3_factory, s3_bucket, default_folder=""):
         """Initialize the object.
 
@@ -165,4 +244,74 @@ class S3Uploader(object):
         :param folder: S3 folder on which put the files (optional)
         """
         s3_folder = folder if folder else self.default_folder
-        self.s3_client.upload_file(file_path, self.s3_bucket, s3_folder + key_name)
+        self.s3_client.upload_file(file_path, self.s3_bucket, s3_folder + key_name, Config=self.TRANSFER_CONFIG)
+
+    def put_files(self, file_paths, folder=None):
+        """
+        Upload files in parallel, to keys named after their file name.
+
+        :param file_paths: files to upload
+        :param folder: S3 folder on which put the files (optional)
+        """
+        if file_paths:
+            with ThreadPoolExecutor(max_workers=min(len(file_paths), self.MAX_CONCURRENT_UPLOADS)) as executor:
+                futures = [
+                    executor.submit(self.put_file, file_path, os.path.basename(file_path), folder)
+                    for file_path in file_paths
+                ]
+                # raise the upload errors, if any
+                for future in futures:
+                    future.result()
+
+    def put_files_by_content(self, file_paths, folder):
+        """
+        Upload files in parallel to keys named after the SHA-256 digest of their content.
+
+        Files whose content is already in the given folder are not uploaded again.
+
+        :param file_paths: files to upload
+        :param folder: S3 folder shared by the content addressed files
+        :return: list of S3 keys, in the same order of the given files
+        """
+        with ThreadPoolExecutor(max_workers=min(len(file_paths), self.MAX_CONCURRENT_UPLOADS)) as executor:
+            return list(executor.map(lambda file_path: self.__put_file_by_content(file_path, folder), file_paths))
+
+    def __put_file_by_content(self, file_path, folder):
+        """
+        Upload a file to the key named after its SHA-256 digest, if not already there.
+
+        :param file_path: file to upload
+        :param folder: S3 folder shared by the content addressed files
+        :return: the S3 key of the file
+        """
+        key = folder + self.__get_digest(file_path)
+        if key in S3Uploader.__uploaded_keys:
+            return key
+        try:
+            self.s3_client.head_object(Bucket=self.s3_bucket, Key=key)
+        except ClientError:
+            self.s3_client.upload_file(file_path, self.s3_bucket, key, Config=self.TRANSFER_CONFIG)
+        with S3Uploader.__lock:
+            S3Uploader.__uploaded_keys.add(key)
+        return key
+
+    @staticmethod
+    def __get_digest(file_path):
+        """
+        Compute the SHA-256 digest of the given file, or get it from the cache if the file is not changed.
+
+        :param file_path: file path
+        :return: the hex digest
+        """
+        stat = os.stat(file_path)
+        cache_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+        digest = S3Uploader.__digests.get(cache_key)
+        if not digest:
+            sha256 = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            digest = sha256.hexdigest()
+            with S3Uploader.__lock:
+                S3Uploader.__digests[cache_key] = digest
+        return digest
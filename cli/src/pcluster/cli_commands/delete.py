@@ -10,7 +10,9 @@
 # limitations under the License.
 import logging
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from botocore.config import Config
@@ -18,10 +20,18 @@ from botocore.exceptions import ClientError
 
 from pcluster import utils
 from pcluster.config.pcluster_config import PclusterConfig
-from pcluster.utils import NodeType, paginate_boto3
+from pcluster.utils import NodeType
 
 LOGGER = logging.getLogger(__name__)
 
+# maximum number of instance ids accepted by a single terminate_instances call
+MAX_TERMINATE_BATCH_SIZE = 1000
+MAX_CONCURRENT_REQUESTS = 10
+ACTIVE_INSTANCE_STATES = ["pending", "running", "stopping", "stopped"]
+# the shutting-down waiter checks every SHUTTING_DOWN_WAITER_DELAY seconds that all the nodes are shutting down
+SHUTTING_DOWN_WAITER_DELAY = 5
+SHUTTING_DOWN_WAITER_MAX_ATTEMPTS = 24
+
 
 def delete(args):
     PclusterConfig.init_aws(config_file=args.config_file)
@@ -84,25 +94,22 @@ def _delete_cluster(cluster_name, nowait):
     saw_update = False
     terminate_compute_fleet = not nowait
     stack_name = utils.get_stack_name(cluster_name)
+    progress = _NodesTerminationProgress()
+    termination_thread = None
     try:
         # delete_stack does not raise an exception if stack does not exist
         # Use describe_stacks to explicitly check if the stack exists
         cfn.delete_stack(StackName=stack_name)
         saw_update = True
+        if terminate_compute_fleet:
+            # compute nodes are not part of the stack, terminate them while the stack is being deleted
+            termination_thread = _start_cluster_nodes_termination(stack_name, progress)
         stack_status = utils.get_stack(stack_name, cfn).get("StackStatus")
         sys.stdout.write("\rStatus: %s" % stack_status)
         sys.stdout.flush()
         LOGGER.debug("Status: %s", stack_status)
         if not nowait:
-            while stack_status == "DELETE_IN_PROGRESS":
-                time.sleep(5)
-                stack_status = utils.get_stack(stack_name, cfn, raise_on_error=True).get("StackStatus")
-                events = utils.get_stack_events(stack_name, raise_on_error=True)[0]
-                resource_status = (
-                    "Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))
-                ).ljust(80)
-                sys.stdout.write("\r%s" % resource_status)
-                sys.stdout.flush()
+            stack_status = _wait_for_stack_deletion(stack_name, stack_status, cfn, progress)
             sys.stdout.write("\rStatus: %s\n" % stack_status)
             sys.stdout.flush()
             LOGGER.debug("Status: %s", stack_status)
@@ -125,33 +132,168 @@ def _delete_cluster(cluster_name, nowait):
         sys.exit(0)
     finally:
         if terminate_compute_fleet:
-            _terminate_cluster_nodes(stack_name)
+            _complete_cluster_nodes_termination(stack_name, termination_thread, progress)
+
+
+def _wait_for_stack_deletion(stack_name, stack_status, cfn, progress):
+    """
+    Print the deletion status of the stack and of the compute nodes, while the stack deletion is in progress.
+
+    :param stack_name: name of the cluster stack
+    :param stack_status: current status of the stack
+    :param cfn: CloudFormation client
+    :param progress: _NodesTerminationProgress object updated by the termination thread
+    :return: the final status of the stack
+    """
+    while stack_status == "DELETE_IN_PROGRESS":
+        time.sleep(5)
+        stack_status = utils.get_stack(stack_name, cfn, raise_on_error=True).get("StackStatus")
+        events = utils.get_stack_events(stack_name, raise_on_error=True)[0]
+        resource_status = "Status: %s - %s" % (events.get("LogicalResourceId"), events.get("ResourceStatus"))
+        if progress.found:
+            resource_status += " - %s" % progress
+        sys.stdout.write("\r%s" % resource_status.ljust(80))
+        sys.stdout.flush()
+    return stack_status
+
+
+class _NodesTerminationProgress(object):
+    """Compute nodes found and terminated, shared between the termination threads and the deletion status."""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.found = set()
+        self.terminated = set()
+
+    def add_found(self, instance_ids):
+        with self.__lock:
+            self.found.update(instance_ids)
+
+    def add_terminated(self, instance_ids):
+        with self.__lock:
+            self.terminated.update(instance_ids)
+
+    def __str__(self):
+        with self.__lock:
+            return "Compute nodes terminated: %s/%s" % (len(self.terminated), len(self.found))
+
+
+def _get_ec2_client():
+    return boto3.client("ec2", config=Config(retries={"max_attempts": 10}))
+
+
+def _start_cluster_nodes_termination(stack_name, progress):
+    """
+    Start the termination of the compute nodes in a background thread.
+
+    :param stack_name: name of the cluster stack
+    :param progress: _NodesTerminationProgress object updated by the thread
+    :return: the started thread
+    """
+    ec2 = _get_ec2_client()
+
+    def _terminate():
+        try:
+            _terminate_instances(ec2, stack_name, progress)
+        except Exception as e:
+            # nodes left running are terminated again once the stack has been deleted
+            LOGGER.debug("Failed when terminating compute nodes with error: %s", e)
 
+    thread = threading.Thread(target=_terminate, name="terminate-cluster-nodes")
+    thread.daemon = True
+    thread.start()
+    return thread
 
-def _terminate_cluster_nodes(stack_name):
+
+def _complete_cluster_nodes_termination(stack_name, termination_thread, progress):
+    """
+    Wait for the background termination, if started, then check that all the compute nodes are shutting down.
+
+    :param stack_name: name of the cluster stack
+    :param termination_thread: thread started by _start_cluster_nodes_termination, None if not started
+    :param progress: _NodesTerminationProgress object updated by the thread
+    """
+    if termination_thread:
+        termination_thread.join()
+    _terminate_cluster_nodes(stack_name, progress)
+
+
+def _terminate_cluster_nodes(stack_name, progress=None):
+    """
+    Terminate the compute nodes of the cluster and wait for all of them to be shutting down.
+
+    Nodes still active are terminated again at every check, to include the ones launched during the stack deletion.
+
+    :param stack_name: name of the cluster stack
+    :param progress: _NodesTerminationProgress object with the nodes already terminated, if any
+    """
     try:
         LOGGER.info("\nChecking if there are running compute nodes that require termination...")
-        ec2 = boto3.client("ec2", config=Config(retries={"max_attempts": 10}))
+        ec2 = _get_ec2_client()
+        progress = progress or _NodesTerminationProgress()
 
-        for instance_ids in _describe_instance_ids_iterator(stack_name):
-            LOGGER.info("Terminating following instances: %s", instance_ids)
-            if instance_ids:
-                ec2.terminate_instances(InstanceIds=instance_ids)
+        for _ in range(SHUTTING_DOWN_WAITER_MAX_ATTEMPTS):
+            if not _terminate_instances(ec2, stack_name, progress):
+                break
+            sys.stdout.write("\r%s" % progress)
+            sys.stdout.flush()
+            time.sleep(SHUTTING_DOWN_WAITER_DELAY)
+        else:
+            sys.stdout.write("\n")
+            LOGGER.warning("Some compute nodes are not shutting down yet, please check them from the EC2 console.")
+            return
 
+        if progress.found:
+            sys.stdout.write("\r%s\n" % progress)
+            sys.stdout.flush()
         LOGGER.info("Compute fleet cleaned up.")
     except Exception as e:
         LOGGER.error("Failed when checking for running EC2 instances with error: %s", e)
 
 
-def _describe_instance_ids_iterator(stack_name, instance_state=("pending", "running", "stopping", "stopped")):
-    ec2 = boto3.client("ec2")
+def _terminate_instances(ec2, stack_name, progress):
+    """
+    Terminate the active compute nodes of the cluster, with concurrent requests of up to 1,000 instances each.
+
+    :param ec2: EC2 client
+    :param stack_name: name of the cluster stack
+    :param progress: _NodesTerminationProgress object updated with the terminated nodes
+    :return: the number of active compute nodes found
+    """
+    instance_ids = [instance_id for page in _describe_instance_ids_iterator(ec2, stack_name) for instance_id in page]
+    if instance_ids:
+        progress.add_found(instance_ids)
+        LOGGER.debug("Terminating following instances: %s", instance_ids)
+        batches = [
+            instance_ids[index : index + MAX_TERMINATE_BATCH_SIZE]
+            for index in range(0, len(instance_ids), MAX_TERMINATE_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+            for batch in executor.map(lambda batch: _terminate_instances_batch(ec2, batch), batches):
+                progress.add_terminated(batch)
+    return len(instance_ids)
+
+
+def _terminate_instances_batch(ec2, instance_ids):
+    """Terminate the given instances, return the ones whose termination has been requested."""
+    try:
+        ec2.terminate_instances(InstanceIds=instance_ids)
+        return instance_ids
+    except ClientError as e:
+        LOGGER.debug("Failed when terminating instances %s with error: %s", instance_ids, e)
+        return []
+
+
+def _describe_instance_ids_iterator(ec2, stack_name, instance_state=ACTIVE_INSTANCE_STATES):
     filters = [
         {"Name": "tag:Application", "Values": [stack_name]},
         {"Name": "instance-state-name", "Values": list(instance_state)},
         {"Name": "tag:aws-parallelcluster-node-type", "Values": [str(NodeType.compute)]},
     ]
-    for page in paginate_boto3(ec2.describe_instances, Filters=filters, PaginationConfig={"PageSize": 100}):
-        instances = []
-        for instance in page.get("Instances", []):
-            instances.append(instance.get("InstanceId"))
-        yield instances
+    paginator = ec2.get_paginator("describe_instances")
+    for page in paginator.paginate(Filters=filters, PaginationConfig={"PageSize": MAX_TERMINATE_BATCH_SIZE}):
+        yield [
+            instance.get("InstanceId")
+            for reservation in page.get("Reservations", [])
+            for instance in reservation.get("Instances", [])
+        ]
@@ -15,7 +15,15 @@ from collections import OrderedDict
 import yaml
 
 from pcluster.config.iam_policy_rules import AWSBatchFullAccessInclusionRule, CloudWatchAgentServerPolicyInclusionRule
-from pcluster.config.param_types import LOGGER, Param, Section, SettingsParam, StorageData, _ensure_section_existence
+from pcluster.config.param_types import (
+    LOGGER,
+    LazyDefault,
+    Param,
+    Section,
+    SettingsParam,
+    StorageData,
+    _ensure_section_existence,
+)
 from pcluster.config.resource_map import ResourceMap
 from pcluster.constants import PCLUSTER_ISSUES_LINK
 from pcluster.utils import (
@@ -36,6 +44,8 @@ from pcluster.utils import (
 class CfnParam(Param):
     """Base class for configuration parameters using CloudFormation parameters as storage mechanism."""
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Load the param from the related storage data structure."""
         return self.from_cfn_params(storage_params.cfn_params)
@@ -91,6 +101,8 @@ class CfnParam(Param):
 class CommaSeparatedCfnParam(CfnParam):
     """Class to manage comma separated parameters. E.g. additional_iam_policies."""
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """
         Initialize parameter value from config_parser.
@@ -134,6 +146,8 @@ class CommaSeparatedCfnParam(CfnParam):
 class FloatCfnParam(CfnParam):
     """Class to manage float configuration parameters."""
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """
         Initialize parameter value from config_parser.
@@ -171,6 +185,8 @@ class FloatCfnParam(CfnParam):
 class BoolCfnParam(CfnParam):
     """Class to manage boolean configuration parameters."""
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """
         Initialize parameter value from config_parser.
@@ -214,6 +230,8 @@ class BoolCfnParam(CfnParam):
 class IntCfnParam(CfnParam):
     """Class to manage integer configuration parameters."""
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """
         Initialize param_value from config_parser.
@@ -250,6 +268,8 @@ class IntCfnParam(CfnParam):
 class JsonCfnParam(CfnParam):
     """Class to manage json configuration parameters."""
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """
         Initialize parameter value from config_parser.
@@ -299,6 +319,9 @@ class JsonCfnParam(CfnParam):
 class ExtraJsonCfnParam(JsonCfnParam):
     """Class to manage extra_json configuration parameters."""
 
+    __slots__ = ()
+    lazy_default = False
+
     def get_cfn_value(self):
         """
         Convert parameter value into CFN value.
@@ -330,6 +353,8 @@ class SharedDirCfnParam(CfnParam):
     and the "shared" parameter of the ebs sections (e.g. SharedDir = /shared1,/shared2,NONE,NONE,NONE).
     """
 
+    __slots__ = ()
+
     def to_cfn(self):
         """Convert parameter to CFN representation."""
         cfn_params = {}
@@ -380,6 +405,8 @@ class SpotPriceCfnParam(FloatCfnParam):
     from "spot_price" when the scheduler is a traditional one.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing CFN input only if the scheduler is a traditional one."""
         cfn_converter = self.definition.get("cfn_param_mapping", None)
@@ -417,6 +444,8 @@ class SpotBidPercentageCfnParam(IntCfnParam):
     from "spot_price" when the scheduler is a traditional one.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing CFN input only if the scheduler is awsbatch."""
         cfn_converter = self.definition.get("cfn_param_mapping", None)
@@ -448,6 +477,8 @@ class QueueSizeCfnParam(IntCfnParam):
     from "*_queue_size" when the scheduler is a traditional one.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input according to the scheduler."""
         cfn_converter = self.definition.get("cfn_param_mapping", None)
@@ -496,6 +527,8 @@ class MaintainInitialSizeCfnParam(BoolCfnParam):
     merging info from "initial_queue_size" and "maintain_initial_size" when the scheduler is a traditional one.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input."""
         cfn_converter = self.definition.get("cfn_param_mapping", None)
@@ -533,6 +566,9 @@ class AdditionalIamPoliciesCfnParam(CommaSeparatedCfnParam):
       during CFN conversion.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     policy_inclusion_rules = [CloudWatchAgentServerPolicyInclusionRule, AWSBatchFullAccessInclusionRule]
 
     def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
@@ -553,6 +589,10 @@ class AdditionalIamPoliciesCfnParam(CommaSeparatedCfnParam):
                 additional_policies.add(rule.get_policy())
         self.value = sorted(additional_policies)
 
+    def depends_on_sections(self, section_keys):
+        """Depend on all the sections, since policy inclusion rules can refer to any of them (e.g. cw_log)."""
+        return True
+
     def _non_conditional_iam_policies(self):
         """Given a list of IAM policies return a new list containing only the non conditional ones."""
         policies = set(self.value)  # List is cloned to avoid modifying self value
@@ -570,11 +610,14 @@ class AvailabilityZoneCfnParam(CfnParam):
     and it is used for master_availability_zone and compute_availability_zone.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     def _init_az(self, config_parser, subnet_parameter):
         section_name = get_file_section_name(self.section_key, self.section_label)
         if config_parser.has_option(section_name, subnet_parameter):
             subnet_id = config_parser.get(section_name, subnet_parameter)
-            self.value = get_availability_zone_of_subnet(subnet_id)
+            self.value = LazyDefault(get_availability_zone_of_subnet, subnet_id)
             self._check_allowed_values()
 
     def to_file(self, config_parser, write_defaults=False):
@@ -590,6 +633,8 @@ class HeadNodeAvailabilityZoneCfnParam(AvailabilityZoneCfnParam):
     and it is used during EFS conversion and validation.
     """
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """Initialize the Availability zone of the cluster by checking the head node Subnet."""
         self._init_az(config_parser, "master_subnet_id")
@@ -599,7 +644,7 @@ class HeadNodeAvailabilityZoneCfnParam(AvailabilityZoneCfnParam):
     def from_cfn_params(self, cfn_params):
         """Initialize the Availability zone by checking the head node subnet from cfn."""
         head_node_subnet_id = get_cfn_param(cfn_params, "MasterSubnetId")
-        self.value = get_availability_zone_of_subnet(head_node_subnet_id)
+        self.value = LazyDefault(get_availability_zone_of_subnet, head_node_subnet_id)
         return self
 
 
@@ -611,6 +656,8 @@ class ComputeAvailabilityZoneCfnParam(AvailabilityZoneCfnParam):
     and it is used during EFS conversion and validation.
     """
 
+    __slots__ = ()
+
     def from_file(self, config_parser):
         """Initialize the Availability zone of the cluster by checking the Compute Subnet."""
         self._init_az(config_parser, "compute_subnet_id")
@@ -620,7 +667,7 @@ class ComputeAvailabilityZoneCfnParam(AvailabilityZoneCfnParam):
     def from_cfn_params(self, cfn_params):
         """Initialize the Availability zone by checking the Compute Subnet from cfn."""
         compute_subnet_id = get_cfn_param(cfn_params, "ComputeSubnetId")
-        self.value = get_availability_zone_of_subnet(compute_subnet_id)
+        self.value = LazyDefault(get_availability_zone_of_subnet, compute_subnet_id)
         return self
 
 
@@ -631,6 +678,8 @@ class DisableHyperThreadingCfnParam(BoolCfnParam):
     We need this class in order to convert the boolean disable_hyperthreading = [true/false] into Cores.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """Initialize param value by parsing the right CFN input."""
         try:
@@ -723,6 +772,9 @@ class ClusterConfigMetadataCfnParam(JsonCfnParam):
     labels and their corresponding CloudFormation resources.
     """
 
+    __slots__ = ("__section_resources",)
+    lazy_default = False
+
     def _from_definition(self):
         self.value = self.get_default_value()
         self.__section_resources = ResourceMap(self.value.get("sections"))
@@ -765,6 +817,10 @@ class ClusterConfigMetadataCfnParam(JsonCfnParam):
             self.__store_section_labels(section_key)
         self.value["sections"] = self.__section_resources.resources()
 
+    def depends_on_sections(self, section_keys):
+        """Depend on all the sections, whose labels are stored in the configuration metadata."""
+        return True
+
     def get_section_resources(self, section_key):
         """Get the resources linked to a specific section key in the configuration metadata."""
         return self.__section_resources.resources(section_key)
@@ -788,6 +844,8 @@ class ClusterConfigMetadataCfnParam(JsonCfnParam):
     def __resources_to_value(self):
         """Sync data from internal resources structure to param value."""
         self.value["sections"] = self.__section_resources.resources()
+        # the value is updated in place
+        self.pcluster_config._storage_data_updated()
 
 
 class BaseOSCfnParam(CfnParam):
@@ -797,6 +855,9 @@ class BaseOSCfnParam(CfnParam):
     We need this class in order to initialize the private architecture param.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     @staticmethod
     def get_instance_type_architecture(instance_type):
         """Compute cluster's 'Architecture' CFN parameter based on its head node instance type."""
@@ -816,8 +877,8 @@ class BaseOSCfnParam(CfnParam):
     def refresh(self):
         """Initialize the private architecture param."""
         if self.value:
-            head_node_instance_type = self.owner_section.get_param_value("master_instance_type")
-            architecture = self.get_instance_type_architecture(head_node_instance_type)
+            head_node_instance_type = self.owner_section.get_param("master_instance_type").unresolved_value
+            architecture = LazyDefault(BaseOSCfnParam.get_instance_type_architecture, head_node_instance_type)
             self.owner_section.get_param("architecture").value = architecture
 
 
@@ -828,6 +889,8 @@ class ArgsCfnParam(CfnParam):
     We need this class in order to escape the args to json param.
     """
 
+    __slots__ = ()
+
     def from_cfn_params(self, cfn_params):
         """
         Initialize parameter value by parsing CFN input parameters.
@@ -862,12 +925,15 @@ class ComputeInstanceTypeCfnParam(CfnParam):
     We need this class in order to set the default instance type from a boto3 call.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     def refresh(self):
-        """Get default value from a boto3 call for free tier instance type."""
-        if not self.value:
+        """Set the default value, the free tier instance type is retrieved with a boto3 call when read."""
+        if not self.unresolved_value:
             scheduler = self.pcluster_config.get_section("cluster").get_param_value("scheduler")
             if scheduler:
-                self.value = "optimal" if scheduler == "awsbatch" else get_default_instance_type()
+                self.value = "optimal" if scheduler == "awsbatch" else LazyDefault(get_default_instance_type)
 
 
 class HeadNodeInstanceTypeCfnParam(CfnParam):
@@ -877,10 +943,13 @@ class HeadNodeInstanceTypeCfnParam(CfnParam):
     We need this class in order to set the default instance type from a boto3 call.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     def refresh(self):
-        """Get default value from a boto3 call for free tier instance type."""
-        if not self.value:
-            self.value = get_default_instance_type()
+        """Set the default value, the free tier instance type is retrieved with a boto3 call when read."""
+        if not self.unresolved_value:
+            self.value = LazyDefault(get_default_instance_type)
 
 
 class TagsParam(JsonCfnParam):
@@ -891,6 +960,8 @@ class TagsParam(JsonCfnParam):
     Therefore, we need to overwrite the from_storage function
     """
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Load the param from the related storage data structure."""
         return self.from_cfn_tag(storage_params.cfn_tags)
@@ -911,6 +982,8 @@ class TagsParam(JsonCfnParam):
 class SettingsCfnParam(SettingsParam):
     """Class to manage *_settings parameter on which the value is a single value (e.g. vpc_settings = default)."""
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Initialize section configuration parameters referred by the settings value by parsing CFN parameters."""
         self.value = self.get_default_value()
@@ -990,6 +1063,8 @@ class EBSSettingsCfnParam(SettingsCfnParam):
     Furthermore, as opposed to SettingsParam, the value can be a comma separated value (e.g. ebs_settings = ebs1,ebs2).
     """
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Init ebs section only if there are more than one ebs (the default one)."""
         labels = []
@@ -1109,21 +1184,29 @@ class NetworkInterfacesCountCfnParam(CommaSeparatedCfnParam):
     on head node and compute nodes.
     """
 
+    __slots__ = ()
+    lazy_default = False
+
     def refresh(self):
         """Compute the number of network interfaces for head node and compute nodes."""
         cluster_section = self.pcluster_config.get_section("cluster")
         scheduler = cluster_section.get_param_value("scheduler")
         compute_instance_type = (
-            cluster_section.get_param_value("compute_instance_type")
+            cluster_section.get_param("compute_instance_type").unresolved_value
             if self.pcluster_config.cluster_model.name == "SIT" and scheduler != "awsbatch"
             else None
         )
-        self.value = [
-            str(
-                InstanceTypeInfo.init_from_instance_type(
-                    cluster_section.get_param_value("master_instance_type")
-                ).max_network_interface_count()
-            ),
+        self.value = LazyDefault(
+            NetworkInterfacesCountCfnParam.get_network_interfaces_count,
+            cluster_section.get_param("master_instance_type").unresolved_value,
+            compute_instance_type,
+        )
+
+    @staticmethod
+    def get_network_interfaces_count(head_node_instance_type, compute_instance_type):
+        """Return the number of network interfaces of head node and compute nodes."""
+        return [
+            str(InstanceTypeInfo.init_from_instance_type(head_node_instance_type).max_network_interface_count()),
             str(InstanceTypeInfo.init_from_instance_type(compute_instance_type).max_network_interface_count())
             if compute_instance_type
             else "1",
@@ -1134,6 +1217,8 @@ class NetworkInterfacesCountCfnParam(CommaSeparatedCfnParam):
 class CfnSection(Section):
     """Class to manage configuration sections with storage persistence in CloudFormation."""
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Initialize section configuration parameters by parsing CFN parameters."""
         cfn_converter = self.definition.get("cfn_param_mapping", None)
@@ -1221,6 +1306,8 @@ class EFSCfnSection(CfnSection):
     We need to define this class because during the CFN conversion it is required to perform custom actions.
     """
 
+    __slots__ = ()
+
     def to_storage(self, storage_params=None):
         """
         Convert section to CFN representation.
@@ -1280,6 +1367,8 @@ class ClusterCfnSection(CfnSection):
     that identifies the label in the template.
     """
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Initialize section configuration parameters by parsing CFN parameters."""
         if storage_params:
@@ -1303,6 +1392,9 @@ class ClusterCfnSection(CfnSection):
 class VolumeSizeParam(IntCfnParam):
     """Class to manage ebs volume_size parameter."""
 
+    __slots__ = ()
+    lazy_default = False
+
     def refresh(self):
         """
         We need this method to check whether the user have an input on ebs volume_size.
@@ -1312,18 +1404,26 @@ class VolumeSizeParam(IntCfnParam):
         the size of the specified EBS snapshot.
         """
         section = self.pcluster_config.get_section(self.section_key, self.section_label)
-        if section and section.get_param_value("volume_size") is None:
+        if section and section.get_param("volume_size").unresolved_value is None:
             if section.get_param_value("ebs_snapshot_id"):
                 ebs_snapshot_id = section.get_param_value("ebs_snapshot_id")
-                default_volume_size = get_ebs_snapshot_info(ebs_snapshot_id).get("VolumeSize")
+                default_volume_size = LazyDefault(VolumeSizeParam.get_snapshot_volume_size, ebs_snapshot_id)
             else:
                 default_volume_size = 500 if section.get_param_value("volume_type") in ["st1", "sc1"] else 20
             self.value = default_volume_size
 
+    @staticmethod
+    def get_snapshot_volume_size(ebs_snapshot_id):
+        """Return the size of the given EBS snapshot."""
+        return get_ebs_snapshot_info(ebs_snapshot_id).get("VolumeSize")
+
 
 class VolumeIopsParam(IntCfnParam):
     """Class to manage ebs volume_iops parameter in the EBS section."""
 
+    __slots__ = ()
+    lazy_default = False
+
     EBS_VOLUME_TYPE_IOPS_DEFAULT = {
         "io1": 100,
         "io2": 100,
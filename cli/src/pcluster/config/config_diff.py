@@ -0,0 +1,114 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import logging
+from collections import namedtuple
+
+from pcluster.config.param_types import LazyDefault
+from pcluster.utils import get_file_section_name
+
+# Represents a single parameter difference in a ConfigDiff instance
+ParamDiff = namedtuple("ParamDiff", ["section_key", "section_label", "param_key", "base_value", "target_value"])
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ConfigDiff(object):
+    """
+    Represents the differences between the public params of two PclusterConfig instances.
+
+    Unlike ConfigPatch, no update policy is checked: the sections are first compared by fingerprint and only the
+    sections with different fingerprints are compared param by param. Params are compared by their normalized values,
+    LazyDefault values are computed only if compared with a different value.
+    """
+
+    def __init__(self, base_config, target_config):
+        """
+        Create a ConfigDiff.
+
+        :param base_config: The base configuration, f.i. as reconstructed from CloudFormation
+        :param target_config: The target configuration, f.i. as loaded from configuration file
+        """
+        self.base_config = base_config
+        self.target_config = target_config
+
+        self.added_sections = []
+        self.removed_sections = []
+        self.changes = []
+        self._compare()
+
+    @property
+    def has_differences(self):
+        """Tell if the configurations differ."""
+        return bool(self.added_sections or self.removed_sections or self.changes)
+
+    @staticmethod
+    def _get_sections(config):
+        """
+        Get the sections of the configuration, by section key and label.
+
+        The cluster sections are compared no matter the label, as done by ConfigPatch.
+        """
+        sections = {}
+        for section_key in config.get_section_keys():
+            for section_label, section in config.get_sections(section_key).items():
+                sections[(section_key, (section_label or "") if section_key != "cluster" else "")] = section
+        return sections
+
+    def _compare(self):
+        """Compare target with base configuration, by skipping the sections with the same fingerprint."""
+        base_sections = self._get_sections(self.base_config)
+        target_sections = self._get_sections(self.target_config)
+
+        for section_id in sorted(set(base_sections.keys()) | set(target_sections.keys())):
+            base_section = base_sections.get(section_id)
+            target_section = target_sections.get(section_id)
+            if not base_section:
+                self.added_sections.append(get_file_section_name(target_section.key, target_section.label))
+            elif not target_section:
+                self.removed_sections.append(get_file_section_name(base_section.key, base_section.label))
+            elif base_section.get_fingerprint() != target_section.get_fingerprint():
+                self._compare_section(base_section, target_section)
+            else:
+                LOGGER.debug("Section %s unchanged", get_file_section_name(target_section.key, target_section.label))
+
+    def _compare_section(self, base_section, target_section):
+        """
+        Compare the public params of the provided sections and append the differences to the changes list.
+
+        :param base_section: The section in the base configuration
+        :param target_section: The corresponding section in the target configuration
+        """
+        base_param_keys = base_section.get_public_param_keys()
+        target_param_keys = target_section.get_public_param_keys()
+        param_keys = target_param_keys + [
+            param_key for param_key in base_param_keys if param_key not in target_param_keys
+        ]
+
+        for param_key in param_keys:
+            base_param = base_section.get_param(param_key) if param_key in base_param_keys else None
+            target_param = target_section.get_param(param_key) if param_key in target_param_keys else None
+            base_value = base_param.get_normalized_value() if base_param else None
+            target_value = target_param.get_normalized_value() if target_param else None
+
+            if base_value != target_value and _is_lazy(base_param, target_param):
+                # the values are computed only when different, to compare a default with an explicit value
+                base_value = base_param.get_normalized_value(resolve=True) if base_param else None
+                target_value = target_param.get_normalized_value(resolve=True) if target_param else None
+
+            if base_value != target_value:
+                self.changes.append(
+                    ParamDiff(target_section.key, target_section.label, param_key, base_value, target_value)
+                )
+
+
+def _is_lazy(*params):
+    """Tell if any of the given params has a LazyDefault value."""
+    return any(param and isinstance(param.unresolved_value, LazyDefault) for param in params)
@@ -8,25 +8,16 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
-import copy
 import logging
-import re
-import sys
 from collections import namedtuple
 
 # Represents a single parameter change in a ConfigPatch instance
 from pcluster import utils
-from pcluster.config.update_policy import UpdatePolicy
+from pcluster.config.update_policy import ClusterRuntimeState, UpdatePolicy
 from pcluster.utils import get_file_section_name
 
 Change = namedtuple("Change", ["section_key", "section_label", "param_key", "old_value", "new_value", "update_policy"])
 
-# Patch for deepcopy bug - Issue10076 in Pyhton < 3.7
-# see https://bugs.python.org/issue10076
-# see https://docs.python.org/3/whatsnew/3.7.html#re
-if sys.version_info <= (3, 7):
-    copy._deepcopy_dispatch[type(re.compile(""))] = lambda r, _: r
-
 LOGGER = logging.getLogger(__name__)
 
 
@@ -60,14 +51,12 @@ class ConfigPatch(object):
         """
         # Cached condition results
         self.condition_results = {}
+        # Runtime state of the cluster read by the condition checkers, created when checking the patch
+        self.runtime_state = None
 
-        # Make a deep copy of the basic and target configurations to avoid changing the original ones
-        self.base_config = copy.deepcopy(base_config)
-        self.target_config = copy.deepcopy(target_config)
-
-        # Disable autorefresh to avoid breakages due to changes made to the configurations when creating the patch
-        self.base_config.auto_refresh = False
-        self.target_config.auto_refresh = False
+        # The configurations are only read when creating the patch, mock sections are created in separate views
+        self.base_config = base_config
+        self.target_config = target_config
 
         self.changes = []
         self._compare()
@@ -96,23 +85,21 @@ class ConfigPatch(object):
         All detected changes are added to the internal changes list, ready to be checked  through the public check()
         method.
         """
-        # Remove ignored sections
-        self._remove_ignored_sections(self.base_config)
-        self._remove_ignored_sections(self.target_config)
-
+        # Global file sections are ignored for patch creation, they are not part of the returned section keys.
         # First, compare all sections from target vs base config and mark visited base sections.
+        visited_base_sections = set()
         for section_key in sorted(self.target_config.get_section_keys()):
             for section_label in sorted(self.target_config.get_sections(section_key).keys()):
                 target_section = self.target_config.get_section(section_key, section_label)
                 base_section = self._get_config_section(self.base_config, target_section)
-                base_section.visited = True
+                visited_base_sections.add(id(base_section))
                 self._compare_section(base_section, target_section)
 
         # Then, compare all non visited base sections vs target config.
         for section_key in sorted(self.base_config.get_section_keys()):
             for section_label in sorted(self.base_config.get_sections(section_key).keys()):
                 base_section = self.base_config.get_section(section_key, section_label)
-                if not hasattr(base_section, "visited"):
+                if id(base_section) not in visited_base_sections:
                     target_section = self._get_config_section(self.target_config, base_section)
                     self._compare_section(base_section, target_section)
 
@@ -124,14 +111,15 @@ class ConfigPatch(object):
         :param target_section: The corresponding section in the target configuration
         """
         # If one of the two sections is marked as mock, all detected changes will also be mock
-        mock_base_section = hasattr(base_section, "mock")
-        mock_target_section = hasattr(target_section, "mock")
+        mock_base_section = _is_mock_section(base_section)
+        mock_target_section = _is_mock_section(target_section)
         mock_change = mock_base_section or mock_target_section
 
         for _, param in target_section.params.items():
-            base_value = base_section.get_param_value(param.key)
+            base_param = base_section.get_param(param.key)
 
-            if param != base_section.get_param(param.key):
+            # the values of unchanged params are not computed, since equal lazy defaults are equal
+            if param != base_param:
                 # Mock changes are always considered supported (or ignored). Their purpose is just to show which
                 # parameters are present in a section that has been added or removed. UpdatePolicy checks on related
                 # settings parameters will determine whether adding or removing these sections is supported
@@ -145,17 +133,12 @@ class ConfigPatch(object):
                         target_section.key,
                         target_section.label,
                         param.key,
-                        base_value if not mock_base_section else "-",
+                        base_param.value if not mock_base_section else "-",
                         param.value if not mock_target_section else "-",
                         change_update_policy,
                     )
                 )
 
-    def _remove_ignored_sections(self, config):
-        # global file sections are ignored for patch creation
-        for section_key in config.get_global_section_keys():
-            config.remove_section(section_key)
-
     @property
     def update_policy_level(self):
         """
@@ -184,10 +167,10 @@ class ConfigPatch(object):
         section_definition = section.definition
         section_type = section_definition.get("type")
         default_section = section_type(
-            section_definition=section_definition, pcluster_config=config, section_label=section.label
+            section_definition=section_definition,
+            pcluster_config=_MockSectionConfigView(config),
+            section_label=section.label,
         )
-
-        default_section.mock = True
         return default_section
 
     def _get_config_section(self, config, section):
@@ -222,6 +205,9 @@ class ConfigPatch(object):
         """
         rows = [["section", "parameter", "old value", "new value", "check", "reason", "action_needed"]]
 
+        # The runtime state is retrieved once for all the changes, by reusing the stack of the base configuration
+        self.runtime_state = ClusterRuntimeState(self.stack_name, getattr(self.base_config, "cfn_stack", None))
+
         patch_allowed = True
 
         for change in self.changes:
@@ -245,3 +231,40 @@ class ConfigPatch(object):
                 )
 
         return patch_allowed, rows
+
+
+class _MockSectionConfigView(object):
+    """
+    View of a PclusterConfig used by the mock sections.
+
+    Mock sections read the configuration as usual, e.g. to compute default values, but the sections they create
+    (e.g. default sections referred by Settings params) are kept in the view, so the configuration is never changed.
+    """
+
+    def __init__(self, config):
+        self.__config = config
+        self.__added_sections = []
+
+    def add_section(self, section):
+        """Keep the section in the view, without adding it to the configuration."""
+        self.__added_sections.append(section)
+
+    def remove_section(self, section_key, section_label=None):
+        """Ignore the removal, the configuration is never changed."""
+        pass
+
+    def _config_updated(self, *args, **kwargs):
+        """Ignore the notification, the configuration is never changed."""
+        pass
+
+    def _storage_data_updated(self):
+        """Ignore the notification, the configuration is never changed."""
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.__config, name)
+
+
+def _is_mock_section(section):
+    """Tell if the section has been created by the patch because missing in the base or target configuration."""
+    return isinstance(section.pcluster_config, _MockSectionConfigView)
@@ -11,7 +11,18 @@
 from collections import OrderedDict
 
 from pcluster import utils
-from pcluster.config.param_types import Param, Section, SettingsParam
+from pcluster.config.param_types import LazyDefault, Param, Section, SettingsParam
+
+# compute resource settings depending on the instance type capabilities, set by the queue section
+COMPUTE_RESOURCE_INSTANCE_TYPE_SETTINGS = [
+    "vcpus",
+    "gpus",
+    "enable_efa",
+    "enable_efa_gdr",
+    "disable_hyperthreading",
+    "disable_hyperthreading_via_cpu_options",
+    "network_interfaces",
+]
 
 # ---------------------- Params ---------------------- #
 
@@ -19,6 +30,8 @@ from pcluster.config.param_types import Param, Section, SettingsParam
 class JsonParam(Param):
     """Base class to manage configuration parameters stored in Json format."""
 
+    __slots__ = ()
+
     def get_value_type(self):
         """Return the type of the value managed by the Param."""
         return str
@@ -60,6 +73,8 @@ class JsonParam(Param):
 class IntJsonParam(JsonParam):
     """Base JsonParam to manage int parameters."""
 
+    __slots__ = ()
+
     def get_value_type(self):
         """Return the type of the value managed by the Param."""
         return int
@@ -73,6 +88,8 @@ class IntJsonParam(JsonParam):
 class BooleanJsonParam(JsonParam):
     """Base JsonParam to manage boolean parameters."""
 
+    __slots__ = ()
+
     def get_value_type(self):
         """Return the type of the value managed by the Param."""
         return bool
@@ -90,6 +107,8 @@ class BooleanJsonParam(JsonParam):
 class FloatJsonParam(JsonParam):
     """Base JsonParam to manage float parameters."""
 
+    __slots__ = ()
+
     def get_value_type(self):
         """Return the type of the value managed by the Param."""
         return float
@@ -103,6 +122,9 @@ class FloatJsonParam(JsonParam):
 class ScaleDownIdleTimeJsonParam(JsonParam):
     """JsonParam to manage scaledown_idletime for Json configuration."""
 
+    __slots__ = ()
+    lazy_default = False
+
     def refresh(self):
         """Take the value from the scaledown_idletime cfn parameter."""
         self.value = self.owner_section.get_param("scaledown_idletime").value
@@ -115,6 +137,13 @@ class ScaleDownIdleTimeJsonParam(JsonParam):
 class DefaultComputeQueueJsonParam(JsonParam):
     """JsonParam to manage default_queue parameter in cluster section."""
 
+    __slots__ = ()
+    lazy_default = False
+
+    def depends_on_sections(self, section_keys):
+        """Depend on the queue sections, the default queue is the first of the queue_settings."""
+        return "queue" in section_keys
+
     def refresh(self):
         """Take the label of the first queue as value."""
         queue_settings_param = self.pcluster_config.get_section("cluster").get_param("queue_settings")
@@ -130,6 +159,8 @@ class DefaultComputeQueueJsonParam(JsonParam):
 class SettingsJsonParam(SettingsParam):
     """Settings params with storage in Json."""
 
+    __slots__ = ()
+
     def to_storage(self, storage_params):
         """
         Convert the referred sections into the json storage representation.
@@ -212,6 +243,8 @@ class SettingsJsonParam(SettingsParam):
 class JsonSection(Section):
     """Class representing configuration sections which are persisted in Json."""
 
+    __slots__ = ()
+
     def from_storage(self, storage_params):
         """Load the section from storage params."""
         for param_key, param_definition in self.definition.get("params").items():
@@ -237,10 +270,11 @@ class JsonSection(Section):
         """Get the default Param type managed by the Section type."""
         return JsonParam
 
-    def refresh(self):
+    def refresh(self, updated_section_keys=None):
         """Refresh the Json section."""
-        self.refresh_section()
-        super(JsonSection, self).refresh()
+        if updated_section_keys is None or self.depends_on_sections(updated_section_keys):
+            self.refresh_section()
+        super(JsonSection, self).refresh(updated_section_keys)
 
     def refresh_section(self):
         """Perform custom refresh operations."""
@@ -250,6 +284,8 @@ class JsonSection(Section):
 class QueueJsonSection(JsonSection):
     """JSon Section for queues."""
 
+    __slots__ = ()
+
     def refresh_section(self):
         """Take values of disable_hyperthreading and enable_efa from cluster section if not specified."""
         if self.get_param_value("disable_hyperthreading") is None:
@@ -279,69 +315,80 @@ class QueueJsonSection(JsonSection):
                 compute_resource_section = self.pcluster_config.get_section("compute_resource", compute_resource_label)
                 self.refresh_compute_resource(compute_resource_section)
 
+    def depends_on_sections(self, section_keys):
+        """Depend on the compute resources, where queue and cluster settings are propagated."""
+        return "compute_resource" in section_keys or "cluster" in section_keys
+
     def refresh_compute_resource(self, compute_resource_section):
         """
         Populate additional settings needed for the linked compute resource like vcpus, gpus etc.
 
-        These parameters are set according to queue settings and instance type capabilities.
+        These parameters are set according to queue settings and instance type capabilities, the instance type
+        capabilities are retrieved when the parameters are read.
+        """
+        instance_type = compute_resource_section.get_param_value("instance_type")
+
+        if instance_type:
+            queue_settings = (
+                self.get_param_value("disable_hyperthreading"),
+                self.get_param_value("enable_efa"),
+                self.get_param_value("enable_efa_gdr"),
+            )
+            for param_key in COMPUTE_RESOURCE_INSTANCE_TYPE_SETTINGS:
+                compute_resource_section.get_param(param_key).value = LazyDefault(
+                    QueueJsonSection.get_compute_resource_setting, param_key, instance_type, *queue_settings
+                )
+
+            # Set initial_count to min_count if not manually set
+            initial_count_param = compute_resource_section.get_param("initial_count")
+            if initial_count_param.value is None:
+                initial_count_param.value = compute_resource_section.get_param_value("min_count")
+
+    @staticmethod
+    def get_compute_resource_setting(param_key, instance_type, ht_disabled, enable_efa, enable_efa_gdr):
         """
-        instance_type_param = compute_resource_section.get_param("instance_type")
+        Compute a setting of a compute resource according to queue settings and instance type capabilities.
 
-        if instance_type_param.value:
-            instance_type_info = utils.InstanceTypeInfo.init_from_instance_type(instance_type_param.value)
+        :param param_key: the key of the setting, one of COMPUTE_RESOURCE_INSTANCE_TYPE_SETTINGS
+        :param instance_type: the instance type of the compute resource
+        :param ht_disabled: the disable_hyperthreading setting of the queue
+        :param enable_efa: the enable_efa setting of the queue
+        :param enable_efa_gdr: the enable_efa_gdr setting of the queue
+        """
+        instance_type_info = utils.InstanceTypeInfo.init_from_instance_type(instance_type)
+        default_threads_per_core = instance_type_info.default_threads_per_core()
 
+        if param_key == "vcpus":
             # Set vcpus according to queue's disable_hyperthreading and instance features
-            ht_disabled = self.get_param_value("disable_hyperthreading")
-            default_threads_per_core = instance_type_info.default_threads_per_core()
-            vcpus = (
+            return (
                 (instance_type_info.vcpus_count() // default_threads_per_core)
                 if ht_disabled
                 else instance_type_info.vcpus_count()
             )
-            compute_resource_section.get_param("vcpus").value = vcpus
-
+        if param_key == "gpus":
             # Set gpus according to instance features
-            gpus = instance_type_info.gpu_count()
-            compute_resource_section.get_param("gpus").value = gpus
-
+            return instance_type_info.gpu_count()
+        if param_key == "enable_efa":
             # Set enable_efa according to queues' enable_efa and instance features
             # Instance type must support EFA
-            enable_efa = self.get_param_value("enable_efa")
-            compute_resource_section.get_param("enable_efa").value = (
-                enable_efa and instance_type_info.is_efa_supported()
-            )
-
+            return enable_efa and instance_type_info.is_efa_supported()
+        if param_key == "enable_efa_gdr":
             # Set enable_efa_gdr according to queues' enable_efa_gdr and instance features
             # Instance type must support EFA and have GPUs
-            enable_efa_gdr = self.get_param_value("enable_efa_gdr")
-            compute_resource_section.get_param("enable_efa_gdr").value = (
-                enable_efa_gdr and instance_type_info.is_efa_supported() and (gpus > 0)
-            )
-
+            return enable_efa_gdr and instance_type_info.is_efa_supported() and (instance_type_info.gpu_count() > 0)
+        if param_key == "disable_hyperthreading":
             # Set disable_hyperthreading according to queues' disable_hyperthreading and instance features
-            compute_resource_section.get_param("disable_hyperthreading").value = (
-                ht_disabled and default_threads_per_core != 1
-            )
-
+            return ht_disabled and default_threads_per_core != 1
+        if param_key == "disable_hyperthreading_via_cpu_options":
             # On some instance types, hyperthreading must be disabled manually rather than
             # through the CpuOptions of a launch template.
-            compute_resource_section.get_param(
-                "disable_hyperthreading_via_cpu_options"
-            ).value = compute_resource_section.get_param(
-                "disable_hyperthreading"
-            ).value and utils.disable_ht_via_cpu_options(
-                instance_type_param.value, instance_type_info.default_threads_per_core()
+            return (
+                ht_disabled
+                and default_threads_per_core != 1
+                and utils.disable_ht_via_cpu_options(instance_type, default_threads_per_core)
             )
-
-            # Set initial_count to min_count if not manually set
-            initial_count_param = compute_resource_section.get_param("initial_count")
-            if initial_count_param.value is None:
-                initial_count_param.value = compute_resource_section.get_param_value("min_count")
-
-            # Set number of network interfaces
-            compute_resource_section.get_param(
-                "network_interfaces"
-            ).value = instance_type_info.max_network_interface_count()
+        # Set number of network interfaces
+        return instance_type_info.max_network_interface_count()
 
 
 # ---------------------- Common functions ---------------------- #
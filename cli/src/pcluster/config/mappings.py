@@ -52,7 +52,7 @@ from pcluster.config.json_param_types import (
     ScaleDownIdleTimeJsonParam,
     SettingsJsonParam,
 )
-from pcluster.config.param_types import Visibility
+from pcluster.config.param_types import Visibility, compile_validation_plans
 from pcluster.config.update_policy import UpdatePolicy
 from pcluster.config.validators import (
     architecture_os_validator,
@@ -1158,3 +1158,25 @@ CLUSTER_HIT = {
 }
 
 # fmt: on
+
+# The validation plans are compiled once from the section definitions
+compile_validation_plans(
+    [
+        AWS,
+        GLOBAL,
+        ALIASES,
+        SCALING,
+        VPC,
+        EBS,
+        EFS,
+        RAID,
+        FSX,
+        DCV,
+        CW_LOG,
+        DASHBOARD,
+        COMPUTE_RESOURCE,
+        QUEUE,
+        CLUSTER_SIT,
+        CLUSTER_HIT,
+    ]
+)
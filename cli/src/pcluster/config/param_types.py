@@ -9,6 +9,8 @@
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
 import abc
+import hashlib
+import json
 import logging
 import re
 import sys
@@ -48,6 +50,88 @@ class Visibility(Enum):
     PUBLIC = "PUBLIC"  # Can be specified in config file
 
 
+# ---------------------- LazyDefault ---------------------- #
+class LazyDefault(object):
+    """
+    Value computed only when read, used for the param values requiring AWS calls (e.g. default instance type).
+
+    Lazy values computed by the same function with equal arguments are equal, so they can be compared without being
+    computed. Lazy values passed as arguments are computed before calling the function.
+    """
+
+    __slots__ = ("function", "args")
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def resolve(self):
+        """Compute the value."""
+        return self.function(*[arg.resolve() if isinstance(arg, LazyDefault) else arg for arg in self.args])
+
+    def __eq__(self, other):
+        return isinstance(other, LazyDefault) and self.function == other.function and self.args == other.args
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "LazyDefault({0}{1})".format(getattr(self.function, "__name__", self.function), self.args)
+
+
+# ---------------------- ValidationPlan ---------------------- #
+class ValidationPlan(object):
+    """
+    Validation steps of a section definition, compiled once for all the sections of the same definition.
+
+    Params without validators that are not required are not part of the plan. Params with a None default value are
+    known to be valid until created, because the validators are not called for None values.
+    """
+
+    __slots__ = ("section_validators", "param_validators", "valid_default_keys")
+
+    def __init__(self, section_definition):
+        self.section_validators = tuple(section_definition.get("validators", []))
+        self.param_validators = OrderedDict()
+        self.valid_default_keys = set()
+
+        for param_key, param_definition in section_definition.get("params", {}).items():
+            # the default param types of the sections, if not specified, do not change the validation of Param
+            param_type = param_definition.get("type", Param)
+            validators = tuple(param_type.get_validators(param_definition))
+            required = param_definition.get("required")
+            if validators or required or param_type.validate != Param.validate:
+                self.param_validators[param_key] = validators
+            if (
+                param_type.lazy_default
+                and not required
+                and param_type.get_default_value == Param.get_default_value
+                and param_definition.get("default") is None
+            ):
+                self.valid_default_keys.add(param_key)
+
+
+# Validation plans by id of the section definition, together with the definition to keep the id in use
+_VALIDATION_PLANS = {}
+
+
+def get_validation_plan(section_definition):
+    """Get the validation plan of the given section definition, compiled at the first request."""
+    validation_plan_entry = _VALIDATION_PLANS.get(id(section_definition))
+    if not validation_plan_entry:
+        validation_plan_entry = (section_definition, ValidationPlan(section_definition))
+        _VALIDATION_PLANS[id(section_definition)] = validation_plan_entry
+    return validation_plan_entry[1]
+
+
+def compile_validation_plans(section_definitions):
+    """Compile the validation plans of the given section definitions."""
+    for section_definition in section_definitions:
+        get_validation_plan(section_definition)
+
+
 # ---------------------- Param ---------------------- #
 class Param(ABC):
     """
@@ -55,8 +139,16 @@ class Param(ABC):
 
     Exposes the main interface to allow parameters to be loaded/written from configuration file and/or their specific
     data storage.
+
+    Params only store their own state, the definition is shared by all the params of the same type and key.
     """
 
+    __slots__ = ("section_key", "section_label", "key", "definition", "pcluster_config", "owner_section", "_value")
+
+    # Tells if the param can be created only when accessed, if not specified in the configuration file: its default
+    # must not depend on other params and its initialization and refresh must not change the configuration.
+    lazy_default = True
+
     def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
         self.section_key = section_key
         self.section_label = section_label
@@ -66,9 +158,28 @@ class Param(ABC):
         self.owner_section = owner_section
 
         # initialize parameter value by using default specified in the mappings file
-        self.value = None
+        self._value = None
         self._from_definition()
 
+    @property
+    def value(self):
+        """Get the parameter value, a LazyDefault value is computed when read for the first time."""
+        if isinstance(self._value, LazyDefault):
+            self._value = self._value.resolve()
+        return self._value
+
+    @property
+    def unresolved_value(self):
+        """Get the parameter value, without computing it if it is a LazyDefault."""
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        """Set the parameter value, by notifying the configuration if the value changed."""
+        if value != self._value and self.pcluster_config is not None:
+            self.pcluster_config._storage_data_updated()
+        self._value = value
+
     def get_value_from_string(self, string_value):
         """Return internal representation starting from CFN/user-input value."""
         param_value = self.get_default_value()
@@ -147,12 +258,21 @@ class Param(ABC):
                         "Allowed values are: {2}".format(self.key, self.value, allowed_values)
                     )
 
-    def validate(self):
-        """Call validation functions for the parameter, if there."""
+    @classmethod
+    def get_validators(cls, param_definition):
+        """Get the validation functions of the params of the given definition."""
+        return param_definition.get("validators", [])
+
+    def validate(self, validators=None):
+        """
+        Call validation functions for the parameter, if there.
+
+        :param validators: the validation functions to call, the ones of the param definition if not specified
+        """
         if self.definition.get("required") and self.value is None:
             sys.exit("Configuration parameter '{0}' must have a value".format(self.key))
 
-        for validation_func in self.definition.get("validators", []):
+        for validation_func in self.get_validators(self.definition) if validators is None else validators:
             if self.value is None:
                 LOGGER.debug("Configuration parameter '%s' has no value", self.key)
             else:
@@ -193,6 +313,16 @@ class Param(ABC):
         """Convert internal representation into string."""
         return str(self.value)
 
+    def get_normalized_value(self, resolve=False):
+        """
+        Get the string value, used to compare the params of different configurations.
+
+        :param resolve: compute the value if it is a LazyDefault, otherwise the LazyDefault is represented as is
+        """
+        if not resolve and isinstance(self._value, LazyDefault):
+            return repr(self._value)
+        return self.get_string_value()
+
     def get_default_value(self):
         """
         Get default value from the Param definition.
@@ -224,6 +354,17 @@ class Param(ABC):
         """
         pass
 
+    def depends_on_sections(self, section_keys):
+        """
+        Tell if the refresh of the parameter depends on the structure of the sections with the given keys.
+
+        Used to refresh only the affected parameters when sections are added, removed or renamed. By default the
+        refresh only depends on the values of the parameters, which are not changed by structural updates.
+
+        :param section_keys: keys of the sections added, removed or renamed
+        """
+        return False
+
     def get_update_policy(self):
         """Get the update policy of the parameter."""
         return self.definition.get("update_policy", UpdatePolicy.UNKNOWN)
@@ -235,7 +376,8 @@ class Param(ABC):
         return not self.__eq__(other)
 
     def _value_eq(self, other):
-        return self.value == other.value
+        # equal lazy values are not computed
+        return self._value == other.unresolved_value or self.value == other.value
 
     def get_storage_key(self):
         """
@@ -256,15 +398,31 @@ class SettingsParam(Param):
     section.
     """
 
-    def __init__(self, section_key, section_label, param_key, param_definition, pcluster_config, owner_section=None):
-        """Extend Param by adding info regarding the section referred by the settings."""
-        self.referred_section_definition = param_definition.get("referred_section")
-        self.referred_section_key = self.referred_section_definition.get("key")
-        self.referred_section_type = self.referred_section_definition.get("type")
-        param_definition.get("validators", []).append(settings_validator)
-        super(SettingsParam, self).__init__(
-            section_key, section_label, param_key, param_definition, pcluster_config, owner_section
-        )
+    __slots__ = ()
+
+    # Default referred sections are created together with the param
+    lazy_default = False
+
+    @property
+    def referred_section_definition(self):
+        """Get the definition of the section referred by the settings."""
+        return self.definition.get("referred_section")
+
+    @property
+    def referred_section_key(self):
+        """Get the key of the section referred by the settings."""
+        return self.referred_section_definition.get("key")
+
+    @property
+    def referred_section_type(self):
+        """Get the type of the section referred by the settings."""
+        return self.referred_section_definition.get("type")
+
+    @classmethod
+    def get_validators(cls, param_definition):
+        """Add the settings validator to the validation functions of the definition, if there."""
+        validators = param_definition.get("validators")
+        return validators + [settings_validator] if validators is not None else []
 
     def get_default_value(self):
         """
@@ -323,7 +481,7 @@ class SettingsParam(Param):
 
         return self
 
-    def validate(self):
+    def validate(self, validators=None):
         """
         Validate the Settings Parameter.
 
@@ -343,7 +501,11 @@ class SettingsParam(Param):
                 )
             )
 
-        super(SettingsParam, self).validate()
+        super(SettingsParam, self).validate(validators)
+
+    def get_normalized_value(self, resolve=False):
+        """Get the settings labels sorted and without extra spaces."""
+        return ",".join(sorted([label.strip() for label in self.value.split(",")])) if self.value else None
 
     def _value_eq(self, other):
         """Compare settings labels ignoring positions and extra spaces."""
@@ -399,6 +561,10 @@ class SettingsParam(Param):
 
         self.value = ",".join(sorted(sections_labels)) if sections_labels else None
 
+    def depends_on_sections(self, section_keys):
+        """Depend on the referred sections, whose labels are the value of the Settings param."""
+        return self.referred_section_key in section_keys
+
     def to_file(self, config_parser, write_defaults=False):
         """Convert the param value into a section in the config_parser and initialize it."""
         section = self.pcluster_config.get_section(self.referred_section_key, self.value)
@@ -427,24 +593,60 @@ class SettingsParam(Param):
 
 # ---------------------- Section ---------------------- #
 class Section(ABC):
-    """Base class to manage configuration sections (e.g vpc, scaling, aws, etc)."""
+    """
+    Base class to manage configuration sections (e.g vpc, scaling, aws, etc).
+
+    Params with a default value not specified in the configuration are created only when accessed.
+    """
+
+    __slots__ = ("definition", "_label", "pcluster_config", "parent_section", "_params")
 
     def __init__(self, section_definition, pcluster_config, section_label=None, parent_section=None):
         self.definition = section_definition
-        self.key = section_definition.get("key")
-        self.autocreate = section_definition.get("autocreate", False)
         self._label = section_label or self.definition.get("default_label", "")
-        # All sections have only 1 resource by default, which means they refer to a single Cfn resource or set
-        # of resources
-        self.max_resources = int(section_definition.get("max_resources", "1"))
         self.pcluster_config = pcluster_config
 
         self.parent_section = parent_section
 
         # initialize section parameters with default values
-        self.params = OrderedDict({})
+        self._params = {}
         self._from_definition()
 
+    @property
+    def key(self):
+        """Get the section key."""
+        return self.definition.get("key")
+
+    @property
+    def autocreate(self):
+        """Tell if the section is created by default."""
+        return self.definition.get("autocreate", False)
+
+    @property
+    def max_resources(self):
+        """
+        Get the max number of sections with the same key.
+
+        All sections have only 1 resource by default, which means they refer to a single Cfn resource or set
+        of resources.
+        """
+        return int(self.definition.get("max_resources", "1"))
+
+    @property
+    def params(self):
+        """
+        Get all the Param objects of the section, in the order of the section definition.
+
+        Default params not accessed yet are created, get_param must be preferred to access a single param.
+        """
+        params = OrderedDict(
+            (param_key, self.get_param(param_key)) for param_key in self.definition.get("params").keys()
+        )
+        for param_key, param in self._params.items():
+            # params added without a definition
+            params.setdefault(param_key, param)
+        return params
+
     @property
     def label(self):
         """Get the section label."""
@@ -454,7 +656,7 @@ class Section(ABC):
     def label(self, label):
         """Set the section label. Marks the PclusterConfig parent for refreshing if called."""
         self._label = label
-        self.pcluster_config._config_updated()
+        self.pcluster_config._config_updated(updated_section=self)
 
     def from_file(self, config_parser, fail_on_absence=False):
         """Initialize section configuration parameters by parsing config file."""
@@ -473,6 +675,9 @@ class Section(ABC):
         if config_parser.has_section(section_name):
             for param_key, param_definition in params_definitions.items():
                 param_type = param_definition.get("type", self.get_default_param_type())
+                if param_type.lazy_default and not config_parser.has_option(section_name, param_key):
+                    # the default param is created when accessed
+                    continue
 
                 param = param_type(
                     self.key,
@@ -500,22 +705,56 @@ class Section(ABC):
         return self
 
     def _from_definition(self):
-        """Initialize parameters with default values."""
+        """Initialize the parameters which cannot be created lazily with default values."""
         for param_key, param_definition in self.definition.get("params").items():
             param_type = param_definition.get("type", self.get_default_param_type())
-            param = param_type(
-                self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
-            )
-            self.add_param(param)
+            if not param_type.lazy_default:
+                param = param_type(
+                    self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+                )
+                self.add_param(param)
+
+    def _get_created_params(self):
+        """Return the Param objects already created, in the order of the section definition."""
+        created_params = [
+            self._params[param_key] for param_key in self.definition.get("params").keys() if param_key in self._params
+        ]
+        created_params.extend(
+            param for param_key, param in self._params.items() if param_key not in self.definition.get("params")
+        )
+        return created_params
+
+    def get_public_param_keys(self):
+        """Get the keys of the params that can be specified in the config file, in the order of the definition."""
+        return [
+            param_key
+            for param_key, param_definition in self.definition.get("params").items()
+            if param_definition.get("visibility", Visibility.PUBLIC) == Visibility.PUBLIC
+        ]
+
+    def get_fingerprint(self):
+        """
+        Get a fingerprint of the public params, independent of the order of the params and of the settings labels.
+
+        LazyDefault values are not computed, sections with equal fingerprints have the same configuration.
+        """
+        normalized_values = sorted(
+            [
+                (param_key, self.get_param(param_key).get_normalized_value())
+                for param_key in self.get_public_param_keys()
+            ]
+        )
+        return hashlib.sha256(json.dumps(normalized_values).encode("utf-8")).hexdigest()
 
     def validate(self):
-        """Call the validator function of the section and of all the parameters."""
-        if self.params:
+        """Call the validator function of the section and of the parameters, following the section validation plan."""
+        if self.definition.get("params"):
+            validation_plan = get_validation_plan(self.definition)
             section_name = get_file_section_name(self.key, self.label)
             LOGGER.debug("Validating section '[%s]'...", section_name)
 
             # validate section
-            for validation_func in self.definition.get("validators", []):
+            for validation_func in validation_plan.section_validators:
                 errors, warnings = validation_func(self.key, self.label, self.pcluster_config)
                 if errors:
                     self.pcluster_config.error(
@@ -530,15 +769,10 @@ class Section(ABC):
 
             # validate items
             LOGGER.debug("Validating parameters of section '[%s]'...", section_name)
-            for param_key, param_definition in self.definition.get("params").items():
-                param_type = param_definition.get("type", self.get_default_param_type())
-
-                param = self.get_param(param_key)
-                if param:
-                    param.validate()
-                else:
-                    # define a default param and validate it
-                    param_type(self.key, self.label, param_key, param_definition, self.pcluster_config).validate()
+            for param_key, validators in validation_plan.param_validators.items():
+                if param_key in self._params or param_key not in validation_plan.valid_default_keys:
+                    # default params not created yet are created and kept in the section
+                    self.get_param(param_key).validate(validators)
             LOGGER.debug("Parameters validation of section '[%s]' completed correctly.", section_name)
 
     def to_file(self, config_parser, write_defaults=False):
@@ -547,7 +781,7 @@ class Section(ABC):
 
         for param_key, param_definition in self.definition.get("params").items():
             if param_definition.get("visibility", Visibility.PUBLIC) == Visibility.PUBLIC:
-                param = self.get_param(param_key)
+                param = self._params.get(param_key)
                 if not param:
                     # generate a default param
                     param_type = param_definition.get("type", self.get_default_param_type())
@@ -572,16 +806,28 @@ class Section(ABC):
         }
         :param param: the Param object to add to the Section
         """
-        self.params[param.key] = param
+        self._params[param.key] = param
+        self.pcluster_config._storage_data_updated()
 
     def get_param(self, param_key):
         """
         Return the Param object corresponding to the given key.
 
+        A default Param object is created if the param has not been created yet.
+
         :param param_key: the key to identify the Param object in the internal dictionary
         :return: a Param object
         """
-        return self.params[param_key]
+        param = self._params.get(param_key)
+        if param is None:
+            # raise KeyError for keys not in the section definition
+            param_definition = self.definition.get("params")[param_key]
+            param_type = param_definition.get("type", self.get_default_param_type())
+            param = param_type(
+                self.key, self.label, param_key, param_definition, self.pcluster_config, owner_section=self
+            )
+            self.add_param(param)
+        return param
 
     def set_param(self, param_key, param_obj):
         """
@@ -590,7 +836,8 @@ class Section(ABC):
         :param param_key: the key to identify the Param object in the internal dictionary
         :param param_obj: a Param object
         """
-        self.params[param_key] = param_obj
+        self._params[param_key] = param_obj
+        self.pcluster_config._storage_data_updated()
 
     def get_param_value(self, param_key):
         """
@@ -601,10 +848,25 @@ class Section(ABC):
         """
         return self.get_param(param_key).value if self.get_param(param_key) else None
 
-    def refresh(self):
-        """Refresh all parameters."""
-        for _, param in self.params.items():
-            param.refresh()
+    def refresh(self, updated_section_keys=None):
+        """
+        Refresh all parameters.
+
+        :param updated_section_keys: keys of the sections added, removed or renamed since the last refresh,
+        if specified only the parameters depending on them are refreshed
+        """
+        # default params not created yet don't need to be refreshed
+        for param in self._get_created_params():
+            if updated_section_keys is None or param.depends_on_sections(updated_section_keys):
+                param.refresh()
+
+    def depends_on_sections(self, section_keys):
+        """
+        Tell if the refresh of the section, apart from its parameters, depends on the sections with the given keys.
+
+        :param section_keys: keys of the sections added, removed or renamed
+        """
+        return False
 
     @abstractmethod
     def from_storage(self, storage_params):
@@ -11,11 +11,13 @@
 from future.moves.collections import OrderedDict
 
 import errno
+import hashlib
 import json
 import logging
 import os
 import stat
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 import configparser
@@ -37,6 +39,9 @@ from pcluster.utils import (
 
 LOGGER = logging.getLogger(__name__)
 
+# Local copies of the cluster configs stored in S3, by S3 object, with the S3 version of the copy
+CLUSTER_CONFIG_CACHE_DIR = os.path.join("~", ".parallelcluster", "cluster-config-cache")
+
 
 def default_config_file_path():
     """Return the default path for the ParallelCluster configuration file."""
@@ -84,8 +89,15 @@ class PclusterConfig(object):
         self.fail_on_error = fail_on_error
         self.cfn_stack = None
         self.__sections = OrderedDict({})
+        # storage data of the configuration, computed again only if something changed
+        self.__storage_data = None
+        # sections added or renamed and keys of the sections added, removed or renamed since the last refresh
+        self.__updated_sections = []
+        self.__updated_section_keys = set()
         self.__enforce_version = enforce_version
         self.__skip_load_json_config = skip_load_json_config
+        # future of the DynamoDB item with the cluster config version, retrieved together with the stack
+        self.__config_version_item = None
 
         # always parse the configuration file if there, to get AWS section
         self._init_config_parser(config_file, fail_on_file_absence)
@@ -219,7 +231,7 @@ class PclusterConfig(object):
 
         section_label = section.label if section.label else section.definition.get("default_label", "default")
         self.__sections[section.key][section_label] = section
-        self._config_updated()
+        self._config_updated(updated_section=section)
 
     def remove_section(self, section_key, section_label=None):
         """
@@ -240,7 +252,7 @@ class PclusterConfig(object):
                     raise Exception("More than one section with key {0}".format(section_key))
                 else:
                     self.__sections.pop(section_key)
-        self._config_updated()
+        self._config_updated(updated_section_key=section_key)
 
     def __init_aws_credentials(self):
         """Set credentials in the environment to be available for all the boto3 calls."""
@@ -362,9 +374,22 @@ class PclusterConfig(object):
         The internal representation of the cluster is converted into a data structure containing the information to be
         stored into all the storage mechanisms used by the CLI (currently CloudFormation parameters and Json).
 
+        The storage data is computed again only if parameters or sections changed since the last call. The returned
+        json_params are shared among the calls and must not be modified.
+
         :return: a dict containing the cfn parameters and the json dict associated with the cluster configuration
         """
-        return self.get_section("cluster").to_storage()
+        if self.__storage_data is None:
+            storage_data = self.get_section("cluster").to_storage()
+            # the conversion can update params, the storage data is kept only when completed
+            self.__storage_data = storage_data
+        return StorageData(
+            dict(self.__storage_data.cfn_params), self.__storage_data.json_params, self.__storage_data.cfn_tags
+        )
+
+    def _storage_data_updated(self):
+        """Notify the PclusterConfig instance that a parameter or a section changed, so the storage data is outdated."""
+        self.__storage_data = None
 
     def __init_sections_from_file(self, cluster_label=None, config_parser=None, fail_on_absence=False):
         """
@@ -420,16 +445,31 @@ class PclusterConfig(object):
         """Enable or disable the configuration autorefresh."""
         self.__autorefresh = refresh_enabled
 
-    def _config_updated(self):
+    def _config_updated(self, updated_section=None, updated_section_key=None):
         """
         Notify the PclusterConfig instance that the configuration structure has changed.
 
         The purpose of this method is to allow internal configuration objects such as Param, Section etc to notify the
         parent PclusterConfig when something structural has changed. The configuration will be reloaded based on whether
         or not the autofresh function is enabled.
+
+        When the updated section is specified, only the sections and parameters depending on it are refreshed.
+
+        :param updated_section: the section added or renamed
+        :param updated_section_key: the key of the section removed
         """
+        self._storage_data_updated()
+        if updated_section is not None:
+            self.__updated_sections.append(updated_section)
+            self.__updated_section_keys.add(updated_section.key)
+        elif updated_section_key:
+            self.__updated_section_keys.add(updated_section_key)
+
         if self.__autorefresh:
-            self.refresh()
+            if updated_section is not None or updated_section_key:
+                self.__refresh_updated_sections()
+            else:
+                self.refresh()
 
     def refresh(self):
         """
@@ -438,23 +478,64 @@ class PclusterConfig(object):
         This method must be called if structural configuration changes have been applied, like updating a section
         label, adding or removing a section etc.
         """
-        # Rebuild the new sections structure
-        new_sections = OrderedDict({})
-        for key, sections in self.__sections.items():
-            new_sections_map = OrderedDict({})
-            for _, section in sections.items():
-                new_sections_map[section.label] = section
-            new_sections[key] = new_sections_map
-        self.__sections = new_sections
+        self._storage_data_updated()
+        self.__refresh(self.__sections.keys())
+
+    def __refresh_updated_sections(self):
+        """
+        Refresh the sections added or renamed and the sections and parameters depending on them.
+
+        The parameters whose refresh only depends on the values of other parameters (e.g. default values retrieved from
+        AWS) are not refreshed, since their dependencies are not affected by structural changes.
+        """
+        self.__refresh(self.__updated_section_keys, self.__updated_sections, self.__updated_section_keys)
+
+    def __refresh(self, section_keys, updated_sections=None, updated_section_keys=None):
+        """
+        Reload the sections structure and refresh the configuration sections and parameters.
+
+        :param section_keys: keys of the sections whose structure must be reloaded
+        :param updated_sections: sections to refresh entirely, all sections if updated_section_keys is None
+        :param updated_section_keys: keys of the updated sections, used to refresh the sections depending on them
+        """
+        # Rebuild the sections structure, renamed sections are still stored with the previous label
+        for key in list(section_keys):
+            if key in self.__sections:
+                self.__sections[key] = OrderedDict(
+                    (section.label, section) for section in self.__sections[key].values()
+                )
+        updated_section_ids = set(id(section) for section in updated_sections or [])
+        updated_section_keys = set(updated_section_keys) if updated_section_keys is not None else None
+        self.__updated_sections = []
+        self.__updated_section_keys = set()
 
-        # Refresh all sections
         for _, sections in self.__sections.items():
             for _, section in sections.items():
-                section.refresh()
+                if updated_section_keys is None or id(section) in updated_section_ids:
+                    section.refresh()
+                else:
+                    section.refresh(updated_section_keys)
 
     def __init_sections_from_cfn(self, cluster_name):
         try:
-            self.cfn_stack = get_stack(get_stack_name(cluster_name))
+            executor = ThreadPoolExecutor(max_workers=1)
+            try:
+                if not self.__skip_load_json_config:
+                    # the version of the cluster config is retrieved from DynamoDB while retrieving the stack,
+                    # the resource is created in the current thread since the boto3 default session is not thread safe
+                    table = boto3.resource("dynamodb").Table(get_stack_name(cluster_name))
+                    self.__config_version_item = executor.submit(
+                        table.get_item, ConsistentRead=True, Key={"Id": "CLUSTER_CONFIG"}
+                    )
+                self.cfn_stack = get_stack(get_stack_name(cluster_name))
+            finally:
+                # the config version is waited for only if used
+                executor.shutdown(wait=False)
+            if self.__config_version_item and not is_hit_enabled_cluster(self.cfn_stack):
+                # the json config, and then its version, is loaded only for HIT clusters
+                self.__config_version_item.cancel()
+                self.__config_version_item.add_done_callback(_log_unused_config_version_error)
+                self.__config_version_item = None
             if self.__enforce_version and get_stack_version(self.cfn_stack) != get_installed_version():
                 self.error(
                     "The cluster {0} was created with a different version of ParallelCluster: {1}. "
@@ -518,22 +599,39 @@ class PclusterConfig(object):
         return json_config
 
     def __retrieve_cluster_config(self, bucket, artifact_directory):
-        table = boto3.resource("dynamodb").Table(get_stack_name(self.cluster_name))
+        """
+        Retrieve the cluster config from S3, in the version stored in DynamoDB.
+
+        The config is downloaded only if the local cache does not contain the same version.
+        """
         config_version = None  # Use latest if not found
         try:
-            config_version_item = table.get_item(ConsistentRead=True, Key={"Id": "CLUSTER_CONFIG"})
+            if self.__config_version_item:
+                config_version_item = self.__config_version_item.result()
+            else:
+                table = boto3.resource("dynamodb").Table(get_stack_name(self.cluster_name))
+                config_version_item = table.get_item(ConsistentRead=True, Key={"Id": "CLUSTER_CONFIG"})
             if config_version_item or "Item" in config_version_item:
                 config_version = config_version_item["Item"].get("Version")
         except Exception as e:
             self.error("Failed when retrieving cluster config version from DynamoDB with error {0}".format(e))
 
+        config_key = "{prefix}/configs/cluster-config.json".format(prefix=artifact_directory)
+        cache_file = _get_cluster_config_cache_file(bucket, config_key)
+        if config_version:
+            json_config = _read_cached_cluster_config(cache_file, config_version)
+            if json_config is not None:
+                LOGGER.debug("Using cached cluster config with version %s", config_version)
+                return json_config
+
         try:
             config_version_args = {"VersionId": config_version} if config_version else {}
-            s3_object = boto3.resource("s3").Object(
-                bucket, "{prefix}/configs/cluster-config.json".format(prefix=artifact_directory)
-            )
-            json_str = s3_object.get(**config_version_args)["Body"].read().decode("utf-8")
-            return json.loads(json_str, object_pairs_hook=OrderedDict)
+            s3_object = boto3.resource("s3").Object(bucket, config_key)
+            s3_response = s3_object.get(**config_version_args)
+            json_str = s3_response["Body"].read().decode("utf-8")
+            json_config = json.loads(json_str, object_pairs_hook=OrderedDict)
+            _write_cached_cluster_config(cache_file, s3_response.get("VersionId"), json_config)
+            return json_config
         except Exception as e:
             self.error(
                 "Unable to load configuration from bucket '{bucket}/{prefix}'.\n{error}".format(
@@ -586,4 +684,56 @@ class PclusterConfig(object):
         # which is needed to keep the right linking between sections and CloudFormation resources
         config_metadata_param = self.get_section("cluster").get_param("cluster_config_metadata")
         self.__sections = pcluster_config.__sections
+        self._storage_data_updated()
         self.get_section("cluster").set_param("cluster_config_metadata", config_metadata_param)
+
+
+def _log_unused_config_version_error(config_version_item):
+    """Log the error of the retrieval of a cluster config version not used."""
+    if not config_version_item.cancelled() and config_version_item.exception():
+        LOGGER.debug(
+            "Failed when retrieving unused cluster config version from DynamoDB with error %s",
+            config_version_item.exception(),
+        )
+
+
+def _get_cluster_config_cache_file(bucket, config_key):
+    """Return the path of the local copy of the cluster config stored in the given S3 object."""
+    cache_file_name = hashlib.sha256("{0}/{1}".format(bucket, config_key).encode("utf-8")).hexdigest()
+    return os.path.join(os.path.expanduser(CLUSTER_CONFIG_CACHE_DIR), cache_file_name + ".json")
+
+
+def _read_cached_cluster_config(cache_file, config_version):
+    """
+    Read the local copy of the cluster config.
+
+    :param cache_file: path of the local copy
+    :param config_version: S3 version of the cluster config
+    :return: the cluster config, None if the local copy is missing, corrupted or of a different version
+    """
+    try:
+        with open(cache_file) as cache_file_stream:
+            cached_config = json.load(cache_file_stream, object_pairs_hook=OrderedDict)
+        if cached_config.get("VersionId") == config_version:
+            return cached_config.get("Config")
+    except (IOError, OSError, ValueError) as e:  # noqa: B014
+        LOGGER.debug("Unable to read cached cluster config %s: %s", cache_file, e)
+    return None
+
+
+def _write_cached_cluster_config(cache_file, config_version, json_config):
+    """Store a local copy of the cluster config, readable and writable only by the current user."""
+    if not config_version:
+        # versioning not enabled in the bucket, the copy could not be verified
+        return
+    try:
+        try:
+            os.makedirs(os.path.dirname(cache_file), stat.S_IRWXU)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        cache_file_descriptor = os.open(cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, stat.S_IRUSR | stat.S_IWUSR)
+        with os.fdopen(cache_file_descriptor, "w") as cache_file_stream:
+            json.dump({"VersionId": config_version, "Config": json_config}, cache_file_stream)
+    except (IOError, OSError) as e:  # noqa: B014
+        LOGGER.debug("Unable to write cached cluster config %s: %s", cache_file, e)
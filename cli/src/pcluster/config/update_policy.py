@@ -97,6 +97,66 @@ class UpdatePolicy(object):
         return self.fail_reason == other.fail_reason and self.level == other.level
 
 
+class ClusterRuntimeState(object):
+    """
+    Snapshot of the runtime state of a cluster, read by the condition checkers of the update policies.
+
+    Each information is retrieved when read for the first time and then kept, so checking a patch costs a constant
+    number of AWS calls, regardless of the number of changes.
+    """
+
+    def __init__(self, stack_name, stack=None):
+        """
+        Create the snapshot.
+
+        :param stack_name: The name of the cluster stack
+        :param stack: The stack data, if already retrieved
+        """
+        self.stack_name = stack_name
+        self.__stack = stack
+        self.__has_running_capacity = None
+        self.__batch_ce_capacity = None
+        self.__head_node_state = None
+
+    @property
+    def stack(self):
+        """Get the stack data."""
+        if self.__stack is None:
+            self.__stack = utils.get_stack(self.stack_name)
+        return self.__stack
+
+    @property
+    def stack_parameters(self):
+        """Get the parameters of the stack."""
+        return self.stack.get("Parameters", [])
+
+    @property
+    def has_running_capacity(self):
+        """Tell if the compute fleet is running."""
+        if self.__has_running_capacity is None:
+            self.__has_running_capacity = utils.cluster_has_running_capacity(self.stack_name, self.stack)
+        return self.__has_running_capacity
+
+    @property
+    def batch_ce_capacity(self):
+        """Get the desired vCPUs of the AWS Batch Compute Environment."""
+        if self.__batch_ce_capacity is None:
+            self.__batch_ce_capacity = utils.get_batch_ce_capacity(self.stack_name, self.stack)
+        return self.__batch_ce_capacity
+
+    @property
+    def head_node_state(self):
+        """Get the state of the head node."""
+        if self.__head_node_state is None:
+            self.__head_node_state = utils.get_head_node_state(self.stack_name)
+        return self.__head_node_state
+
+    @property
+    def is_bucket_pcluster_generated(self):
+        """Tell if the bucket of the cluster resources has been created by ParallelCluster."""
+        return utils.get_cfn_param(self.stack_parameters, "RemoveBucketOnDeletion") == "True"
+
+
 # Common fail_reason messages
 UpdatePolicy.FAIL_REASONS = {
     "ebs_volume_resize": "Updating the file system after a resize operation requires commands specific to your "
@@ -122,7 +182,7 @@ UpdatePolicy.ACTIONS_NEEDED = {
 
 
 def _check_min_count(change, patch):
-    is_fleet_stopped = not utils.cluster_has_running_capacity(patch.stack_name)
+    is_fleet_stopped = not patch.runtime_state.has_running_capacity
     if is_fleet_stopped:
         return True
 
@@ -132,11 +192,6 @@ def _check_min_count(change, patch):
     return new_min >= old_min and new_max - new_min >= old_max - old_min
 
 
-def _is_bucket_pcluster_generated(stack_name):
-    params = utils.get_stack(stack_name).get("Parameters")
-    return utils.get_cfn_param(params, "RemoveBucketOnDeletion") == "True"
-
-
 def _check_generated_bucket(change, patch):
 
     # If bucket is generated (no cluster_resource_bucket specified when creating) and no change in config
@@ -146,7 +201,7 @@ def _check_generated_bucket(change, patch):
     # Print no diff and proceed with updating other parameters
     # Else display diff
     # Inform user cluster_resource_bucket/ResourcesS3Bucket will not be updated even if force update
-    return _is_bucket_pcluster_generated(patch.stack_name) and not change.new_value
+    return patch.runtime_state.is_bucket_pcluster_generated and not change.new_value
 
 
 # Base policies
@@ -167,10 +222,10 @@ UpdatePolicy.SUPPORTED = UpdatePolicy(level=0, fail_reason="-", condition_checke
 UpdatePolicy.AWSBATCH_CE_MAX_RESIZE = UpdatePolicy(
     level=1,
     fail_reason=lambda change, patch: "Max vCPUs can not be lower than the current Desired vCPUs ({0})".format(
-        utils.get_batch_ce_capacity(patch.stack_name)
+        patch.runtime_state.batch_ce_capacity
     ),
     action_needed=UpdatePolicy.ACTIONS_NEEDED["pcluster_stop"],
-    condition_checker=lambda change, patch: utils.get_batch_ce_capacity(patch.stack_name)
+    condition_checker=lambda change, patch: patch.runtime_state.batch_ce_capacity
     <= patch.target_config.get_section("cluster").get_param_value("max_vcpus"),
 )
 
@@ -178,7 +233,7 @@ UpdatePolicy.MAX_QUEUE_SIZE = UpdatePolicy(
     level=1,
     fail_reason="Shrinking the queue size requires the compute fleet to be stopped first",
     action_needed=UpdatePolicy.ACTIONS_NEEDED["pcluster_stop"],
-    condition_checker=lambda change, patch: not utils.cluster_has_running_capacity(patch.stack_name)
+    condition_checker=lambda change, patch: not patch.runtime_state.has_running_capacity
     or change.new_value >= change.old_value,
 )
 
@@ -187,7 +242,7 @@ UpdatePolicy.MAX_COUNT = UpdatePolicy(
     level=1,
     fail_reason=lambda change, patch: "Shrinking a queue requires the compute fleet to be stopped first",
     action_needed=UpdatePolicy.ACTIONS_NEEDED["pcluster_stop"],
-    condition_checker=lambda change, patch: not utils.cluster_has_running_capacity(patch.stack_name)
+    condition_checker=lambda change, patch: not patch.runtime_state.has_running_capacity
     or change.new_value >= change.old_value,
 )
 
@@ -215,7 +270,7 @@ UpdatePolicy.COMPUTE_FLEET_STOP = UpdatePolicy(
     level=10,
     fail_reason="All compute nodes must be stopped",
     action_needed=UpdatePolicy.ACTIONS_NEEDED["pcluster_stop"],
-    condition_checker=lambda change, patch: not utils.cluster_has_running_capacity(patch.stack_name),
+    condition_checker=lambda change, patch: not patch.runtime_state.has_running_capacity,
 )
 
 # Update supported only with head node down
@@ -223,7 +278,7 @@ UpdatePolicy.HEAD_NODE_STOP = UpdatePolicy(
     level=20,
     fail_reason="To perform this update action, the head node must be in a stopped state",
     action_needed=UpdatePolicy.ACTIONS_NEEDED["pcluster_stop"],
-    condition_checker=lambda change, patch: utils.get_head_node_state(patch.stack_name) == "stopped",
+    condition_checker=lambda change, patch: patch.runtime_state.head_node_state == "stopped",
 )
 
 # Expected Behavior:
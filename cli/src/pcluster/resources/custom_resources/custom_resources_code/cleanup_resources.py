@@ -8,19 +8,75 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import logging
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import boto3
 from botocore.config import Config
+from botocore.exceptions import WaiterError
 from crhelper import CfnResource
 
-helper = CfnResource(json_logging=False, log_level="INFO", boto_level="ERROR", sleep_on_delete=0)
 logger = logging.getLogger(__name__)
-boto3_config = Config(retries={"max_attempts": 60})
+boto3_config = Config(retries={"max_attempts": 60}, max_pool_connections=20)
 
+# maximum number of items deleted with a single request
+MAX_BATCH_SIZE = 1000
+# maximum number of deletion requests executed in parallel
+MAX_CONCURRENT_REQUESTS = 10
+# Route53 processes the changes of a hosted zone one at a time
+MAX_CONCURRENT_DNS_REQUESTS = 3
+# seconds before the Lambda timeout at which the cleanup is continued in a new invocation
+REINVOCATION_MARGIN = 60
+# CloudFormation waits one hour for a custom resource response, that is at most 4 invocations of 15 minutes
+MAX_INVOCATIONS = 4
+# seconds between the retries of the failed deletions
+RETRY_DELAY = 5
+# seconds between the checks of the instances state
+WAITER_DELAY = 10
+# seconds to wait after the instances termination, to give PlacementGroups the time to update
+PLACEMENT_GROUPS_UPDATE_DELAY = 30
+INSTANCE_ACTIVE_STATES = ["pending", "running", "stopping", "stopped"]
+CHECKPOINT_KEY = "CleanupCheckpoint"
+CONTINUED_KEY = "CleanupContinued"
 
-def _delete_dns_records(event):
+
+class CleanupResource(CfnResource):
+    """CfnResource not sending the response when the cleanup is continued by a new invocation of the function."""
+
+    def _cfn_response(self, event):
+        if not event.get(CONTINUED_KEY):
+            super(CleanupResource, self)._cfn_response(event)
+
+
+helper = CleanupResource(json_logging=False, log_level="INFO", boto_level="ERROR", sleep_on_delete=0)
+
+
+class CleanupTimeoutError(Exception):
+    """Raised when the remaining Lambda time is not enough to continue the cleanup."""
+
+    def __init__(self, checkpoint):
+        super(CleanupTimeoutError, self).__init__("Cleanup not completed before the Lambda timeout")
+        self.checkpoint = checkpoint
+
+
+def _check_remaining_time(context, checkpoint):
+    """Raise CleanupTimeoutError with the given checkpoint if the Lambda is close to the timeout."""
+    if _get_remaining_time(context) < REINVOCATION_MARGIN:
+        raise CleanupTimeoutError(checkpoint)
+
+
+def _get_remaining_time(context):
+    return context.get_remaining_time_in_millis() / 1000.0
+
+
+def _batches(items, batch_size=MAX_BATCH_SIZE):
+    for i in range(0, len(items), batch_size):
+        yield items[i : i + batch_size]  # noqa: E203
+
+
+def _delete_dns_records(event, context, checkpoint):
     """Delete all DNS entries from the private Route53 hosted zone created within the cluster."""
     hosted_zone_id = event["ResourceProperties"]["ClusterHostedZone"]
     if not hosted_zone_id:
@@ -31,45 +87,55 @@ def _delete_dns_records(event):
         logger.info("Deleting DNS records from %s", hosted_zone_id)
         route53 = boto3.client("route53", config=boto3_config)
 
-        completed_successfully = False
-        while not completed_successfully:
-            completed_successfully = True
-            for changes in _list_resource_record_sets_iterator(hosted_zone_id):
-                if changes:
-                    try:
-                        route53.change_resource_record_sets(
-                            HostedZoneId=hosted_zone_id, ChangeBatch={"Changes": changes}
-                        )
-                    except Exception as e:
-                        logger.error("Failed when deleting DNS records from %s with error %s", hosted_zone_id, e)
-                        completed_successfully = False
-                        continue
-                else:
-                    logger.info("No DNS records to delete from %s.", hosted_zone_id)
-
-            logger.info("Sleeping for 5 seconds before retrying DNS records deletion.")
-            time.sleep(5)
+        while True:
+            changes = _list_record_set_deletions(hosted_zone_id)
+            if not changes:
+                break
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DNS_REQUESTS) as executor:
+                deleted = sum(
+                    executor.map(
+                        lambda batch: _change_resource_record_sets(route53, hosted_zone_id, batch), _batches(changes)
+                    )
+                )
+            checkpoint["deleted_dns_records"] = checkpoint.get("deleted_dns_records", 0) + deleted
+            if deleted == len(changes):
+                break
+            _check_remaining_time(context, checkpoint)
+            logger.info("Retrying DNS records deletion in %s seconds", RETRY_DELAY)
+            time.sleep(RETRY_DELAY)
 
         logger.info("DNS records deletion from %s: COMPLETED", hosted_zone_id)
+    except CleanupTimeoutError:
+        raise
     except Exception as e:
         logger.error("Failed when listing DNS records from %s with error %s", hosted_zone_id, e)
         raise
 
 
-def _list_resource_record_sets_iterator(hosted_zone_id):
+def _list_record_set_deletions(hosted_zone_id):
     route53 = boto3.client("route53", config=boto3_config)
-    pagination_config = {"PageSize": 100}
+    pagination_config = {"PageSize": 300}
 
+    changes = []
     paginator = route53.get_paginator("list_resource_record_sets")
     for page in paginator.paginate(HostedZoneId=hosted_zone_id, PaginationConfig=pagination_config):
-        changes = []
         for record_set in page.get("ResourceRecordSets", []):
             if record_set.get("Type") == "A":
                 changes.append({"Action": "DELETE", "ResourceRecordSet": record_set})
-        yield changes
+    logger.info("Found %s DNS records to delete from %s", len(changes), hosted_zone_id)
+    return changes
+
+
+def _change_resource_record_sets(route53, hosted_zone_id, changes):
+    try:
+        route53.change_resource_record_sets(HostedZoneId=hosted_zone_id, ChangeBatch={"Changes": changes})
+        return len(changes)
+    except Exception as e:
+        logger.error("Failed when deleting DNS records from %s with error %s", hosted_zone_id, e)
+        return 0
 
 
-def _delete_s3_artifacts(event):
+def _delete_s3_artifacts(event, context, checkpoint):
     """
     Delete artifacts under the directory that is passed in.
 
@@ -81,23 +147,23 @@ def _delete_s3_artifacts(event):
     bucket_name = event["ResourceProperties"]["ResourcesS3Bucket"]
     artifact_directory = event["ResourceProperties"]["ArtifactS3RootDirectory"]
     remove_bucket = event["ResourceProperties"]["RemoveBucketOnDeletion"]
+    s3 = boto3.client("s3", config=boto3_config)
     try:
         if bucket_name != "NONE":
-            bucket = boto3.resource("s3", config=boto3_config).Bucket(bucket_name)
             if remove_bucket == "True":
                 logger.info("S3 bucket %s deletion: STARTED", bucket_name)
-                bucket.objects.all().delete()
-                bucket.object_versions.delete()
-                bucket.delete()
+                _delete_object_versions(s3, bucket_name, None, context, checkpoint)
+                s3.delete_bucket(Bucket=bucket_name)
                 logger.info("S3 bucket %s deletion: COMPLETED", bucket_name)
             else:
                 logger.info("Cluster S3 artifact under %s/%s deletion: STARTED", bucket_name, artifact_directory)
-                bucket.objects.filter(Prefix="%s/" % artifact_directory).delete()
-                bucket.object_versions.filter(Prefix="%s/" % artifact_directory).delete()
+                _delete_object_versions(s3, bucket_name, "%s/" % artifact_directory, context, checkpoint)
                 logger.info("Cluster S3 artifact under %s/%s deletion: COMPLETED", bucket_name, artifact_directory)
-    except boto3.client("s3").exceptions.NoSuchBucket as ex:
+    except s3.exceptions.NoSuchBucket as ex:
         logger.warning("S3 bucket %s not found. Bucket was probably manually deleted.", bucket_name)
         logger.warning(ex, exc_info=True)
+    except CleanupTimeoutError:
+        raise
     except Exception as e:
         if remove_bucket == "True":
             logger.error("Failed when deleting bucket %s with error %s", bucket_name, e)
@@ -108,58 +174,158 @@ def _delete_s3_artifacts(event):
         raise
 
 
-def _terminate_cluster_nodes(event):
+def _delete_object_versions(s3, bucket_name, prefix, context, checkpoint):
+    """
+    Delete all the versions and delete markers of the objects with the given prefix.
+
+    Listed pages of up to 1,000 versions are deleted in parallel while listing the next ones, with at most
+    MAX_CONCURRENT_REQUESTS pending deletions. In case of timeout the pending deletions not yet started are cancelled
+    and the listing is restarted by the next invocation, since deleted versions are no longer listed.
+    """
+    list_args = {"Bucket": bucket_name, "MaxKeys": MAX_BATCH_SIZE}
+    if prefix:
+        list_args["Prefix"] = prefix
+
+    futures = set()
+    errors = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        try:
+            while True:
+                _check_remaining_time(context, checkpoint)
+                page = s3.list_object_versions(**list_args)
+                objects = [
+                    {"Key": version["Key"], "VersionId": version["VersionId"]}
+                    for version in page.get("Versions", []) + page.get("DeleteMarkers", [])
+                ]
+                if objects:
+                    futures.add(executor.submit(_delete_objects, s3, bucket_name, objects))
+                if len(futures) >= MAX_CONCURRENT_REQUESTS:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    _collect_deleted_objects(done, checkpoint, errors)
+                if not page.get("IsTruncated"):
+                    break
+                list_args["KeyMarker"] = page["NextKeyMarker"]
+                list_args["VersionIdMarker"] = page["NextVersionIdMarker"]
+        except CleanupTimeoutError:
+            for future in futures:
+                future.cancel()
+            done, _ = wait(futures)
+            _collect_deleted_objects(done, checkpoint, errors)
+            raise
+
+        done, _ = wait(futures)
+        _collect_deleted_objects(done, checkpoint, errors)
+    logger.info("Deleted %s object versions from %s", checkpoint.get("deleted_objects", 0), bucket_name)
+    if errors:
+        raise Exception("Failed to delete %s object versions, first error: %s" % (len(errors), errors[0]))
+
+
+def _collect_deleted_objects(futures, checkpoint, errors):
+    """Add the number of versions deleted by the given completed futures to the checkpoint and collect the errors."""
+    for future in futures:
+        if not future.cancelled():
+            deleted, page_errors = future.result()
+            checkpoint["deleted_objects"] = checkpoint.get("deleted_objects", 0) + deleted
+            errors.extend(page_errors)
+
+
+def _delete_objects(s3, bucket_name, objects):
+    response = s3.delete_objects(Bucket=bucket_name, Delete={"Objects": objects, "Quiet": True})
+    errors = response.get("Errors", [])
+    return len(objects) - len(errors), errors
+
+
+def _terminate_cluster_nodes(event, context, checkpoint):
     try:
         logger.info("Compute fleet clean-up: STARTED")
         stack_name = event["ResourceProperties"]["StackName"]
         ec2 = boto3.client("ec2", config=boto3_config)
+        # instances terminated by a previous invocation, PlacementGroups had time to update while reinvoking
+        resumed_after_termination = checkpoint.get("phase") == "terminated"
+
+        while checkpoint.get("phase") != "terminated":
+            if checkpoint.get("phase") != "waiting":
+                _check_remaining_time(context, checkpoint)
+                if not _terminate_instances(ec2, stack_name, checkpoint):
+                    _check_remaining_time(context, checkpoint)
+                    logger.info("Retrying instances termination in %s seconds", RETRY_DELAY)
+                    time.sleep(RETRY_DELAY)
+                    continue
+                checkpoint["phase"] = "waiting"
+            else:
+                _wait_for_terminated_instances(ec2, stack_name, context, checkpoint)
 
-        completed_successfully = False
-        while not completed_successfully:
-            completed_successfully = True
-            for instance_ids in _describe_instance_ids_iterator(stack_name):
-                logger.info("Terminating instances %s", instance_ids)
-                if instance_ids:
-                    try:
-                        ec2.terminate_instances(InstanceIds=instance_ids)
-                    except Exception as e:
-                        logger.error("Failed when terminating instances with error %s", e)
-                        completed_successfully = False
-                        continue
-            logger.info("Sleeping for 10 seconds to allow all instances to initiate shut-down")
-            time.sleep(10)
-
-        while _has_shuttingdown_instances(stack_name):
-            logger.info("Waiting for all nodes to shut-down...")
-            time.sleep(10)
-
-        # Sleep for 30 more seconds to give PlacementGroups the time to update
-        time.sleep(30)
+        if not resumed_after_termination:
+            _check_remaining_time(context, checkpoint)
+            time.sleep(PLACEMENT_GROUPS_UPDATE_DELAY)
 
         logger.info("Compute fleet clean-up: COMPLETED")
+    except CleanupTimeoutError:
+        raise
     except Exception as e:
         logger.error("Failed when terminating instances with error %s", e)
         raise
 
 
-def _has_shuttingdown_instances(stack_name):
-    ec2 = boto3.client("ec2", config=boto3_config)
-    filters = [
-        {"Name": "tag:Application", "Values": [stack_name]},
-        {"Name": "instance-state-name", "Values": ["shutting-down"]},
-    ]
-
-    result = ec2.describe_instances(Filters=filters)
-    return len(result.get("Reservations", [])) > 0
-
+def _terminate_instances(ec2, stack_name, checkpoint):
+    """
+    Terminate all the active instances of the cluster, in parallel batches of up to 1,000 instances.
 
-def _describe_instance_ids_iterator(stack_name, instance_state=("pending", "running", "stopping", "stopped")):
+    :return: True if the termination of all the instances has been requested successfully
+    """
+    instance_ids = []
+    for page_instance_ids in _describe_instance_ids_iterator(stack_name):
+        instance_ids.extend(page_instance_ids)
+    if not instance_ids:
+        logger.info("No instances to terminate")
+        return True
+
+    logger.info("Terminating %s instances", len(instance_ids))
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        results = list(executor.map(lambda batch: _terminate_instances_batch(ec2, batch), _batches(instance_ids)))
+    terminated = sum(results)
+    checkpoint["terminated_instances"] = checkpoint.get("terminated_instances", 0) + terminated
+    return terminated == len(instance_ids)
+
+
+def _terminate_instances_batch(ec2, instance_ids):
+    try:
+        ec2.terminate_instances(InstanceIds=instance_ids)
+        return len(instance_ids)
+    except Exception as e:
+        logger.error("Failed when terminating instances with error %s", e)
+        return 0
+
+
+def _wait_for_terminated_instances(ec2, stack_name, context, checkpoint):
+    """Wait for all the instances of the cluster to be terminated, until the Lambda is close to the timeout."""
+    if not any(_describe_instance_ids_iterator(stack_name, INSTANCE_ACTIVE_STATES + ["shutting-down"])):
+        checkpoint["phase"] = "terminated"
+        return
+    max_attempts = int((_get_remaining_time(context) - REINVOCATION_MARGIN) / WAITER_DELAY)
+    if max_attempts < 1:
+        raise CleanupTimeoutError(checkpoint)
+    logger.info("Waiting for all nodes to shut-down...")
+    try:
+        ec2.get_waiter("instance_terminated").wait(
+            Filters=[{"Name": "tag:Application", "Values": [stack_name]}],
+            WaiterConfig={"Delay": WAITER_DELAY, "MaxAttempts": max_attempts},
+        )
+        checkpoint["phase"] = "terminated"
+    except WaiterError as e:
+        _check_remaining_time(context, checkpoint)
+        # instances launched after the termination request, terminate them as well
+        logger.info("Instances still active (%s), terminating them", e)
+        checkpoint["phase"] = None
+
+
+def _describe_instance_ids_iterator(stack_name, instance_state=INSTANCE_ACTIVE_STATES):
     ec2 = boto3.client("ec2", config=boto3_config)
     filters = [
         {"Name": "tag:Application", "Values": [stack_name]},
         {"Name": "instance-state-name", "Values": list(instance_state)},
     ]
-    pagination_config = {"PageSize": 100}
+    pagination_config = {"PageSize": MAX_BATCH_SIZE}
 
     paginator = ec2.get_paginator("describe_instances")
     for page in paginator.paginate(Filters=filters, PaginationConfig=pagination_config):
@@ -170,6 +336,29 @@ def _describe_instance_ids_iterator(stack_name, instance_state=("pending", "runn
         yield instances
 
 
+def _invoke_continuation(event, context, checkpoint):
+    """
+    Continue the cleanup in a new asynchronous invocation of the function, in charge of the CloudFormation response.
+
+    :return: True if the function has been invoked, False otherwise
+    """
+    invocation = event.get("CleanupInvocation", 1)
+    if invocation >= MAX_INVOCATIONS:
+        logger.error("Cleanup not completed after %s invocations", invocation)
+        return False
+    continuation_event = dict(event)
+    continuation_event.update({CHECKPOINT_KEY: checkpoint, "CleanupInvocation": invocation + 1})
+    try:
+        logger.info("Continuing cleanup in a new invocation, checkpoint: %s", checkpoint)
+        boto3.client("lambda", config=boto3_config).invoke(
+            FunctionName=context.invoked_function_arn, InvocationType="Event", Payload=json.dumps(continuation_event)
+        )
+        return True
+    except Exception as e:
+        logger.error("Failed when invoking function %s with error %s", context.invoked_function_arn, e)
+        return False
+
+
 @helper.create
 @helper.update
 def no_op(_, __):
@@ -184,12 +373,23 @@ ACTION_HANDLERS = {
 
 
 @helper.delete
-def delete(event, _):
+def delete(event, context):
+    """
+    Execute the cleanup action, starting from the checkpoint of the previous invocation, if any.
+
+    The cleanup runs within the crhelper timeout, every failure is sent by crhelper as FAILED response.
+    If the cleanup is continued by a new invocation, no response is sent by this invocation.
+    """
+    checkpoint = event.get(CHECKPOINT_KEY, {})
     action = event["ResourceProperties"]["Action"]
-    if action in ACTION_HANDLERS:
-        ACTION_HANDLERS[action](event)
-    else:
-        raise Exception("Unsupported action %s", action)
+    if action not in ACTION_HANDLERS:
+        raise Exception("Unsupported action %s" % action)
+    try:
+        ACTION_HANDLERS[action](event, context, checkpoint)
+    except CleanupTimeoutError as e:
+        if not _invoke_continuation(event, context, e.checkpoint):
+            raise
+        event[CONTINUED_KEY] = True
 
 
 def handler(event, context):
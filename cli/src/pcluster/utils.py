@@ -987,23 +987,23 @@ def set_asg_limits(asg_name, min, max, desired):
     )
 
 
-def get_batch_ce(stack_name):
+def get_batch_ce(stack_name, stack=None):
     """
     Get name of the AWS Batch Compute Environment.
 
     :param stack_name: name of the head node stack
-    :param config: config
+    :param stack: the stack data, retrieved if not specified
     :return: ce_name or exit if not found
     """
-    outputs = get_stack(stack_name).get("Outputs")
+    outputs = (stack or get_stack(stack_name)).get("Outputs")
     return get_stack_output_value(outputs, "BatchComputeEnvironmentArn")
 
 
-def get_batch_ce_capacity(stack_name):
+def get_batch_ce_capacity(stack_name, stack=None):
     client = boto3.client("batch")
 
     return (
-        client.describe_compute_environments(computeEnvironments=[get_batch_ce(stack_name)])
+        client.describe_compute_environments(computeEnvironments=[get_batch_ce(stack_name, stack)])
         .get("computeEnvironments")[0]
         .get("computeResources")
         .get("desiredvCpus")
@@ -1046,9 +1046,9 @@ def get_base_additional_iam_policies():
     return [policy_name_to_arn("CloudWatchAgentServerPolicy"), policy_name_to_arn("AWSBatchFullAccess")]
 
 
-def cluster_has_running_capacity(stack_name):
+def cluster_has_running_capacity(stack_name, stack=None):
     if not hasattr(cluster_has_running_capacity, "cached_result"):
-        stack = get_stack(stack_name)
+        stack = stack or get_stack(stack_name)
         scheduler = get_cfn_param(stack.get("Parameters", []), "Scheduler")
         if is_hit_enabled_cluster(stack):
             cluster_has_running_capacity.cached_result = (
@@ -1056,7 +1056,7 @@ def cluster_has_running_capacity(stack_name):
             )
         else:
             cluster_has_running_capacity.cached_result = (
-                get_batch_ce_capacity(stack_name) > 0
+                get_batch_ce_capacity(stack_name, stack) > 0
                 if scheduler == "awsbatch"
                 else get_asg_settings(stack_name).get("DesiredCapacity") > 0
             )
@@ -17,8 +17,10 @@ import sys
 
 import argparse
 
+from pcluster.config.config_diff import ConfigDiff
 from pcluster.config.hit_converter import HitConverter
 from pcluster.config.pcluster_config import PclusterConfig, default_config_file_path
+from pcluster.utils import get_file_section_name
 
 
 def _err_and_exit(message):
@@ -68,6 +70,36 @@ def _parse_args(argv=None):
     )
     convert_parser.set_defaults(func=convert)
 
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help=(
+            "Show the differences between a ParallelCluster's configuration file and another configuration file "
+            "or the configuration of a running cluster. "
+            "Exits with 0 if there are no differences, 1 if there are differences and 2 in case of errors."
+        ),
+    )
+    diff_parser.add_argument(
+        "-c",
+        "--config-file",
+        help="Configuration file to be compared. Default: {0}".format(default_config_file),
+        default=default_config_file,
+    )
+    diff_parser.add_argument(
+        "-t",
+        "--cluster-template",
+        help=(
+            "Indicates the 'cluster' section of the configuration files to compare. "
+            "If not specified the script will look for the cluster_template parameter in the [global] section "
+            "or will search for '[cluster default]'."
+        ),
+    )
+    diff_base_group = diff_parser.add_mutually_exclusive_group(required=True)
+    diff_base_group.add_argument("-b", "--base-config-file", help="Configuration file to be compared with.")
+    diff_base_group.add_argument(
+        "-n", "--cluster-name", help="Name of the running cluster whose configuration is to be compared with."
+    )
+    diff_parser.set_defaults(func=diff)
+
     return parser.parse_args(argv)
 
 
@@ -116,6 +148,55 @@ def convert(args=None):
         sys.exit(1)
 
 
+def _print_diff(config_diff):
+    """Print the removed and added sections and the changed params of the given ConfigDiff."""
+    for section_name in config_diff.removed_sections:
+        print("[{0}] removed".format(section_name))
+    for section_name in config_diff.added_sections:
+        print("[{0}] added".format(section_name))
+    for change in config_diff.changes:
+        print(
+            "[{0}] {1}: {2} -> {3}".format(
+                get_file_section_name(change.section_key, change.section_label),
+                change.param_key,
+                change.base_value,
+                change.target_value,
+            )
+        )
+
+
+def diff(args=None):
+    """Command to show the differences between two configurations."""
+    try:
+        target_config = PclusterConfig(
+            config_file=args.config_file, cluster_label=args.cluster_template, fail_on_file_absence=True
+        )
+        if args.cluster_name:
+            base_config = PclusterConfig(config_file=args.config_file, cluster_name=args.cluster_name)
+        else:
+            base_config = PclusterConfig(
+                config_file=args.base_config_file, cluster_label=args.cluster_template, fail_on_file_absence=True
+            )
+
+        config_diff = ConfigDiff(base_config, target_config)
+        _print_diff(config_diff)
+    except KeyboardInterrupt:
+        print("Exiting...")
+        sys.exit(2)
+    except SystemExit as e:
+        # configuration errors exit with the error message
+        if e.code not in (None, 0):
+            print(e.code)
+        sys.exit(2)
+    except Exception as e:
+        print("Unexpected error of type {0}: {1}".format(type(e).__name__, e))
+        sys.exit(2)
+
+    if config_diff.has_differences:
+        sys.exit(1)
+    print("No differences found.")
+
+
 def main(argv=None):
     """Run the cli."""
     args = _parse_args(argv)
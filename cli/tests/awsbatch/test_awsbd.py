@@ -0,0 +1,102 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from assertpy import assert_that
+
+from awsbatch import awsbd
+
+
+@pytest.fixture()
+def daemon(tmpdir, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmpdir))
+    socket_file = tmpdir.join(".parallelcluster", "awsbatch-cli.sock")
+    process = subprocess.Popen(
+        [sys.executable, "-c", "from awsbatch.awsbd import main; main()"],
+        env=dict(os.environ),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    for _ in range(300):
+        if socket_file.check() or process.poll() is not None:
+            break
+        time.sleep(0.1)
+    assert_that(socket_file.check()).is_true()
+    yield process
+    if process.poll() is None:
+        process.kill()
+    process.communicate()
+
+
+def test_forward_command(daemon, mocker, capsys):
+    stdin_mock = mocker.patch("awsbatch.awsbd.sys.stdin")
+    stdin_mock.isatty.return_value = True
+
+    assert_that(awsbd.forward_command("awsbqueues", ["--help"])).is_equal_to(0)
+    assert_that(capsys.readouterr().out).starts_with("usage: awsbqueues")
+
+    assert_that(awsbd.forward_command("awsbstat", ["--invalid"])).is_equal_to(2)
+    assert_that(capsys.readouterr().err).contains("awsbstat: error: unrecognized arguments: --invalid")
+
+    assert_that(awsbd.forward_command("awsbstat", [])).is_equal_to(1)
+    assert_that(capsys.readouterr().err).is_equal_to("Error: cluster parameter is required\n")
+
+    # long running commands and commands reading from stdin are executed locally
+    assert_that(awsbd.forward_command("awsbout", ["-f", "job-id"])).is_none()
+    assert_that(awsbd.forward_command("awsbout", ["--foll", "job-id"])).is_none()
+    assert_that(awsbd.forward_command("awsbout", ["-s", "job-id"])).is_none()
+    assert_that(awsbd.forward_command("awsbout", ["--str", "job-id"])).is_none()
+    stdin_mock.isatty.return_value = False
+    assert_that(awsbd.forward_command("awsbsub", ["--help"])).is_none()
+    # commands not reading from stdin are forwarded even if stdin is redirected
+    assert_that(awsbd.forward_command("awsbqueues", ["--help"])).is_equal_to(0)
+    assert_that(capsys.readouterr().out).starts_with("usage: awsbqueues")
+
+    awsbd.main(["--stop"])
+    assert_that(capsys.readouterr().out).is_equal_to("awsbd daemon stopped\n")
+    daemon.wait()
+    assert_that(awsbd.forward_command("awsbqueues", ["--help"])).is_none()
+
+
+@pytest.mark.parametrize(
+    "argv, expected_forwardable",
+    [
+        (["job-id"], True),
+        (["-t", "10", "job-id"], True),
+        (["-sp", "10", "job-id"], True),
+        (["--", "--follow"], True),
+        (["-f", "job-id"], False),
+        (["--fo", "job-id"], False),
+        (["--stream", "job-id"], False),
+        (["--stream=true", "job-id"], False),
+    ],
+)
+def test_is_forwardable(argv, expected_forwardable):
+    assert_that(awsbd._is_forwardable("awsbout", argv)).is_equal_to(expected_forwardable)
+
+
+def test_connection_writer():
+    client, server = socket.socketpair()
+    try:
+        lock = threading.Lock()
+        writers = [awsbd._ConnectionWriter(server, "stdout", lock), awsbd._ConnectionWriter(server, "stderr", lock)]
+        text = "x" * 100000
+        threads = [threading.Thread(target=writers[index % 2].write, args=(text,)) for index in range(8)]
+        responses = client.makefile("rb")
+        for thread in threads:
+            thread.start()
+        lines = [responses.readline() for _ in threads]
+        for thread in threads:
+            thread.join()
+    finally:
+        client.close()
+        server.close()
+
+    for line in lines:
+        response = json.loads(line.decode("utf-8"))
+        assert_that(list(response.values())).is_equal_to([text])
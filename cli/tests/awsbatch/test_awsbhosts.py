@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from awsbatch import awsbhosts
+from tests.common import MockedBoto3Request
+
+ECS_CLUSTER_ARN = "arn:aws:ecs:us-east-1:111122223333:cluster/cluster-name"
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    # we need to set the region in the environment because the Boto3ClientFactory requires it.
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    return "awsbatch.common.boto3"
+
+
+def _container_instance(index):
+    return {
+        "containerInstanceArn": "arn:aws:ecs:us-east-1:111122223333:container-instance/{0}".format(index),
+        "ec2InstanceId": "i-{0:017d}".format(index),
+        "status": "ACTIVE",
+        "attributes": [{"name": "ecs.instance-type", "value": "c5.xlarge"}],
+        "registeredResources": [{"name": "CPU", "type": "INTEGER", "integerValue": 4096}],
+        "remainingResources": [{"name": "CPU", "type": "INTEGER", "integerValue": 2048}],
+        "runningTasksCount": 1,
+        "pendingTasksCount": 0,
+    }
+
+
+def _ec2_instance(index):
+    return {
+        "InstanceId": "i-{0:017d}".format(index),
+        "PrivateIpAddress": "10.0.0.{0}".format(index),
+        "PrivateDnsName": "ip-10-0-0-{0}.ec2.internal".format(index),
+        "PublicDnsName": "",
+    }
+
+
+class TestOutput(object):
+    def test_requested_instance(self, capsys, boto3_stubber, awsbatchcliconfig_mock):
+        awsbatchcliconfig_mock.return_value.compute_environment = "compute_environment"
+        boto3_stubber(
+            "batch",
+            MockedBoto3Request(
+                method="describe_compute_environments",
+                response={
+                    "computeEnvironments": [
+                        {
+                            "computeEnvironmentName": "compute_environment",
+                            "computeEnvironmentArn": "compute_environment_arn",
+                            "ecsClusterArn": ECS_CLUSTER_ARN,
+                        }
+                    ]
+                },
+                expected_params={"computeEnvironments": ["compute_environment"], "nextToken": ""},
+            ),
+        )
+        container_instances = [_container_instance(1), _container_instance(2)]
+        boto3_stubber(
+            "ecs",
+            [
+                MockedBoto3Request(
+                    method="list_container_instances",
+                    response={"containerInstanceArns": [ci["containerInstanceArn"] for ci in container_instances]},
+                    expected_params={"cluster": ECS_CLUSTER_ARN},
+                ),
+                MockedBoto3Request(
+                    method="describe_container_instances",
+                    response={"containerInstances": container_instances},
+                    expected_params={
+                        "cluster": ECS_CLUSTER_ARN,
+                        "containerInstances": [ci["containerInstanceArn"] for ci in container_instances],
+                    },
+                ),
+            ],
+        )
+        # only the requested instance is described
+        boto3_stubber(
+            "ec2",
+            MockedBoto3Request(
+                method="describe_instances",
+                response={"Reservations": [{"Instances": [_ec2_instance(2)]}]},
+                expected_params={"InstanceIds": ["i-00000000000000002"]},
+            ),
+        )
+
+        awsbhosts.main(["-c", "cluster", "i-00000000000000002"])
+
+        output = capsys.readouterr().out
+        assert "i-00000000000000002" in output
+        assert "10.0.0.2" in output
+        assert "i-00000000000000001" not in output
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from awsbatch import awsbkill
+from tests.common import MockedBoto3Request
+from tests.conftest import DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    # we need to set the region in the environment because the Boto3ClientFactory requires it.
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    return "awsbatch.common.boto3"
+
+
+class TestArgs(object):
+    @pytest.mark.parametrize(
+        "argv, message",
+        [
+            ([], "Parameters validation error: job IDs or --queue-filter option are required\n"),
+            (
+                ["-qf"],
+                "Parameters validation error: --queue-filter option requires at least one of --status and --name "
+                "filters\n",
+            ),
+            (["-qf", "-n", "sweep-*", "id"], "Parameters validation error: job IDs cannot be specified with --queue-filter option\n"),
+            (
+                ["-n", "sweep-*", "id"],
+                "Parameters validation error: --name can be used only with --queue-filter option\n",
+            ),
+            (
+                ["-s", "RUNNABLE", "id"],
+                "Parameters validation error: --status can be used only with --queue-filter option\n",
+            ),
+            (["-qf", "-s", "FAILED"], "Parameters validation error: unsupported job status (FAILED)\n"),
+        ],
+    )
+    def test_invalid_parameters(self, failed_with_message, argv, message):
+        failed_with_message(awsbkill.main, message, argv=argv)
+
+
+def _job_summary(job_id, name, status):
+    return {"jobId": job_id, "jobName": name, "status": status, "createdAt": 1544000000000}
+
+
+@pytest.mark.usefixtures("awsbatchcliconfig_mock")
+class TestKill(object):
+    def test_queue_filter(self, capsys, boto3_stubber, mocker):
+        mocker.patch("awsbatch.awsbkill.MAX_CONCURRENT_REQUESTS", 1)
+        job_queue = DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG["job_queue"]
+        boto3_stubber(
+            "batch",
+            [
+                MockedBoto3Request(
+                    method="list_jobs",
+                    response={
+                        "jobSummaryList": [
+                            _job_summary("id-1", "sweep-1", "RUNNABLE"),
+                            _job_summary("id-2", "other", "RUNNABLE"),
+                        ],
+                        "nextToken": "token",
+                    },
+                    expected_params={"jobQueue": job_queue, "jobStatus": "RUNNABLE", "maxResults": 1000},
+                ),
+                MockedBoto3Request(
+                    method="list_jobs",
+                    response={"jobSummaryList": [_job_summary("id-3", "sweep-3", "RUNNABLE")]},
+                    expected_params={
+                        "jobQueue": job_queue,
+                        "jobStatus": "RUNNABLE",
+                        "maxResults": 1000,
+                        "nextToken": "token",
+                    },
+                ),
+                MockedBoto3Request(
+                    method="terminate_job",
+                    response={},
+                    expected_params={"jobId": "id-1", "reason": "Terminated by the user"},
+                ),
+                MockedBoto3Request(
+                    method="terminate_job",
+                    response={},
+                    expected_params={"jobId": "id-3", "reason": "Terminated by the user"},
+                ),
+            ],
+        )
+
+        awsbkill.main(["-c", "cluster", "-qf", "-s", "RUNNABLE", "-n", "sweep-*"])
+
+        assert capsys.readouterr().out == "Found 2 jobs to cancel/terminate.\nProcessed 2/2 jobs, 0 failures.\n"
@@ -0,0 +1,333 @@
+import copy
+import json
+import os
+
+import pytest
+
+from awsbatch import awsbout
+from tests.common import MockedBoto3Request, read_text
+
+ARRAY_JOB_ID = "3286a19c-68a9-47c9-8000-427d23ffc7ca"
+MNP_JOB_ID = "6abf3ecd-07a8-4faa-8a65-79e7404eb50f"
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    # we need to set the region in the environment because the Boto3ClientFactory requires it.
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    return "awsbatch.common.boto3"
+
+
+@pytest.fixture()
+def sequential_requests(mocker):
+    # the Stubber expects the requests in a deterministic order
+    mocker.patch("awsbatch.awsbout.MAX_CONCURRENT_REQUESTS", 1)
+
+
+def _get_log_events_request(log_stream, events, next_token=None, **kwargs):
+    expected_params = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream}
+    expected_params.update(kwargs)
+    if next_token:
+        expected_params["nextToken"] = next_token
+    return MockedBoto3Request(
+        method="get_log_events",
+        response={"events": events, "nextForwardToken": "f/{0}".format(log_stream[-4:])},
+        expected_params=expected_params,
+    )
+
+
+def _describe_jobs_requests(shared_datadir, job_id, parent_file, children_file, children_ids):
+    response_parent = json.loads(read_text(shared_datadir / "aws_api_responses/{0}".format(parent_file)))
+    response_children = json.loads(read_text(shared_datadir / "aws_api_responses/{0}".format(children_file)))
+    return [
+        MockedBoto3Request(method="describe_jobs", response=response_parent, expected_params={"jobs": [job_id]}),
+        MockedBoto3Request(method="describe_jobs", response=response_children, expected_params={"jobs": children_ids}),
+    ]
+
+
+@pytest.mark.usefixtures("awsbatchcliconfig_mock", "convert_to_date_mock", "sequential_requests")
+class TestOutput(object):
+    def test_array_job_merged_output(self, capsys, boto3_stubber, test_datadir, shared_datadir):
+        boto3_stubber(
+            "batch",
+            _describe_jobs_requests(
+                shared_datadir,
+                ARRAY_JOB_ID,
+                "batch_describe-jobs_single_array_job.json",
+                "batch_describe-jobs_single_array_job_children.json",
+                [ARRAY_JOB_ID + ":0", ARRAY_JOB_ID + ":1"],
+            ),
+        )
+        stream_0 = "parallelcluster-mnp-final/default/8f049b3a-9fab-400a-acbe-135337ec4c17"
+        stream_1 = "parallelcluster-mnp-final/default/4086671a-6a65-4666-ae18-931e63187271"
+        boto3_stubber(
+            "logs",
+            [
+                _get_log_events_request(
+                    stream_0,
+                    [
+                        {"timestamp": 1544000000000, "message": "child 0 line 1"},
+                        {"timestamp": 1544000002000, "message": "child 0 line 2"},
+                    ],
+                    startFromHead=True,
+                ),
+                _get_log_events_request(stream_0, [], next_token="f/4c17", startFromHead=True),
+                _get_log_events_request(
+                    stream_1,
+                    [
+                        {"timestamp": 1544000001000, "message": "child 1 line 1"},
+                        {"timestamp": 1544000002000, "message": "child 1 line 2"},
+                    ],
+                    startFromHead=True,
+                ),
+                _get_log_events_request(stream_1, [], next_token="f/7271", startFromHead=True),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", ARRAY_JOB_ID])
+
+        assert capsys.readouterr().out == read_text(test_datadir / "expected_output.txt")
+
+    def test_mnp_job_head(self, capsys, boto3_stubber, shared_datadir):
+        boto3_stubber(
+            "batch",
+            _describe_jobs_requests(
+                shared_datadir,
+                MNP_JOB_ID,
+                "batch_describe-jobs_single_mnp_job.json",
+                "batch_describe-jobs_single_mnp_job_children.json",
+                [MNP_JOB_ID + "#0", MNP_JOB_ID + "#1"],
+            ),
+        )
+        boto3_stubber(
+            "logs",
+            [
+                _get_log_events_request(
+                    "parallelcluster-mnp-final-mnp/default/3557426b-21ff-41d0-a348-51a8c68824ae",
+                    [{"timestamp": 1544000000000, "message": "node 1"}],
+                    limit=1,
+                    startFromHead=True,
+                ),
+                _get_log_events_request(
+                    "parallelcluster-mnp-final-mnp/default/3d430bca-d7b4-4436-9efe-ae5f76a0b81b",
+                    [{"timestamp": 1544000000000, "message": "node 0"}],
+                    limit=1,
+                    startFromHead=True,
+                ),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", "-hd", "1", MNP_JOB_ID])
+
+        assert capsys.readouterr().out == (
+            "[0] 2018-12-05T08:53:20+00:00: node 0\n[1] 2018-12-05T08:53:20+00:00: node 1\n"
+        )
+
+    def test_stream_with_children(self, boto3_stubber, shared_datadir, failed_with_message):
+        boto3_stubber(
+            "batch",
+            _describe_jobs_requests(
+                shared_datadir,
+                ARRAY_JOB_ID,
+                "batch_describe-jobs_single_array_job.json",
+                "batch_describe-jobs_single_array_job_children.json",
+                [ARRAY_JOB_ID + ":0", ARRAY_JOB_ID + ":1"],
+            ),
+        )
+
+        failed_with_message(
+            awsbout.main,
+            "Parameters validation error: --stream and --follow cannot be used with jobs having children "
+            "({0})\n".format(ARRAY_JOB_ID),
+            argv=["-c", "cluster", "-s", ARRAY_JOB_ID],
+        )
+
+
+@pytest.mark.usefixtures("awsbatchcliconfig_mock", "convert_to_date_mock")
+class TestFollow(object):
+    def test_follow_resumes_and_stops_on_terminal_status(self, capsys, boto3_stubber, mocker, tmpdir, shared_datadir):
+        job_id = "ab2cd019-1d84-43c7-a016-9772dd963f3b"
+        job = json.loads(read_text(shared_datadir / "aws_api_responses/batch_describe-jobs_single_job.json"))
+        log_stream = job["jobs"][0]["container"]["logStreamName"]
+        position_file = str(tmpdir.join("position"))
+        with open(position_file, "w") as f:
+            f.write("f/saved")
+        mocker.patch("awsbatch.awsbout._get_position_file", return_value=position_file)
+        sleep_mock = mocker.patch("awsbatch.awsbout.time.sleep")
+        running_job = copy.deepcopy(job)
+        running_job["jobs"][0]["status"] = "RUNNING"
+
+        boto3_stubber(
+            "batch",
+            [
+                MockedBoto3Request(method="describe_jobs", response=job, expected_params={"jobs": [job_id]}),
+                MockedBoto3Request(method="describe_jobs", response=running_job, expected_params={"jobs": [job_id]}),
+                MockedBoto3Request(method="describe_jobs", response=job, expected_params={"jobs": [job_id]}),
+            ],
+        )
+        expected_params = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream, "startFromHead": True}
+        boto3_stubber(
+            "logs",
+            [
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={
+                        "events": [{"timestamp": 1544000000000, "message": "new line"}],
+                        "nextForwardToken": "f/1",
+                    },
+                    expected_params=dict(expected_params, nextToken="f/saved"),
+                ),
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={"events": [], "nextForwardToken": "f/1"},
+                    expected_params=dict(expected_params, nextToken="f/1"),
+                ),
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={"events": [], "nextForwardToken": "f/1"},
+                    expected_params=dict(expected_params, nextToken="f/1"),
+                ),
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={"events": [], "nextForwardToken": "f/1"},
+                    expected_params=dict(expected_params, nextToken="f/1"),
+                ),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", "-f", job_id])
+
+        assert capsys.readouterr().out == "2018-12-05T08:53:20+00:00: new line\n"
+        # the period is halved after a page with new events and doubled when the stream is idle
+        assert sleep_mock.call_args_list == [mocker.call(1), mocker.call(2)]
+        # the position is removed once the stream has been drained after the job termination
+        assert not os.path.exists(position_file)
+
+    def test_follow_polls_again_after_full_page(self, capsys, boto3_stubber, mocker, tmpdir, shared_datadir):
+        job_id = "ab2cd019-1d84-43c7-a016-9772dd963f3b"
+        job = json.loads(read_text(shared_datadir / "aws_api_responses/batch_describe-jobs_single_job.json"))
+        log_stream = job["jobs"][0]["container"]["logStreamName"]
+        position_file = str(tmpdir.join("position"))
+        mocker.patch("awsbatch.awsbout._get_position_file", return_value=position_file)
+        mocker.patch("awsbatch.awsbout.MAX_PAGE_EVENTS", 1)
+        sleep_mock = mocker.patch("awsbatch.awsbout.time.sleep")
+
+        boto3_stubber(
+            "batch",
+            [
+                MockedBoto3Request(method="describe_jobs", response=job, expected_params={"jobs": [job_id]}),
+                MockedBoto3Request(method="describe_jobs", response=job, expected_params={"jobs": [job_id]}),
+            ],
+        )
+        expected_params = {"logGroupName": "/aws/batch/job", "logStreamName": log_stream, "startFromHead": True}
+        boto3_stubber(
+            "logs",
+            [
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={
+                        "events": [{"timestamp": 1544000000000, "message": "new line"}],
+                        "nextForwardToken": "f/1",
+                    },
+                    expected_params=expected_params,
+                ),
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={"events": [], "nextForwardToken": "f/1"},
+                    expected_params=dict(expected_params, nextToken="f/1"),
+                ),
+                MockedBoto3Request(
+                    method="get_log_events",
+                    response={"events": [], "nextForwardToken": "f/1"},
+                    expected_params=dict(expected_params, nextToken="f/1"),
+                ),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", "-f", job_id])
+
+        assert capsys.readouterr().out == "2018-12-05T08:53:20+00:00: new line\n"
+        sleep_mock.assert_not_called()
+        assert not os.path.exists(position_file)
+
+
+@pytest.mark.usefixtures("awsbatchcliconfig_mock", "sequential_requests")
+class TestDownload(object):
+    def test_array_job_download_with_resume(self, capsys, boto3_stubber, tmpdir, shared_datadir):
+        boto3_stubber(
+            "batch",
+            _describe_jobs_requests(
+                shared_datadir,
+                ARRAY_JOB_ID,
+                "batch_describe-jobs_single_array_job.json",
+                "batch_describe-jobs_single_array_job_children.json",
+                [ARRAY_JOB_ID + ":0", ARRAY_JOB_ID + ":1"],
+            ),
+        )
+        stream_0 = "parallelcluster-mnp-final/default/8f049b3a-9fab-400a-acbe-135337ec4c17"
+        stream_1 = "parallelcluster-mnp-final/default/4086671a-6a65-4666-ae18-931e63187271"
+        # child 1 download has been interrupted after the first page, leaving a partially written second page
+        tmpdir.join("1.log").write("page 1\npartial page 2")
+        tmpdir.join("1.log.position").write("f/4c17\n7")
+        boto3_stubber(
+            "logs",
+            [
+                _get_log_events_request(
+                    stream_0, [{"timestamp": 1544000000000, "message": "child 0"}], startFromHead=True
+                ),
+                _get_log_events_request(stream_0, [], next_token="f/4c17", startFromHead=True),
+                _get_log_events_request(
+                    stream_1,
+                    [{"timestamp": 1544000000000, "message": "page 2"}],
+                    next_token="f/4c17",
+                    startFromHead=True,
+                ),
+                _get_log_events_request(stream_1, [], next_token="f/7271", startFromHead=True),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", "--download", str(tmpdir), ARRAY_JOB_ID])
+
+        assert capsys.readouterr().out == "Downloaded 2 log streams to {0}\n".format(tmpdir)
+        assert tmpdir.join("0.log").read() == "child 0\n"
+        assert tmpdir.join("1.log").read() == "page 1\npage 2\n"
+        # the positions are removed once the end of the streams is reached
+        assert not tmpdir.listdir("*.position")
+
+    def test_array_job_download_with_stale_position(self, capsys, boto3_stubber, tmpdir, shared_datadir):
+        boto3_stubber(
+            "batch",
+            _describe_jobs_requests(
+                shared_datadir,
+                ARRAY_JOB_ID,
+                "batch_describe-jobs_single_array_job.json",
+                "batch_describe-jobs_single_array_job_children.json",
+                [ARRAY_JOB_ID + ":0", ARRAY_JOB_ID + ":1"],
+            ),
+        )
+        stream_0 = "parallelcluster-mnp-final/default/8f049b3a-9fab-400a-acbe-135337ec4c17"
+        stream_1 = "parallelcluster-mnp-final/default/4086671a-6a65-4666-ae18-931e63187271"
+        # child 0 file has been removed and child 1 file is shorter than the stored position
+        tmpdir.join("0.log.position").write("f/4c17\n8")
+        tmpdir.join("1.log").write("page")
+        tmpdir.join("1.log.position").write("f/4c17\n7")
+        boto3_stubber(
+            "logs",
+            [
+                _get_log_events_request(
+                    stream_0, [{"timestamp": 1544000000000, "message": "child 0"}], startFromHead=True
+                ),
+                _get_log_events_request(stream_0, [], next_token="f/4c17", startFromHead=True),
+                _get_log_events_request(
+                    stream_1, [{"timestamp": 1544000000000, "message": "page 1"}], startFromHead=True
+                ),
+                _get_log_events_request(stream_1, [], next_token="f/7271", startFromHead=True),
+            ],
+        )
+
+        awsbout.main(["-c", "cluster", "--download", str(tmpdir), ARRAY_JOB_ID])
+
+        assert capsys.readouterr().out == "Downloaded 2 log streams to {0}\n".format(tmpdir)
+        assert tmpdir.join("0.log").read() == "child 0\n"
+        assert tmpdir.join("1.log").read() == "page 1\n"
+        assert not tmpdir.listdir("*.position")
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from awsbatch import awsbqueues
+from tests.common import MockedBoto3Request
+from tests.conftest import DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG
+
+QUEUE_ARN = "arn:aws:batch:us-east-1:111122223333:job-queue/job_queue"
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    # we need to set the region in the environment because the Boto3ClientFactory requires it.
+    os.environ["AWS_DEFAULT_REGION"] = "us-east-1"
+    return "awsbatch.common.boto3"
+
+
+def _describe_job_queues():
+    return MockedBoto3Request(
+        method="describe_job_queues",
+        response={
+            "jobQueues": [
+                {
+                    "jobQueueName": "job_queue",
+                    "jobQueueArn": QUEUE_ARN,
+                    "state": "ENABLED",
+                    "status": "VALID",
+                    "statusReason": "JobQueue Healthy",
+                    "priority": 1,
+                    "computeEnvironmentOrder": [],
+                }
+            ]
+        },
+        expected_params={"jobQueues": [DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG["job_queue"]]},
+    )
+
+
+def _list_jobs(status, created_at, next_token=None, expected_token=None):
+    response = {
+        "jobSummaryList": [
+            {"jobId": "{0}-{1}".format(status, time), "jobName": "job", "createdAt": time} for time in created_at
+        ]
+    }
+    if next_token:
+        response["nextToken"] = next_token
+    expected_params = {"jobQueue": QUEUE_ARN, "jobStatus": status, "maxResults": 1000}
+    if expected_token:
+        expected_params["nextToken"] = expected_token
+    return MockedBoto3Request(method="list_jobs", response=response, expected_params=expected_params)
+
+
+@pytest.mark.usefixtures("awsbatchcliconfig_mock")
+class TestStats(object):
+    def test_stats(self, capsys, boto3_stubber, mocker, tmpdir):
+        mocker.patch("awsbatch.awsbqueues.MAX_CONCURRENT_REQUESTS", 1)
+        mocker.patch("awsbatch.awsbqueues.STATS_CACHE_FILE", str(tmpdir.join("awsbqueues-stats.json")))
+        time_mock = mocker.patch("awsbatch.awsbqueues.time")
+        time_mock.time.return_value = 1544003600
+        boto3_stubber(
+            "batch",
+            [
+                _describe_job_queues(),
+                _list_jobs("SUBMITTED", []),
+                _list_jobs("PENDING", [1544000000000]),
+                _list_jobs("RUNNABLE", [1544000000000, 1544001000000], next_token="token"),
+                _list_jobs("RUNNABLE", [1543999000000], expected_token="token"),
+                _list_jobs("STARTING", []),
+                _list_jobs("RUNNING", [1544000000000, 1544000000000]),
+                # statistics are read from the cache at the second invocation
+                _describe_job_queues(),
+            ],
+        )
+        expected_output = (
+            "jobQueueName    status      SUBMITTED    PENDING    RUNNABLE    STARTING    RUNNING  oldestRunnableAge\n"
+            "--------------  --------  -----------  ---------  ----------  ----------  ---------  -------------------\n"
+            "job_queue       VALID               0          1           3           0          2  1:16:40\n"
+        )
+
+        awsbqueues.main(["-c", "cluster", "--stats"])
+        assert capsys.readouterr().out == expected_output
+
+        time_mock.time.return_value += awsbqueues.STATS_CACHE_TTL
+        awsbqueues.main(["-c", "cluster", "--stats"])
+        assert capsys.readouterr().out == expected_output.replace("1:16:40", "1:16:55")
@@ -4,6 +4,7 @@ import os
 import pytest
 
 from awsbatch import awsbstat
+from awsbatch.journal import JobJournal
 from tests.common import MockedBoto3Request, read_text
 from tests.conftest import DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG
 
@@ -446,3 +447,46 @@ class TestOutput(object):
         awsbstat.main(["-c", "cluster"] + args)
 
         assert capsys.readouterr().out == read_text(test_datadir / expected)
+
+    def test_history(self, capsys, boto3_stubber, test_datadir, awsbatchcliconfig_mock, mocker, tmpdir):
+        journal_file = str(tmpdir.join("awsbatch-journal.db"))
+        mocker.patch("awsbatch.journal.JOURNAL_FILE", journal_file)
+        awsbatchcliconfig_mock.return_value.job_journal = True
+        journal = JobJournal(journal_file)
+        journal.add_jobs(
+            [
+                {
+                    "jobId": "6abf3ecd-07a8-4faa-8a65-79e7404eb50f",
+                    "jobName": "sweep-1",
+                    "createdAt": 1544688540000,
+                    "startedAt": 1544688600000,
+                    "stoppedAt": 1544688660000,
+                    "status": "FAILED",
+                    "container": {"exitCode": 1},
+                },
+                {
+                    "jobId": "7a712b5c-8d6d-4cb7-9e4e-7b1a2c5e8d9f",
+                    "jobName": "sweep-2",
+                    "createdAt": 1544688840000,
+                    "status": "SUCCEEDED",
+                },
+                {"jobId": "3286a19c-68a9-47c9-8000-427d23ffc7ca", "jobName": "other", "status": "FAILED"},
+            ],
+            DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG["job_queue"],
+        )
+        journal.close()
+        # the jobs are retrieved from the journal, without asking to AWS Batch
+        boto3_stubber("batch", [])
+
+        awsbstat.main(["-c", "cluster", "--history", "-s", "FAILED,SUCCEEDED", "-n", "sweep-*"])
+
+        assert capsys.readouterr().out == read_text(test_datadir / "expected_output.txt")
+
+    def test_history_not_enabled(self, boto3_stubber, failed_with_message):
+        boto3_stubber("batch", [])
+        failed_with_message(
+            awsbstat.main,
+            "The job journal is not available. "
+            "Enable it with job_journal = true in the [main] section of the awsbatch-cli.cfg file\n",
+            argv=["-c", "cluster", "--history"],
+        )
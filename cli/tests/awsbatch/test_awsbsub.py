@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+from awsbatch import awsbsub
+
+
+@pytest.fixture()
+def manifest(tmpdir):
+    lines = [
+        {"id": "first", "args": ["-jn", "first", "sleep", "10"]},
+        {"args": ["-jn", "second", "-p", "2", "sleep", "20"]},
+        {"args": ["-jn", "second", "-p", "2", "sleep", "20"]},
+    ]
+    manifest_file = tmpdir.join("jobs.jsonl")
+    manifest_file.write("\n".join(json.dumps(line) for line in lines) + "\n\n")
+    return str(manifest_file)
+
+
+def test_read_manifest(manifest):
+    jobs = awsbsub._read_manifest(manifest)
+
+    assert [job_id for job_id, _ in jobs][0] == "first"
+    # identical lines get different ids
+    assert jobs[1][0].endswith("-1")
+    assert jobs[2][0] == jobs[1][0][:-1] + "2"
+    assert jobs[1][1].job_name == "second"
+    assert jobs[1][1].vcpus == 2
+    assert jobs[1][1].command == "sleep"
+    assert jobs[1][1].arguments == ["20"]
+
+
+def test_read_invalid_manifest(tmpdir, failed_with_message):
+    manifest_file = tmpdir.join("jobs.jsonl")
+    manifest_file.write('{"args": ["-jn", "first", "sleep"]}\n{"id": "missing_args"}\n')
+
+    failed_with_message(
+        awsbsub._read_manifest,
+        "Error reading line 2 of the manifest ({0}). Failed with exception: 'args'\n".format(manifest_file),
+        str(manifest_file),
+    )
+
+
+def test_submit_manifest_skips_submitted_jobs(mocker, capsys, manifest):
+    with open(manifest + ".submitted", "w") as f:
+        f.write(json.dumps({"id": "first", "jobId": "id-0", "jobName": "first"}) + "\n")
+    submit_job_mock = mocker.patch(
+        "awsbatch.awsbsub._submit_job", side_effect=[{"jobId": "id-1", "jobName": "second"}] * 2
+    )
+    args = mocker.MagicMock(manifest=manifest, submit_rate=1000)
+
+    awsbsub._submit_manifest(mocker.MagicMock(), mocker.MagicMock(), args, mocker.MagicMock(), mocker.MagicMock())
+
+    assert submit_job_mock.call_count == 2
+    assert capsys.readouterr().out.endswith("2 jobs have been submitted, 1 jobs were already submitted.\n")
+    with open(manifest + ".submitted") as f:
+        assert len(f.readlines()) == 3
+
+    # a second submission doesn't submit anything
+    awsbsub._submit_manifest(mocker.MagicMock(), mocker.MagicMock(), args, mocker.MagicMock(), mocker.MagicMock())
+
+    assert submit_job_mock.call_count == 2
+    assert capsys.readouterr().out == "0 jobs have been submitted, 3 jobs were already submitted.\n"
+
+
+def test_generate_unique_job_key(mocker):
+    mocker.patch("awsbatch.awsbsub.time.time", return_value=1544000000.0)
+
+    # jobs with the same name submitted concurrently in the same millisecond
+    first_key = awsbsub._generate_unique_job_key("job")
+    second_key = awsbsub._generate_unique_job_key("job")
+
+    assert first_key.startswith("job-job-1544000000000-")
+    assert second_key.startswith("job-job-1544000000000-")
+    assert first_key != second_key
+
+
+def _write_workflow(tmpdir, content):
+    workflow_file = tmpdir.join("dag.yaml")
+    workflow_file.write(content)
+    return str(workflow_file)
+
+
+def test_submit_workflow(mocker, capsys, tmpdir):
+    workflow = _write_workflow(
+        tmpdir,
+        """
+steps:
+  prepare:
+    args: ["-jn", "prepare", "-a", "4", "prepare.sh"]
+  simulate:
+    args: ["-jn", "simulate", "-a", "4", "simulate.sh"]
+    depends_on:
+      - step: prepare
+        type: N_TO_N
+  render:
+    args: ["-jn", "render", "render.sh"]
+    depends_on: [prepare]
+  report:
+    args: ["-jn", "report", "-d", "jobId=external", "report.sh"]
+    depends_on: [simulate, render]
+""",
+    )
+    submit_job_mock = mocker.patch(
+        "awsbatch.awsbsub._submit_job",
+        side_effect=lambda command, factory, job_args, config, log, dependencies: {
+            "jobId": job_args.job_name + "-id",
+            "jobName": job_args.job_name,
+        },
+    )
+    args = mocker.MagicMock(workflow=workflow, submit_rate=1000)
+
+    awsbsub._submit_workflow(mocker.MagicMock(), mocker.MagicMock(), args, mocker.MagicMock(), mocker.MagicMock())
+
+    dependencies = {call[0][2].job_name: call[1]["dependencies"] for call in submit_job_mock.call_args_list}
+    assert dependencies == {
+        "prepare": [],
+        "simulate": [{"jobId": "prepare-id", "type": "N_TO_N"}],
+        "render": [{"jobId": "prepare-id"}],
+        "report": [{"jobId": "simulate-id"}, {"jobId": "render-id"}],
+    }
+    with open(workflow + ".jobs.json") as f:
+        assert json.load(f) == {
+            "prepare": "prepare-id",
+            "simulate": "simulate-id",
+            "render": "render-id",
+            "report": "report-id",
+        }
+
+
+@pytest.mark.parametrize(
+    "content, error",
+    [
+        (
+            "steps:\n  a:\n    args: [cmd]\n    depends_on: [b]\n  b:\n    args: [cmd]\n    depends_on: [a]\n",
+            "The workflow ({0}) contains a dependency cycle among the steps: ['a', 'b']\n",
+        ),
+        (
+            "steps:\n  a:\n    args: [cmd]\n    depends_on: [missing]\n",
+            "Step (a) depends on the undefined step (missing)\n",
+        ),
+        (
+            "steps:\n  a:\n    args: [cmd]\n  b:\n    args: [cmd]\n    depends_on: [{step: a, type: ALL}]\n",
+            "Step (b) has an invalid dependency type (ALL), supported types are: N_TO_N, SEQUENTIAL\n",
+        ),
+    ],
+    ids=["cycle", "undefined_step", "invalid_dependency_type"],
+)
+def test_read_invalid_workflow(tmpdir, failed_with_message, content, error):
+    workflow = _write_workflow(tmpdir, content)
+
+    failed_with_message(awsbsub._read_workflow, error.format(workflow), workflow)
@@ -0,0 +1,67 @@
+import logging
+from datetime import datetime
+
+import pytest
+from assertpy import assert_that
+
+from awsbatch.common import MAX_POOL_CONNECTIONS, STACK_CACHE_VALIDITY, AWSBatchCliConfig, Boto3ClientFactory
+from tests.common import MockedBoto3Request
+
+
+def test_boto3_client_factory_reuses_clients(mocker):
+    boto3_mock = mocker.patch("awsbatch.common.boto3", autospec=True)
+    boto3_mock.client.side_effect = lambda service, **kwargs: mocker.MagicMock(name=service)
+    boto3_factory = Boto3ClientFactory("us-east-1", None, None, proxy="https://proxy:8080")
+
+    batch_client = boto3_factory.get_client("batch")
+
+    assert boto3_factory.get_client("batch") is batch_client
+    assert boto3_factory.get_client("logs") is not batch_client
+    assert boto3_mock.client.call_count == 2
+    config = boto3_mock.client.call_args[1]["config"]
+    assert config.max_pool_connections == MAX_POOL_CONNECTIONS
+    assert config.retries == {"mode": "adaptive"}
+    assert config.proxies == {"https": "https://proxy:8080"}
+
+
+@pytest.fixture()
+def boto3_stubber_path():
+    return "awsbatch.common.boto3"
+
+
+def test_awsbatch_cli_config_caches_stack_information(boto3_stubber, mocker, tmpdir, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmpdir))
+    stack = {
+        "StackName": "parallelcluster-cluster",
+        "StackId": "arn:aws:cloudformation:eu-west-1:111122223333:stack/parallelcluster-cluster/abc",
+        "CreationTime": datetime(2020, 1, 1),
+        "LastUpdatedTime": datetime(2020, 1, 2),
+        "StackStatus": "UPDATE_COMPLETE",
+        "Outputs": [
+            {"OutputKey": "ResourcesS3Bucket", "OutputValue": "bucket"},
+            {"OutputKey": "ArtifactS3RootDirectory", "OutputValue": "artifacts"},
+            {"OutputKey": "BatchComputeEnvironmentArn", "OutputValue": "compute_environment"},
+            {"OutputKey": "BatchJobQueueArn", "OutputValue": "job_queue"},
+            {"OutputKey": "BatchJobDefinitionArn", "OutputValue": "job_definition"},
+            {"OutputKey": "BatchJobDefinitionMnpArn", "OutputValue": "job_definition_mnp"},
+            {"OutputKey": "MasterPrivateIP", "OutputValue": "10.0.0.1"},
+        ],
+    }
+    describe_stacks = MockedBoto3Request(
+        method="describe_stacks",
+        response={"Stacks": [stack]},
+        expected_params={"StackName": "parallelcluster-cluster"},
+    )
+    # the stack is described only at the first invocation and when the cache is expired
+    boto3_stubber("cloudformation", [describe_stacks, describe_stacks])
+    time_mock = mocker.patch("awsbatch.common.time")
+
+    for current_time in [1000, 1000 + STACK_CACHE_VALIDITY, 1001 + STACK_CACHE_VALIDITY]:
+        time_mock.time.return_value = current_time
+        config = AWSBatchCliConfig(logging.getLogger(), "cluster")
+        assert_that(config.region).is_equal_to("eu-west-1")
+        assert_that(config.job_queue).is_equal_to("job_queue")
+        assert_that(config.job_definition_mnp).is_equal_to("job_definition_mnp")
+        assert_that(config.head_node_ip).is_equal_to("10.0.0.1")
+
+    assert_that(tmpdir.join(".parallelcluster", "awsbatch-cli-cache", "cluster.default.json").check(file=1)).is_true()
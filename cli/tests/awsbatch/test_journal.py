@@ -0,0 +1,56 @@
+from assertpy import assert_that
+
+from awsbatch.journal import JobJournal
+
+QUEUE_ARN = "arn:aws:batch:us-east-1:111122223333:job-queue/queue"
+
+
+def test_job_journal(tmpdir):
+    journal = JobJournal(str(tmpdir.join("journal", "jobs.db")))
+    journal.add_submitted_job({"jobId": "job-1", "jobName": "sweep-1"}, QUEUE_ARN)
+    journal.add_jobs(
+        [
+            {"jobId": "job-2", "jobName": "sweep-2", "createdAt": 2000, "status": "RUNNING", "startedAt": 2500},
+            {"jobId": "job-3", "jobName": "other", "createdAt": 3000, "status": "FAILED"},
+            {"jobId": "job-3:0", "jobName": "other", "createdAt": 3000, "status": "FAILED"},
+        ],
+        "queue",
+    )
+    # a subsequent refresh updates the status without losing the values not included in the job
+    journal.add_jobs(
+        [
+            {
+                "jobId": "job-2",
+                "jobName": "sweep-2",
+                "jobQueue": QUEUE_ARN,
+                "createdAt": 2000,
+                "status": "FAILED",
+                "stoppedAt": 4000,
+                "container": {"exitCode": 1},
+            }
+        ]
+    )
+    journal.close()
+
+    journal = JobJournal(str(tmpdir.join("journal", "jobs.db")))
+    assert_that([job["job_id"] for job in journal.find_jobs(job_queue=QUEUE_ARN)]).is_equal_to(
+        ["job-1", "job-3", "job-2"]
+    )
+    assert_that(journal.find_jobs(job_status=["FAILED"], name_pattern="sweep-*")).is_equal_to(
+        [
+            {
+                "job_id": "job-2",
+                "name": "sweep-2",
+                "queue": "queue",
+                "status": "FAILED",
+                "status_reason": None,
+                "created_at": 2000,
+                "started_at": 2500,
+                "stopped_at": 4000,
+                "exit_code": 1,
+            }
+        ]
+    )
+    assert_that(
+        [job["job_id"] for job in journal.find_jobs(created_after=2500, job_ids=["job-2", "job-3"])]
+    ).is_equal_to(["job-3"])
@@ -0,0 +1,47 @@
+import hashlib
+
+from botocore.exceptions import ClientError
+
+from awsbatch.utils import S3Uploader
+
+
+def test_put_files(mocker, tmpdir):
+    boto3_factory = mocker.MagicMock()
+    s3_client = boto3_factory.get_client.return_value
+    file_paths = [str(tmpdir.join("input{0}.txt".format(index))) for index in range(3)]
+
+    S3Uploader(boto3_factory, "bucket", "job-folder/").put_files(file_paths)
+
+    assert sorted(s3_client.upload_file.call_args_list) == [
+        mocker.call(file_path, "bucket", "job-folder/input{0}.txt".format(index), Config=S3Uploader.TRANSFER_CONFIG)
+        for index, file_path in enumerate(file_paths)
+    ]
+
+
+def test_put_files_by_content(mocker, tmpdir):
+    boto3_factory = mocker.MagicMock()
+    s3_client = boto3_factory.get_client.return_value
+    existing_file = tmpdir.join("existing.txt")
+    existing_file.write("already uploaded")
+    new_file = tmpdir.join("new.txt")
+    new_file.write("new content")
+    existing_key = "inputs/" + hashlib.sha256(b"already uploaded").hexdigest()
+    new_key = "inputs/" + hashlib.sha256(b"new content").hexdigest()
+
+    def _head_object(Bucket, Key):  # noqa: N803
+        if Key != existing_key:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+    s3_client.head_object.side_effect = _head_object
+
+    uploader = S3Uploader(boto3_factory, "bucket")
+    keys = uploader.put_files_by_content([str(existing_file), str(new_file)], "inputs/")
+
+    assert keys == [existing_key, new_key]
+    s3_client.upload_file.assert_called_once_with(str(new_file), "bucket", new_key, Config=S3Uploader.TRANSFER_CONFIG)
+
+    # keys already checked or uploaded are not requested again
+    s3_client.reset_mock()
+    assert uploader.put_files_by_content([str(new_file)], "inputs/") == [new_key]
+    s3_client.head_object.assert_not_called()
+    s3_client.upload_file.assert_not_called()
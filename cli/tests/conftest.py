@@ -3,6 +3,7 @@ This module loads pytest fixtures and plugins needed by all tests.
 
 It's very useful for fixtures that need to be shared among all tests.
 """
+
 from __future__ import print_function
 
 import os
@@ -13,6 +14,11 @@ from botocore.stub import Stubber
 from jinja2 import Environment, FileSystemLoader
 
 
+def pytest_addoption(parser):
+    """Register argparse-style options and ini-style config values, called once at the beginning of a test run."""
+    parser.addoption("--benchmark-results", help="json file where to write the results of the benchmark tests")
+
+
 @pytest.fixture(autouse=True)
 def clear_env():
     if "AWS_DEFAULT_REGION" in os.environ:
@@ -155,6 +161,7 @@ DEFAULT_AWSBATCHCLICONFIG_MOCK_CONFIG = {
     "aws_access_key_id": "aws_access_key_id",
     "aws_secret_access_key": "aws_secret_access_key",
     "job_queue": "job_queue",
+    "job_journal": False,
 }
 
 
@@ -11,8 +11,10 @@ from pcluster.cli_commands.delete import (
     _get_unretained_cw_log_group_resource_keys,
     _persist_cloudwatch_log_groups,
     _persist_stack_resources,
+    _terminate_cluster_nodes,
     delete,
 )
+from tests.common import MockedBoto3Request
 
 FakePdeleteArgs = namedtuple("FakePdeleteArgs", "cluster_name config_file nowait keep_logs region")
 FAKE_CLUSTER_NAME = "cluster_name"
@@ -20,6 +22,11 @@ FAKE_STACK_NAME = utils.get_stack_name(FAKE_CLUSTER_NAME)
 LOG_GROUP_TYPE = "AWS::Logs::LogGroup"
 
 
+@pytest.fixture()
+def boto3_stubber_path():
+    return "pcluster.cli_commands.delete.boto3"
+
+
 def get_fake_pdelete_args(cluster_name="cluster_name", config_file=None, nowait=False, keep_logs=False, region=None):
     """Get a FakePdeleteArgs instance, with None used for any parameters not specified."""
     return FakePdeleteArgs(
@@ -183,3 +190,45 @@ def test_get_unretained_cw_log_group_resource_keys(template, expected_return):
     """Verify that commands._get_unretained_cw_log_group_resource_keys behaves as expected."""
     observed_return = _get_unretained_cw_log_group_resource_keys(template)
     assert_that(observed_return).is_equal_to(expected_return)
+
+
+def _describe_compute_nodes_request(instance_ids):
+    return MockedBoto3Request(
+        method="describe_instances",
+        response={"Reservations": [{"Instances": [{"InstanceId": instance_id} for instance_id in instance_ids]}]},
+        expected_params={
+            "Filters": [
+                {"Name": "tag:Application", "Values": [FAKE_STACK_NAME]},
+                {"Name": "instance-state-name", "Values": ["pending", "running", "stopping", "stopped"]},
+                {"Name": "tag:aws-parallelcluster-node-type", "Values": ["Compute"]},
+            ],
+            "MaxResults": 1000,
+        },
+    )
+
+
+@pytest.mark.parametrize("instances_count, expected_batches", [(0, 0), (1, 1), (1000, 1), (2500, 3)])
+def test_terminate_cluster_nodes(mocker, boto3_stubber, capsys, instances_count, expected_batches):
+    """Verify that the compute nodes are terminated in batches of up to 1,000 instances, until all are shutting down."""
+    mocker.patch("pcluster.cli_commands.delete.MAX_CONCURRENT_REQUESTS", 1)
+    sleep_mock = mocker.patch("pcluster.cli_commands.delete.time.sleep")
+    instance_ids = ["i-{0:017d}".format(index) for index in range(instances_count)]
+    mocked_requests = [_describe_compute_nodes_request(instance_ids)]
+    for index in range(expected_batches):
+        mocked_requests.append(
+            MockedBoto3Request(
+                method="terminate_instances",
+                response={},
+                expected_params={"InstanceIds": instance_ids[index * 1000 : (index + 1) * 1000]},
+            )
+        )
+    if instances_count:
+        # the shutting-down waiter finds no more active nodes
+        mocked_requests.append(_describe_compute_nodes_request([]))
+    boto3_stubber("ec2", mocked_requests)
+
+    _terminate_cluster_nodes(FAKE_STACK_NAME)
+
+    assert_that(sleep_mock.call_count).is_equal_to(1 if instances_count else 0)
+    if instances_count:
+        assert_that(capsys.readouterr().out).contains("Compute nodes terminated: {0}/{0}".format(instances_count))
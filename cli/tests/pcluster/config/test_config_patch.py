@@ -48,8 +48,21 @@ def _do_mocking_for_tests(mocker):
     )
 
 
+def _get_section_labels(config):
+    return {
+        section_key: list(config.get_sections(section_key).keys())
+        for section_key in config.get_section_keys(include_global_sections=True)
+    }
+
+
 def _check_patch(src_conf, dst_conf, expected_changes, expected_patch_policy):
+    src_section_labels = _get_section_labels(src_conf)
+    dst_section_labels = _get_section_labels(dst_conf)
     patch = ConfigPatch(base_config=src_conf, target_config=dst_conf)
+    # The patch must not change the configurations, including missing sections mocked for the comparison
+    assert_that(_get_section_labels(src_conf)).is_equal_to(src_section_labels)
+    assert_that(_get_section_labels(dst_conf)).is_equal_to(dst_section_labels)
+    assert_that(src_conf.auto_refresh).is_true()
     ignored_params = ["cluster_config_metadata"]
 
     changes = [change for change in patch.changes if change.param_key not in ignored_params]
@@ -345,7 +358,11 @@ def test_patch_check_cluster_resource_bucket(
     pcluster_config_reader,
 ):
     _do_mocking_for_tests(mocker)
-    mocker.patch("pcluster.config.update_policy._is_bucket_pcluster_generated", return_value=is_generated_bucket)
+    mocker.patch(
+        "pcluster.config.update_policy.ClusterRuntimeState.is_bucket_pcluster_generated",
+        new_callable=mocker.PropertyMock,
+        return_value=is_generated_bucket,
+    )
     expected_message_rows = [
         ["section", "parameter", "old value", "new value", "check", "reason", "action_needed"],
         # ec2_iam_role is to make sure other parameters are not affected by cluster_resource_bucket custom logic
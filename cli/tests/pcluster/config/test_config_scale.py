@@ -0,0 +1,274 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import os
+from timeit import default_timer
+
+import boto3
+import configparser
+import pytest
+from assertpy import assert_that
+
+from pcluster.cluster_model import ClusterModel
+from pcluster.config.config_patch import ConfigPatch
+from pcluster.config.hit_converter import HitConverter
+from pcluster.config.mappings import COMPUTE_RESOURCE, QUEUE
+from pcluster.config.pcluster_config import PclusterConfig
+from pcluster.utils import Cache
+
+# Benchmark of the config engine on synthetic configurations, run with --benchmark-results=<file> to store the
+# timings in json format for trend tracking.
+
+# (queues, compute resources per queue, ebs sections) of the synthetic configurations.
+# Queues and compute resources are raised over their max_resources to grow the configurations,
+# EBS sections cannot exceed 5 because every volume is a parameter of the CloudFormation template.
+SCALES = [(1, 1, 1), (5, 3, 5), (20, 5, 5)]
+EBS_SCALES = [1, 3, 5]
+
+REGION = "us-east-1"
+KEY_NAME = "key"
+VPC_ID = "vpc-12345678"
+SUBNET_ID = "subnet-12345678"
+HEAD_NODE_INSTANCE_TYPE = "c5.xlarge"
+COMPUTE_INSTANCE_TYPES = [
+    "c5.large",
+    "c5.2xlarge",
+    "c5.4xlarge",
+    "c5.9xlarge",
+    "c5.12xlarge",
+    "c5.18xlarge",
+    "c5.24xlarge",
+    "c5.metal",
+]
+
+
+def _get_instance_type_info(instance_type):
+    return {
+        "InstanceType": instance_type,
+        "VCpuInfo": {"DefaultVCpus": 4, "DefaultCores": 2, "DefaultThreadsPerCore": 2},
+        "NetworkInfo": {"EfaSupported": False, "MaximumNetworkCards": 1, "MaximumNetworkInterfaces": 4},
+        "ProcessorInfo": {"SupportedArchitectures": ["x86_64"]},
+    }
+
+
+# Responses of the AWS calls done by the config engine, built from the call parameters
+FAKE_AWS_RESPONSES = {
+    "DescribeInstanceTypeOfferings": lambda params: {
+        "InstanceTypeOfferings": [
+            {"InstanceType": instance_type} for instance_type in [HEAD_NODE_INSTANCE_TYPE] + COMPUTE_INSTANCE_TYPES
+        ]
+    },
+    "DescribeInstanceTypes": lambda params: {
+        "InstanceTypes": [_get_instance_type_info(instance_type) for instance_type in params.get("InstanceTypes")]
+    },
+    "DescribeKeyPairs": lambda params: {"KeyPairs": [{"KeyName": KEY_NAME}]},
+    "DescribeSubnets": lambda params: {
+        "Subnets": [
+            {"SubnetId": subnet_id, "VpcId": VPC_ID, "AvailabilityZone": REGION + "a"}
+            for subnet_id in params.get("SubnetIds")
+        ]
+    },
+    "DescribeVpcs": lambda params: {"Vpcs": [{"VpcId": VPC_ID}]},
+    "DescribeVpcAttribute": lambda params: {
+        "VpcId": VPC_ID,
+        "EnableDnsSupport": {"Value": True},
+        "EnableDnsHostnames": {"Value": True},
+    },
+}
+
+
+class _FakeHttpResponse(object):
+    status_code = 200
+
+
+@pytest.fixture(scope="module")
+def benchmark_results(request):
+    """Collect the results of the module and write them to the file specified with --benchmark-results."""
+    results = []
+    yield results
+    results_file = request.config.getoption("--benchmark-results")
+    if results_file:
+        with open(results_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+@pytest.fixture()
+def aws_calls(mocker):
+    """
+    Serve the AWS calls of the boto3 clients with the FAKE_AWS_RESPONSES.
+
+    The clients are real ones, so parameters and pagination are handled as usual, but the calls are answered
+    before reaching AWS.
+    :return: the list of the names of the AWS calls done
+    """
+    calls = []
+
+    def _store_params(params, context, **kwargs):
+        context["api_params"] = params
+
+    def _respond(model, context, **kwargs):
+        calls.append(model.name)
+        assert_that(FAKE_AWS_RESPONSES, description="Unexpected AWS call").contains_key(model.name)
+        return _FakeHttpResponse(), FAKE_AWS_RESPONSES[model.name](context["api_params"])
+
+    session = boto3.Session(region_name=REGION, aws_access_key_id="fake", aws_secret_access_key="fake")
+    session.events.register("before-parameter-build.*.*", _store_params)
+    session.events.register("before-call.*.*", _respond)
+    mocker.patch.object(boto3, "DEFAULT_SESSION", session)
+    mocker.patch.dict(os.environ, {"AWS_DEFAULT_REGION": REGION})
+    # The dry run of the cluster instances is not part of the config engine
+    mocker.patch.object(PclusterConfig, "_PclusterConfig__test_configuration")
+
+    # cached results must not be shared with other scales and other tests
+    Cache.clear_all()
+    yield calls
+    Cache.clear_all()
+
+
+def _measure(benchmark_results, aws_calls, scale, operation, function, *args, **kwargs):
+    """Call the function and add its execution time to the benchmark results."""
+    queues, compute_resources, ebs_sections = scale
+    calls_before = len(aws_calls)
+    start = default_timer()
+    result = function(*args, **kwargs)
+    benchmark_results.append(
+        {
+            "operation": operation,
+            "queues": queues,
+            "compute_resources": compute_resources,
+            "ebs_sections": ebs_sections,
+            "seconds": round(default_timer() - start, 6),
+            "aws_calls": len(aws_calls) - calls_before,
+        }
+    )
+    return result
+
+
+def _write_config_file(config_file, cluster_section_dict, queues=0, compute_resources=0, ebs_sections=0, max_count=10):
+    """Write a configuration file with the given number of queue, compute_resource and ebs sections."""
+    config_parser_dict = {
+        "aws": {"aws_region_name": REGION},
+        "global": {"cluster_template": "default"},
+        "cluster default": dict(
+            {
+                "key_name": KEY_NAME,
+                "base_os": "alinux2",
+                "scheduler": "slurm",
+                "master_instance_type": HEAD_NODE_INSTANCE_TYPE,
+                "vpc_settings": "default",
+            },
+            **cluster_section_dict
+        ),
+        "vpc default": {"vpc_id": VPC_ID, "master_subnet_id": SUBNET_ID},
+    }
+    if queues:
+        config_parser_dict["cluster default"]["queue_settings"] = ",".join(
+            "queue{0}".format(queue) for queue in range(queues)
+        )
+    for queue in range(queues):
+        compute_resource_labels = ["queue{0}-cr{1}".format(queue, cr) for cr in range(compute_resources)]
+        config_parser_dict["queue queue{0}".format(queue)] = {
+            "compute_resource_settings": ",".join(compute_resource_labels)
+        }
+        for compute_resource_label, instance_type in zip(compute_resource_labels, COMPUTE_INSTANCE_TYPES):
+            config_parser_dict["compute_resource {0}".format(compute_resource_label)] = {
+                "instance_type": instance_type,
+                "max_count": str(max_count),
+            }
+    if ebs_sections:
+        config_parser_dict["cluster default"]["ebs_settings"] = ",".join(
+            "ebs{0}".format(ebs) for ebs in range(ebs_sections)
+        )
+    for ebs in range(ebs_sections):
+        config_parser_dict["ebs ebs{0}".format(ebs)] = {"shared_dir": "/shared{0}".format(ebs), "volume_size": "20"}
+
+    config_parser = configparser.ConfigParser()
+    config_parser.read_dict(config_parser_dict)
+    with open(config_file, "w") as f:
+        config_parser.write(f)
+    return config_file
+
+
+@pytest.mark.parametrize("scale", SCALES)
+def test_hit_config_scale(mocker, tmpdir, aws_calls, benchmark_results, scale):
+    queues, compute_resources, ebs_sections = scale
+    mocker.patch.dict(QUEUE, {"max_resources": max(QUEUE.get("max_resources"), queues)})
+    mocker.patch.dict(
+        COMPUTE_RESOURCE, {"max_resources": max(COMPUTE_RESOURCE.get("max_resources"), compute_resources)}
+    )
+    config_file = _write_config_file(str(tmpdir / "base.ini"), {}, queues, compute_resources, ebs_sections)
+    target_config_file = _write_config_file(
+        str(tmpdir / "target.ini"), {}, queues, compute_resources, ebs_sections, max_count=20
+    )
+
+    pcluster_config = _measure(
+        benchmark_results,
+        aws_calls,
+        scale,
+        "load",
+        PclusterConfig,
+        config_file=config_file,
+        fail_on_file_absence=True,
+        fail_on_error=True,
+    )
+    assert_that(pcluster_config.get_sections("queue")).is_length(queues)
+    assert_that(pcluster_config.get_sections("compute_resource")).is_length(queues * compute_resources)
+    assert_that(pcluster_config.get_sections("ebs")).is_length(ebs_sections)
+    # AWS-derived defaults are computed only when read for validation or storage
+    assert_that(aws_calls).is_empty()
+
+    _measure(benchmark_results, aws_calls, scale, "refresh", pcluster_config.refresh)
+    _measure(benchmark_results, aws_calls, scale, "validate", pcluster_config.validate)
+    storage_data = _measure(benchmark_results, aws_calls, scale, "to_storage", pcluster_config.to_storage)
+    assert_that(storage_data.json_params["cluster"]["queue_settings"]).is_length(queues)
+
+    pcluster_config.config_file = str(tmpdir / "output.ini")
+    _measure(benchmark_results, aws_calls, scale, "to_file", pcluster_config.to_file)
+    assert_that(os.path.isfile(pcluster_config.config_file)).is_true()
+
+    target_config = PclusterConfig(config_file=target_config_file, fail_on_file_absence=True, fail_on_error=True)
+    patch = _measure(benchmark_results, aws_calls, scale, "config_patch", ConfigPatch, pcluster_config, target_config)
+    max_count_changes = [change for change in patch.changes if change.param_key == "max_count"]
+    assert_that(max_count_changes).is_length(queues * compute_resources)
+
+
+@pytest.mark.parametrize("ebs_sections", EBS_SCALES)
+def test_sit_config_conversion_scale(tmpdir, aws_calls, benchmark_results, ebs_sections):
+    scale = (0, 0, ebs_sections)
+    config_file = _write_config_file(
+        str(tmpdir / "sit.ini"),
+        {"compute_instance_type": COMPUTE_INSTANCE_TYPES[0], "max_queue_size": "10"},
+        ebs_sections=ebs_sections,
+    )
+    pcluster_config = _measure(
+        benchmark_results,
+        aws_calls,
+        scale,
+        "load",
+        PclusterConfig,
+        config_file=config_file,
+        fail_on_file_absence=True,
+        fail_on_error=True,
+    )
+    assert_that(pcluster_config.cluster_model).is_equal_to(ClusterModel.SIT)
+    assert_that(aws_calls).is_empty()
+
+    conversion_done, _ = _measure(
+        benchmark_results,
+        aws_calls,
+        scale,
+        "hit_conversion",
+        HitConverter(pcluster_config).convert,
+        prepare_to_file=True,
+    )
+    assert_that(conversion_done).is_true()
+    assert_that(pcluster_config.cluster_model).is_equal_to(ClusterModel.HIT)
+    assert_that(pcluster_config.get_sections("ebs")).is_length(ebs_sections)
@@ -178,8 +178,8 @@ def test_config_from_json(mocker, boto3_stubber, test_datadir, pcluster_config_r
     # Created expected json params based on active queues
     expected_json_params = _prepare_json_config(queues, test_datadir)
 
-    # Mock expected boto3 calls
-    _mock_boto3(boto3_stubber, expected_json_params, head_node_instance_type="t2.micro")
+    # Mock expected boto3 calls, the head node instance type is not described since its NICs count is never read
+    _mock_boto3(boto3_stubber, expected_json_params)
 
     pcluster_config = get_mocked_pcluster_config(mocker, auto_refresh=False)
     cluster_section = CfnSection(CLUSTER_HIT, pcluster_config, section_label="default")
@@ -13,9 +13,10 @@ import pytest
 from assertpy import assert_that
 
 import tests.pcluster.config.utils as utils
-from pcluster.config.cfn_param_types import CfnParam, CfnSection, VolumeSizeParam
-from pcluster.config.mappings import EBS
-from pcluster.config.param_types import Param
+from pcluster.config.cfn_param_types import CfnParam, CfnSection, HeadNodeInstanceTypeCfnParam, VolumeSizeParam
+from pcluster.config.mappings import CLUSTER_HIT, EBS
+from pcluster.config.param_types import LazyDefault, Param, get_validation_plan
+from pcluster.config.validators import kms_key_validator, queue_settings_validator, settings_validator
 
 
 class TestParam:
@@ -61,7 +62,9 @@ def test_volume_size_refresh(mocker, section_dict, expected_value):
     mocked_pcluster_config = utils.get_mocked_pcluster_config(mocker)
     ebs_section = CfnSection(EBS, mocked_pcluster_config, "default")
     for param_key, param_value in section_dict.items():
-        param = EBS.get("params").get(param_key).get("type", CfnParam)
+        param_definition = EBS.get("params").get(param_key)
+        param_type = param_definition.get("type", CfnParam)
+        param = param_type("ebs", "default", param_key, param_definition, mocked_pcluster_config, ebs_section)
         param.value = param_value
         ebs_section.set_param(param_key, param)
     mocked_pcluster_config.add_section(ebs_section)
@@ -94,3 +97,51 @@ def test_volume_size_refresh(mocker, section_dict, expected_value):
 
     volume_size.refresh()
     assert_that(volume_size.value).is_equal_to(expected_value)
+
+
+def test_lazy_default_value(mocker):
+    get_default_instance_type_mock = mocker.patch(
+        "pcluster.config.cfn_param_types.get_default_instance_type", return_value="t2.micro"
+    )
+    mocked_pcluster_config = utils.get_mocked_pcluster_config(mocker)
+    params = [
+        HeadNodeInstanceTypeCfnParam(
+            section_key="cluster",
+            section_label="default",
+            param_key="master_instance_type",
+            param_definition=CLUSTER_HIT.get("params").get("master_instance_type"),
+            pcluster_config=mocked_pcluster_config,
+        )
+        for _ in range(2)
+    ]
+    for param in params:
+        param.refresh()
+
+    # default values computed by the same function are compared without being computed
+    assert_that(params[0]).is_equal_to(params[1])
+    assert_that(params[0].unresolved_value).is_instance_of(LazyDefault)
+    get_default_instance_type_mock.assert_not_called()
+
+    assert_that(params[0].value).is_equal_to("t2.micro")
+    assert_that(params[0].value).is_equal_to("t2.micro")
+    get_default_instance_type_mock.assert_called_once()
+
+
+def test_validation_plan():
+    ebs_validation_plan = get_validation_plan(EBS)
+    assert_that(ebs_validation_plan.section_validators).is_equal_to(tuple(EBS.get("validators")))
+    # params without validators are not validated
+    assert_that(list(ebs_validation_plan.param_validators.keys())).is_equal_to(
+        ["shared_dir", "ebs_kms_key_id", "ebs_volume_id"]
+    )
+    assert_that(ebs_validation_plan.param_validators.get("ebs_kms_key_id")).is_equal_to((kms_key_validator,))
+    assert_that(ebs_validation_plan.valid_default_keys).contains("shared_dir", "ebs_kms_key_id", "ebs_volume_id")
+    assert_that(ebs_validation_plan.valid_default_keys).does_not_contain("volume_type", "volume_throughput")
+
+    # settings params are validated also by the settings validator
+    cluster_validation_plan = get_validation_plan(CLUSTER_HIT)
+    assert_that(cluster_validation_plan.param_validators.get("queue_settings")).is_equal_to(
+        (queue_settings_validator, settings_validator)
+    )
+    assert_that(cluster_validation_plan.param_validators).contains_key("vpc_settings")
+    assert_that(cluster_validation_plan.valid_default_keys).does_not_contain("queue_settings", "vpc_settings")
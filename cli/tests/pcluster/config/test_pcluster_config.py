@@ -8,11 +8,20 @@
 # or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
 # OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
 # limitations under the License.
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from io import BytesIO
+
 import configparser
 import pytest
 from assertpy import assert_that
 from pytest import fail
 
+from pcluster.config.cfn_param_types import ClusterCfnSection, HeadNodeInstanceTypeCfnParam, VolumeSizeParam
+from pcluster.config.mappings import EBS
 from tests.common import MockedBoto3Request
 from tests.pcluster.config.utils import get_mocked_pcluster_config, init_pcluster_config_from_configparser
 
@@ -107,6 +116,73 @@ def test_load_json_config(mocker, cfn_params_dict, version, expected_json):
     assert_that(pcluster_config._PclusterConfig__load_json_config(cfn_stack)).is_equal_to(expected_json)
 
 
+def test_retrieve_cluster_config_cache(mocker, tmpdir):
+    mocker.patch("pcluster.config.pcluster_config.CLUSTER_CONFIG_CACHE_DIR", str(tmpdir))
+    boto3_mock = mocker.patch("pcluster.config.pcluster_config.boto3")
+    get_item_mock = boto3_mock.resource.return_value.Table.return_value.get_item
+    s3_get_mock = boto3_mock.resource.return_value.Object.return_value.get
+    s3_get_mock.side_effect = lambda VersionId: {
+        "Body": BytesIO(json.dumps({"cluster": {"version": VersionId}}).encode("utf-8")),
+        "VersionId": VersionId,
+    }
+    pcluster_config = get_mocked_pcluster_config(mocker)
+    pcluster_config.cluster_name = "test"
+
+    for config_version, expected_downloads in [("v1", 1), ("v1", 1), ("v2", 2), ("v1", 3)]:
+        get_item_mock.return_value = {"Item": {"Id": "CLUSTER_CONFIG", "Version": config_version}}
+        json_config = pcluster_config._PclusterConfig__retrieve_cluster_config("bucket", "artifact_dir")
+        assert_that(json_config).is_equal_to({"cluster": {"version": config_version}})
+        # the config is downloaded only if the cached one is of a different version
+        assert_that(s3_get_mock.call_count).is_equal_to(expected_downloads)
+
+    # the config version retrieved together with the stack is used, if there
+    config_version_item = Future()
+    config_version_item.set_result({"Item": {"Id": "CLUSTER_CONFIG", "Version": "v1"}})
+    pcluster_config._PclusterConfig__config_version_item = config_version_item
+    get_item_mock.reset_mock()
+    json_config = pcluster_config._PclusterConfig__retrieve_cluster_config("bucket", "artifact_dir")
+    assert_that(json_config).is_equal_to({"cluster": {"version": "v1"}})
+    get_item_mock.assert_not_called()
+    assert_that(s3_get_mock.call_count).is_equal_to(3)
+
+
+def test_unused_config_version_item(mocker, caplog):
+    caplog.set_level(logging.DEBUG, logger="pcluster.config.pcluster_config")
+    get_item_called = threading.Event()
+
+    def _get_item(**kwargs):
+        get_item_called.set()
+        raise Exception("throttled")
+
+    def _get_stack(stack_name):
+        # the json config is not loaded for SIT clusters
+        get_item_called.wait(5)
+        return {
+            "Parameters": [{"ParameterKey": "Scheduler", "ParameterValue": "awsbatch"}],
+            "Tags": [{"Key": "Version", "Value": "2.10.1"}],
+        }
+
+    boto3_mock = mocker.patch("pcluster.config.pcluster_config.boto3")
+    boto3_mock.resource.return_value.Table.return_value.get_item.side_effect = _get_item
+    mocker.patch("pcluster.config.pcluster_config.get_stack", side_effect=_get_stack)
+    mocker.patch("pcluster.config.pcluster_config.ClusterCfnSection")
+    pcluster_config = get_mocked_pcluster_config(mocker)
+    mocker.patch.object(pcluster_config, "add_section")
+    mocker.patch.object(pcluster_config, "_PclusterConfig__enforce_version", False)
+
+    pcluster_config._PclusterConfig__init_sections_from_cfn("test")
+
+    assert_that(pcluster_config._PclusterConfig__config_version_item).is_none()
+    # the error of the unused retrieval is logged once the retrieval is completed
+    for _ in range(50):
+        if "throttled" in caplog.text:
+            break
+        time.sleep(0.1)
+    assert_that(caplog.text).contains(
+        "Failed when retrieving unused cluster config version from DynamoDB with error throttled"
+    )
+
+
 @pytest.mark.parametrize(
     "config_parser_dict, expected_message",
     [
@@ -143,3 +219,71 @@ def test_load_from_file_errors(capsys, config_parser_dict, expected_message):
             assert_that(e.args[0]).matches(expected_message)
         else:
             fail("Unexpected failure when loading file")
+
+
+def test_incremental_refresh(mocker):
+    """Verify that structural changes refresh only the sections and params depending on them."""
+    mocker.patch("pcluster.config.cfn_param_types.get_default_instance_type", return_value="t2.micro")
+    mocker.patch("pcluster.config.cfn_param_types.InstanceTypeInfo.init_from_instance_type")
+    pcluster_config = get_mocked_pcluster_config(mocker, auto_refresh=True)
+    cluster_section = pcluster_config.get_section("cluster")
+    head_node_instance_type_refresh = mocker.spy(HeadNodeInstanceTypeCfnParam, "refresh")
+    volume_size_refresh = mocker.spy(VolumeSizeParam, "refresh")
+
+    for label in ["ebs1", "ebs2"]:
+        pcluster_config.add_section(EBS.get("type")(EBS, pcluster_config, section_label=label))
+
+    # only the added sections are refreshed entirely
+    assert_that(volume_size_refresh.call_count).is_equal_to(2)
+    assert_that(head_node_instance_type_refresh.call_count).is_equal_to(0)
+    assert_that(pcluster_config.get_section("ebs", "ebs1").get_param_value("volume_size")).is_equal_to(20)
+    # params depending on the structure are refreshed
+    assert_that(cluster_section.get_param_value("ebs_settings")).is_equal_to("ebs1,ebs2")
+    assert_that(cluster_section.get_param_value("cluster_config_metadata")["sections"]["ebs"][:2]).is_equal_to(
+        ["ebs1", "ebs2"]
+    )
+
+    pcluster_config.get_section("ebs", "ebs2").label = "ebs3"
+    assert_that(pcluster_config.get_section("ebs", "ebs3")).is_not_none()
+    assert_that(cluster_section.get_param_value("ebs_settings")).is_equal_to("ebs1,ebs3")
+    assert_that(volume_size_refresh.call_count).is_equal_to(3)
+
+    pcluster_config.remove_section("ebs", "ebs1")
+    assert_that(cluster_section.get_param_value("ebs_settings")).is_equal_to("ebs3")
+    assert_that(volume_size_refresh.call_count).is_equal_to(3)
+    assert_that(head_node_instance_type_refresh.call_count).is_equal_to(0)
+
+    # explicit refresh still refreshes everything
+    pcluster_config.refresh()
+    assert_that(volume_size_refresh.call_count).is_equal_to(4)
+    assert_that(head_node_instance_type_refresh.call_count).is_equal_to(1)
+
+
+def test_storage_data_memoization(mocker):
+    """Verify that the storage data is computed again only when the configuration changes."""
+    mocker.patch("pcluster.config.cfn_param_types.get_default_instance_type", return_value="t2.micro")
+    mocker.patch("pcluster.config.cfn_param_types.InstanceTypeInfo.init_from_instance_type")
+    pcluster_config = get_mocked_pcluster_config(mocker, auto_refresh=True)
+    cluster_to_storage = mocker.spy(ClusterCfnSection, "to_storage")
+
+    cfn_params = pcluster_config.to_cfn()
+    # callers can update the returned params without affecting the next calls
+    cfn_params["KeyName"] = "modified"
+    assert_that(pcluster_config.to_storage().cfn_params).is_equal_to(dict(cfn_params, KeyName="NONE"))
+    assert_that(cluster_to_storage.call_count).is_equal_to(1)
+
+    # param changes
+    pcluster_config.get_section("cluster").get_param("key_name").value = "key"
+    assert_that(pcluster_config.to_cfn()["KeyName"]).is_equal_to("key")
+    assert_that(cluster_to_storage.call_count).is_equal_to(2)
+    pcluster_config.get_section("cluster").get_param("key_name").value = "key"
+    pcluster_config.to_cfn()
+    assert_that(cluster_to_storage.call_count).is_equal_to(2)
+
+    # section changes
+    pcluster_config.add_section(EBS.get("type")(EBS, pcluster_config, section_label="ebs1"))
+    assert_that(pcluster_config.to_cfn()["NumberOfEBSVol"]).is_equal_to("1")
+    assert_that(cluster_to_storage.call_count).is_equal_to(3)
+    pcluster_config.add_section(EBS.get("type")(EBS, pcluster_config, section_label="ebs2"))
+    assert_that(pcluster_config.to_cfn()["NumberOfEBSVol"]).is_equal_to("2")
+    assert_that(cluster_to_storage.call_count).is_equal_to(4)
@@ -16,6 +16,7 @@ from assertpy import assert_that
 
 import tests.pcluster.config.utils as utils
 from pcluster.config.mappings import ALIASES, AWS, CLUSTER_SIT, CW_LOG, DCV, EBS, EFS, FSX, GLOBAL, RAID, SCALING, VPC
+from pcluster.config.param_types import Param
 from tests.pcluster.config.defaults import CFN_CLI_RESERVED_PARAMS, CFN_SIT_CONFIG_NUM_OF_PARAMS, DefaultCfnParams
 
 EXISTING_SECTIONS = [ALIASES, AWS, CLUSTER_SIT, CW_LOG, DCV, EBS, EFS, FSX, GLOBAL, RAID, SCALING, VPC]
@@ -104,6 +105,21 @@ def test_defaults_consistency():
                 assert_that(default_value, description=param_key).is_equal_to(default_cfn_values.get(param_key, None))
 
 
+def test_lazy_default_params_consistency():
+    """Verify that the params changing the configuration when created or refreshed are not created lazily."""
+    # import the modules defining the Param classes
+    import pcluster.config.cfn_param_types  # noqa: F401
+    import pcluster.config.json_param_types  # noqa: F401
+
+    param_types = [Param]
+    for param_type in param_types:
+        param_types.extend(param_type.__subclasses__())
+        if any(method in vars(param_type) for method in ["refresh", "_from_definition"]) and param_type != Param:
+            assert_that(param_type.lazy_default, description=param_type.__name__).is_false()
+        # params must not carry their own attribute dictionary
+        assert_that(vars(param_type), description=param_type.__name__).contains_key("__slots__")
+
+
 def _get_pcluster_cfn_json():
     """Get main ParallelCluster CFN json file."""
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,7 +11,7 @@
 import pytest
 from assertpy import assert_that
 
-from pcluster.config.update_policy import UpdatePolicy
+from pcluster.config.update_policy import ClusterRuntimeState, UpdatePolicy
 
 
 @pytest.mark.parametrize(
@@ -24,13 +24,15 @@ def test_max_queue_size_policies(mocker, is_fleet_stopped, old_max, new_max, exp
     )
     patch_mock = mocker.MagicMock()
     patch_mock.stack_name = "stack_name"
+    patch_mock.runtime_state = ClusterRuntimeState("stack_name", stack={"StackName": "stack_name"})
     change_mock = mocker.MagicMock()
     change_mock.new_value = new_max
     change_mock.old_value = old_max
 
     assert_that(UpdatePolicy.MAX_COUNT.condition_checker(change_mock, patch_mock)).is_equal_to(expected_result)
     assert_that(UpdatePolicy.MAX_QUEUE_SIZE.condition_checker(change_mock, patch_mock)).is_equal_to(expected_result)
-    cluster_has_running_capacity_mock.assert_called_with("stack_name")
+    # the runtime state is retrieved once for all the checks
+    cluster_has_running_capacity_mock.assert_called_once_with("stack_name", {"StackName": "stack_name"})
 
 
 @pytest.mark.parametrize(
@@ -50,6 +52,7 @@ def test_min_count_policy(mocker, is_fleet_stopped, old_min_max, new_min_max, ex
     )
     patch_mock = mocker.MagicMock()
     patch_mock.stack_name = "stack_name"
+    patch_mock.runtime_state = ClusterRuntimeState("stack_name", stack={"StackName": "stack_name"})
     base_config_section_mock = mocker.MagicMock()
     base_config_section_mock.get_param_value = mocker.MagicMock(return_value=old_min_max[1])
     patch_mock.base_config.get_section = mocker.MagicMock(return_value=base_config_section_mock)
@@ -61,4 +64,5 @@ def test_min_count_policy(mocker, is_fleet_stopped, old_min_max, new_min_max, ex
     change_mock.old_value = old_min_max[0]
 
     assert_that(UpdatePolicy.MIN_COUNT.condition_checker(change_mock, patch_mock)).is_equal_to(expected_result)
-    cluster_has_running_capacity_mock.assert_called_with("stack_name")
+    # the runtime state is retrieved once for all the checks
+    cluster_has_running_capacity_mock.assert_called_once_with("stack_name", {"StackName": "stack_name"})
@@ -0,0 +1,176 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import importlib
+import json
+import os
+import sys
+
+import pytest
+from assertpy import assert_that
+
+import pcluster
+
+CUSTOM_RESOURCES_CODE_DIR = os.path.join(
+    os.path.dirname(pcluster.__file__), "resources", "custom_resources", "custom_resources_code"
+)
+FUNCTION_ARN = "arn:aws:lambda:us-east-1:123456789012:function:cleanup"
+
+
+class FakeContext(object):
+    """Lambda context returning the given remaining times, the last one is returned once the others are consumed."""
+
+    invoked_function_arn = FUNCTION_ARN
+
+    def __init__(self, remaining_seconds):
+        self.remaining_seconds = list(remaining_seconds)
+
+    def get_remaining_time_in_millis(self):
+        seconds = self.remaining_seconds.pop(0) if len(self.remaining_seconds) > 1 else self.remaining_seconds[0]
+        return seconds * 1000
+
+
+@pytest.fixture()
+def cleanup_resources(mocker):
+    # the Lambda code imports crhelper from the function directory
+    mocker.patch.object(sys, "path", [CUSTOM_RESOURCES_CODE_DIR] + sys.path)
+    module = importlib.import_module("cleanup_resources")
+    # the crhelper clients are created at import time, when the region can be missing
+    mocker.patch.object(module.helper, "_init_failed", None)
+    mocker.patch.object(module.helper, "_send")
+    return module
+
+
+@pytest.fixture()
+def aws_clients(mocker, cleanup_resources):
+    clients = {service: mocker.MagicMock() for service in ["s3", "lambda", "ec2"]}
+    clients["s3"].exceptions.NoSuchBucket = type("NoSuchBucket", (Exception,), {})
+    mocker.patch.object(cleanup_resources.boto3, "client", side_effect=lambda service, **kwargs: clients[service])
+    return clients
+
+
+def _get_event(resource_properties, **kwargs):
+    return dict(
+        {
+            "RequestType": "Delete",
+            "StackId": "arn:aws:cloudformation:us-east-1:123456789012:stack/cluster/id",
+            "RequestId": "request-id",
+            "LogicalResourceId": "CleanupResources",
+            "PhysicalResourceId": "physical-id",
+            "ResponseURL": "https://response.url",
+            "ResourceProperties": resource_properties,
+        },
+        **kwargs
+    )
+
+
+def _s3_event(**kwargs):
+    return _get_event(
+        {
+            "Action": "DELETE_S3_ARTIFACTS",
+            "ResourcesS3Bucket": "bucket",
+            "ArtifactS3RootDirectory": "artifacts",
+            "RemoveBucketOnDeletion": "True",
+        },
+        **kwargs
+    )
+
+
+def _versions_page(keys, truncated=True):
+    page = {"Versions": [{"Key": key, "VersionId": "v1"} for key in keys], "IsTruncated": truncated}
+    if truncated:
+        page.update({"NextKeyMarker": keys[-1], "NextVersionIdMarker": "v1"})
+    return page
+
+
+def test_timeout_continues_cleanup(mocker, cleanup_resources, aws_clients):
+    # every deletion is completed before listing the next page
+    mocker.patch.object(cleanup_resources, "MAX_CONCURRENT_REQUESTS", 1)
+    aws_clients["s3"].list_object_versions.side_effect = [_versions_page(["a", "b"]), _versions_page(["c"])]
+    aws_clients["s3"].delete_objects.return_value = {}
+    event = _s3_event(**{cleanup_resources.CHECKPOINT_KEY: {"deleted_objects": 5}})
+
+    # the remaining time is read by the crhelper timer and before listing every page
+    cleanup_resources.handler(event, FakeContext([900, 900, 900, 30]))
+
+    # the deletions of the listed pages are counted in the checkpoint before continuing
+    aws_clients["lambda"].invoke.assert_called_once()
+    invoke_args = aws_clients["lambda"].invoke.call_args[1]
+    assert_that(invoke_args).contains_entry({"FunctionName": FUNCTION_ARN}, {"InvocationType": "Event"})
+    continuation_event = json.loads(invoke_args["Payload"])
+    assert_that(continuation_event[cleanup_resources.CHECKPOINT_KEY]).is_equal_to({"deleted_objects": 8})
+    assert_that(continuation_event["CleanupInvocation"]).is_equal_to(2)
+    assert_that(continuation_event).does_not_contain_key(cleanup_resources.CONTINUED_KEY)
+    aws_clients["s3"].delete_bucket.assert_not_called()
+    # the response is sent by the continuation
+    cleanup_resources.helper._send.assert_not_called()
+
+
+def test_max_invocations_fails_cleanup(cleanup_resources, aws_clients):
+    event = _s3_event(**{"CleanupInvocation": cleanup_resources.MAX_INVOCATIONS})
+
+    cleanup_resources.handler(event, FakeContext([900, 30]))
+
+    aws_clients["lambda"].invoke.assert_not_called()
+    cleanup_resources.helper._send.assert_called_once_with()
+    assert_that(cleanup_resources.helper.Status).is_equal_to("FAILED")
+    assert_that(cleanup_resources.helper.Reason).is_equal_to("Cleanup not completed before the Lambda timeout")
+
+
+@pytest.mark.parametrize(
+    "resource_properties, error",
+    [({"Action": "UNSUPPORTED"}, "Unsupported action UNSUPPORTED"), ({}, "'Action'")],
+    ids=["unsupported_action", "missing_action"],
+)
+def test_invalid_action_fails_cleanup(cleanup_resources, aws_clients, resource_properties, error):
+    event = _get_event(resource_properties)
+
+    cleanup_resources.handler(event, FakeContext([900]))
+
+    cleanup_resources.helper._send.assert_called_once_with()
+    assert_that(cleanup_resources.helper.Status).is_equal_to("FAILED")
+    assert_that(cleanup_resources.helper.Reason).is_equal_to(error)
+    assert_that(cleanup_resources.helper.Reason).is_equal_to(error)
+
+
+def _ec2_event(**kwargs):
+    return _get_event({"Action": "TERMINATE_EC2_INSTANCES", "StackName": "cluster"}, **kwargs)
+
+
+def test_timeout_before_placement_groups_delay(mocker, cleanup_resources, aws_clients):
+    sleep_mock = mocker.patch.object(cleanup_resources.time, "sleep")
+    aws_clients["ec2"].get_paginator.return_value.paginate.return_value = [{"Reservations": []}]
+    event = _ec2_event(**{cleanup_resources.CHECKPOINT_KEY: {"phase": "waiting"}})
+
+    cleanup_resources.handler(event, FakeContext([900, 30]))
+
+    sleep_mock.assert_not_called()
+    continuation_event = json.loads(aws_clients["lambda"].invoke.call_args[1]["Payload"])
+    assert_that(continuation_event[cleanup_resources.CHECKPOINT_KEY]).is_equal_to({"phase": "terminated"})
+    cleanup_resources.helper._send.assert_not_called()
+
+    # the continuation completes the cleanup without waiting again
+    cleanup_resources.handler(continuation_event, FakeContext([900]))
+
+    sleep_mock.assert_not_called()
+    aws_clients["ec2"].terminate_instances.assert_not_called()
+    cleanup_resources.helper._send.assert_called_once_with()
+    assert_that(cleanup_resources.helper.Status).is_equal_to("SUCCESS")
+
+
+def test_placement_groups_delay(mocker, cleanup_resources, aws_clients):
+    sleep_mock = mocker.patch.object(cleanup_resources.time, "sleep")
+    aws_clients["ec2"].get_paginator.return_value.paginate.return_value = [{"Reservations": []}]
+
+    cleanup_resources.handler(_ec2_event(), FakeContext([900]))
+
+    sleep_mock.assert_called_once_with(cleanup_resources.PLACEMENT_GROUPS_UPDATE_DELAY)
+    cleanup_resources.helper._send.assert_called_once_with()
+    assert_that(cleanup_resources.helper.Status).is_equal_to("SUCCESS")
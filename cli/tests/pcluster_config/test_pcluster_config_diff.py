@@ -0,0 +1,75 @@
+# Copyright 2021 Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"). You may not use this file except in compliance
+# with the License. A copy of the License is located at
+#
+# http://aws.amazon.com/apache2.0/
+#
+# or in the "LICENSE.txt" file accompanying this file. This file is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES
+# OR CONDITIONS OF ANY KIND, express or implied. See the License for the specific language governing permissions and
+# limitations under the License.
+import pytest
+from assertpy import assert_that
+
+from pcluster_config import cli
+
+
+@pytest.mark.parametrize(
+    "target_config_file, expected_exit_code, expected_output",
+    [
+        # Different order of sections, params and settings labels, default values explicitly set
+        ("reordered.ini", 0, "No differences found.\n"),
+        (
+            "changed.ini",
+            1,
+            "[ebs scratch] added\n"
+            "[cluster default] master_instance_type: t2.large -> t2.xlarge\n"
+            "[cluster default] ebs_settings: shared -> scratch,shared\n"
+            "[compute_resource ondemand_i1] max_count: 10 -> 20\n",
+        ),
+    ],
+)
+def test_diff(mocker, datadir, capsys, target_config_file, expected_exit_code, expected_output):
+    _mock_aws_calls(mocker)
+
+    argv = ["diff", "-c", str(datadir / target_config_file), "-b", str(datadir / "base.ini")]
+    if expected_exit_code:
+        with pytest.raises(SystemExit) as exc_info:
+            cli.main(argv)
+        assert_that(exc_info.value.code).is_equal_to(expected_exit_code)
+    else:
+        cli.main(argv)
+    assert_that(capsys.readouterr().out).is_equal_to(expected_output)
+
+
+def test_diff_with_cluster(mocker, datadir, capsys):
+    _mock_aws_calls(mocker)
+    target_config_file = str(datadir / "changed.ini")
+    # the configuration of the running cluster is the base one
+    base_config = cli.PclusterConfig(config_file=str(datadir / "base.ini"), fail_on_file_absence=True)
+    pcluster_config_class = cli.PclusterConfig
+    pcluster_config_mock = mocker.patch(
+        "pcluster_config.cli.PclusterConfig",
+        side_effect=lambda **kwargs: base_config if "cluster_name" in kwargs else pcluster_config_class(**kwargs),
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(["diff", "-c", target_config_file, "-n", "mycluster"])
+
+    assert_that(exc_info.value.code).is_equal_to(1)
+    pcluster_config_mock.assert_any_call(config_file=target_config_file, cluster_name="mycluster")
+    assert_that(capsys.readouterr().out).is_equal_to(
+        "[ebs scratch] added\n"
+        "[cluster default] master_instance_type: t2.large -> t2.xlarge\n"
+        "[cluster default] ebs_settings: shared -> scratch,shared\n"
+        "[compute_resource ondemand_i1] max_count: 10 -> 20\n"
+    )
+
+
+def _mock_aws_calls(mocker):
+    # the configurations are compared without any AWS call
+    mocker.patch("pcluster.config.cfn_param_types.get_availability_zone_of_subnet", side_effect=AssertionError)
+    mocker.patch(
+        "pcluster.config.json_param_types.utils.InstanceTypeInfo.init_from_instance_type", side_effect=AssertionError
+    )
+    mocker.patch.dict("os.environ", {"AWS_DEFAULT_REGION": "eu-west-1"})